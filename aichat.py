@@ -1,21 +1,21 @@
 import json, time, os
-import speech_recognition as sr
 from gtts import gTTS
 from pygame import mixer
 from awscrt import mqtt
 from awsiot import mqtt_connection_builder
+from backend.audio_input import get_audio_input
 
 #各デバイスごとに設定(AWS IoT → セキュリティ → ポリシー 編集 → JSON → 保存&activate)
 client_id = ""
 
-def get_recognition(listener):
+def get_recognition():
+    # マイクは開いたままの共有の音声入力を使う（雑音の調整は毎回しない）
     try:
-        with sr.Microphone() as source:
-            print("聞き取り中...")
-            listener.adjust_for_ambient_noise(source)
-            voice = listener.listen(source, timeout=10, phrase_time_limit=5)
-            voice_text = listener.recognize_google(voice, language="ja-JP")
-            return voice_text
+        print("聞き取り中...")
+        utterance = get_audio_input().listen(timeout=15)
+        if utterance is None or utterance.error:
+            return None
+        return utterance.text
     except KeyboardInterrupt:
         return -1
     except:
@@ -32,9 +32,10 @@ def speaking(text):
 
     mixer.init()
     mixer.music.load('.mp3')
-    mixer.music.play()
-    while mixer.music.get_busy():
-        time.sleep(0.1)
+    with get_audio_input().muted():  # 読み上げを発話として聞き取らない
+        mixer.music.play()
+        while mixer.music.get_busy():
+            time.sleep(0.1)
     mixer.music.unload()
     os.remove('.mp3')
 
@@ -76,7 +77,7 @@ def ai_chat():
     )
     subscribe_future.result()
 
-    listener = sr.Recognizer()
+    get_audio_input()  # マイクを開いて雑音の調整を始めておく
 
     try:
         state = "停止"
@@ -84,7 +85,7 @@ def ai_chat():
         repeat = False
         while True:
             if state != command[3]:
-                message = get_recognition(listener)
+                message = get_recognition()
             else:
                 if repeat == False:
                     print("音声再生中")
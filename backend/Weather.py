@@ -1,56 +1,46 @@
+import os
 import requests
-from datetime import datetime, timedelta
-import speech_recognition as sr  # 音声認識用ライブラリ
-import pyttsx3  # 音声読み上げ用ライブラリ
-import re  # 自然言語処理用（簡単なテキスト解析）
+from requests.adapters import HTTPAdapter
+from datetime import datetime
+# 音声認識（speech_recognition）と読み上げ（pyttsx3）は、天気予報の関数だけを使う場合には
+# 読み込まないよう、初めて使う関数の中で import する
+import queue
+import threading
+from audio_input import ERROR_UNKNOWN, get_audio_input
+from forecast_cache import ForecastCache
+from forecast_index import ForecastIndex, resolve_dates, resolve_hours, summarize
+from gazetteer import get_gazetteer
 
 # OpenWeatherMap API設定
-API_KEY = ""  # 取得したAPIキーを入力
-BASE_URL = ""  # 天気予報のエンドポイント
+API_KEY = os.getenv("OPENWEATHER_API_KEY", "")  # 取得したAPIキーを入力
+BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "")  # 天気予報のエンドポイント
 UNIT = "metric"  # 摂氏表示 ("imperial" に変更すると華氏)
 
-# 都道府県名リスト
-PREFECTURE_LIST = [
-    "北海道", "青森", "岩手", "宮城", "秋田", "山形", "福島", "茨城", "栃木", "群馬", "埼玉", "千葉", "東京", 
-    "神奈川", "新潟", "富山", "石川", "福井", "山梨", "長野", "岐阜", "静岡", "愛知", "三重", "滋賀", "京都", 
-    "大阪", "兵庫", "奈良", "和歌山", "鳥取", "島根", "岡山", "広島", "山口", "徳島", "香川", "愛媛", "高知", 
-    "福岡", "佐賀", "長崎", "熊本", "大分", "宮崎", "鹿児島", "沖縄"
-]
+# 接続を使い回す HTTP セッション（毎回の TCP/TLS ハンドシェイクを省く）
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+http_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
-# 都道府県名 + 市町村名を自動認識する
+# 都道府県名 + 市町村名を自動認識する（地名辞書から最長一致で探す）
 def get_prefecture_and_city(input_text):
-    # 都道府県を探す
-    prefecture = None
-    for pref in PREFECTURE_LIST:
-        if pref in input_text:
-            prefecture = pref
-            break
-
-    # 市町村名（都道府県内の具体的な地域）を認識するため、入力されたテキストに市町村名が含まれているか
-    city_match = re.search(r"(郡山|札幌|名古屋|大阪|福岡|東京|京都|横浜|神戸|広島|仙台)", input_text)
-    city = city_match.group(0) if city_match else None
-
-    return prefecture, city
-
-# 天気データを取得
-def get_weather_forecast(city):
-    city_translation = {
-        "大阪": "Osaka",
-        "東京": "Tokyo",
-        "名古屋": "Nagoya",
-        "京都": "Kyoto",
-        "横浜": "Yokohama"
-    }
-    city = city_translation.get(city, city)
+    prefecture, city = get_gazetteer().extract(input_text)
+    return (prefecture.prefecture if prefecture else None), (city.name if city else None)
 
+# API から天気データを取得（キャッシュを通さない）
+def fetch_weather_forecast(city):
     params = {
-        "q": f"{city},JP",
         "appid": API_KEY,
         "units": UNIT,
         "lang": "ja"
     }
+    # 地名辞書にあれば座標で問い合わせる（同名の地名と取り違えないため）
+    place = get_gazetteer().lookup(city)
+    if place:
+        params.update({"lat": place.lat, "lon": place.lon})
+    else:
+        params["q"] = f"{city},JP"
     print("APIリクエストパラメータ:", params)
-    response = requests.get(BASE_URL, params=params)
+    response = http_session.get(BASE_URL, params=params, timeout=10)
 
     if response.status_code == 200:
         return response.json()
@@ -59,13 +49,39 @@ def get_weather_forecast(city):
         print("エラー詳細:", response.json())
         return None
 
-# 指定した日付の天気情報を取得
+# 都市ごとの予報キャッシュ（予報の更新時刻までは API を呼ばない）
+forecast_cache = ForecastCache(fetch_weather_forecast)
+
+# 天気データを取得
+def get_weather_forecast(city):
+    return forecast_cache.get(city)
+
+# 予報データごとの索引（同じデータなら解析し直さない）
+_forecast_indexes = {}
+
+def get_forecast_index(city):
+    data = get_weather_forecast(city)
+    if not data:
+        return None
+    cached = _forecast_indexes.get(city)
+    if cached is None or cached[0] is not data:
+        cached = (data, ForecastIndex(data))
+        _forecast_indexes[city] = cached
+    return cached[1]
+
+# 予報データの索引（get_forecast_index で作った同じデータの索引があれば使い回す）
+def index_for(data):
+    for cached_data, index in _forecast_indexes.values():
+        if cached_data is data:
+            return index
+    return ForecastIndex(data)
+
+# 指定した日付の天気情報を取得（日付は都市の現地時刻で数える）
 def get_weather(data, date_str):
     if not data:
         return None
 
-    forecast_list = data.get("list", [])
-    weather = [entry for entry in forecast_list if date_str in entry["dt_txt"]]
+    weather = index_for(data).day(date_str)
 
     if weather:
         return weather
@@ -80,78 +96,145 @@ def format_date_without_year(date_str):
 
 # 音声認識でテキストを取得
 def recognize_audio():
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        instruction = "天気を知りたい場所と日付を音声で教えてください。例: 明日の大阪の天気を教えてください。"
-        print(instruction)
-        speak(instruction)
-        recognizer.adjust_for_ambient_noise(source)
-        print("録音を開始します。")
-        audio = recognizer.listen(source, timeout=10, phrase_time_limit=15)  # ここで音声認識時間を調整
-        try:
-            text = recognizer.recognize_google(audio, language='ja-JP')
-            print(f"認識されたテキスト: {text}")
-            return text
-        except sr.UnknownValueError:
-            error_message = "音声を認識できませんでした。"
-            print(error_message)
-            speak(error_message)
-            return None
-        except sr.RequestError as e:
-            error_message = f"音声認識サービスのエラー: {e}"
-            print(error_message)
-            speak(error_message)
-            return None
-
-# 音声で読み上げる
-def speak(text):
-    engine = pyttsx3.init()
-    engine.setProperty('rate', 150)
-    engine.setProperty('volume', 1)
-    engine.say(text)
-    engine.runAndWait()
+    # マイクは開いたままの共有の音声入力を使う（雑音の調整は起動時の1回とバックグラウンドでの再調整だけ）
+    audio_input = get_audio_input()
+    instruction = "天気を知りたい場所と日付を音声で教えてください。例: 明日の大阪の天気を教えてください。"
+    print(instruction)
+    with audio_input.muted():
+        speak(instruction, block=True)  # 案内を録音しないように読み終わるまで待つ
+    print("録音を開始します。")
+    utterance = audio_input.listen(timeout=25)  # 話し始めるまで10秒 + 発話の長さ15秒まで待つ
+    if utterance is None or utterance.error == ERROR_UNKNOWN:
+        error_message = "音声を認識できませんでした。"
+        print(error_message)
+        speak(error_message)
+        return None
+    if utterance.error:
+        error_message = f"音声認識サービスのエラー: {utterance.detail}"
+        print(error_message)
+        speak(error_message)
+        return None
+    print(f"認識されたテキスト: {utterance.text}")
+    return utterance.text
+
+class SpeechWorker:
+    """
+    1つの pyttsx3 エンジンを持ち続け、キューに入った文を順に読み上げるスレッド
+    エンジンの初期化は最初の1回だけで、呼び出し側は読み上げの終了を待たずに処理を続けられる
+    """
+
+    def __init__(self, rate=150, volume=1):
+        self.rate = rate
+        self.volume = volume
+        self._queue = queue.Queue()
+        self._interrupted = threading.Event()
+        self._engine = None
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def say(self, text):
+        self._queue.put(text)
+
+    def wait(self):
+        """
+        キューに入っている文をすべて読み終わるまで待つ
+        """
+        self._queue.join()
+
+    def interrupt(self):
+        """
+        読み上げ中の文を止め、待っている文を捨てる（割り込み）
+        """
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        self._interrupted.set()
+
+    def _on_word(self, name, location, length):
+        # pyttsx3 のエンジンはコールバックの中からしか安全に止められない
+        if self._interrupted.is_set():
+            self._engine.stop()
+
+    def _run(self):
+        import pyttsx3  # 音声読み上げ用ライブラリ
+        # pyttsx3 のエンジンは作成したスレッドで使う必要がある
+        self._engine = pyttsx3.init()
+        self._engine.setProperty('rate', self.rate)
+        self._engine.setProperty('volume', self.volume)
+        self._engine.connect('started-word', self._on_word)
+        while True:
+            text = self._queue.get()
+            self._interrupted.clear()
+            try:
+                self._engine.say(text)
+                self._engine.runAndWait()
+            except RuntimeError as e:
+                print(f"読み上げエラー: {e}")
+            finally:
+                self._queue.task_done()
+
+
+_speech_worker = None
+
+
+def get_speech_worker():
+    global _speech_worker
+    if _speech_worker is None:
+        _speech_worker = SpeechWorker()
+    return _speech_worker
+
+
+def warm_up():
+    """
+    スキルのワーカー起動時に、読み上げエンジンを初期化しておく
+    （マイクは実際に聞くときに開く。使っていないスキルのワーカーがマイクを開いたままにしないように）
+    """
+    get_speech_worker()
+
+
+# 音声で読み上げる（block=True の場合は読み終わるまで待つ）
+def speak(text, block=False):
+    worker = get_speech_worker()
+    worker.say(text)
+    if block:
+        worker.wait()
 
 # 入力テキストから日付と場所を抽出
 def extract_date_and_location(input_text):
-    today = datetime.now()
-    tomorrow = today + timedelta(days=1)
-    target_date = None
-
-    # 日付を解析
-    if "今日" in input_text:
-        target_date = today.strftime("%Y-%m-%d")
-    elif "明日" in input_text:
-        target_date = tomorrow.strftime("%Y-%m-%d")
+    # 日付を解析（今日・明日・明後日・週末・曜日）
+    target_dates = resolve_dates(input_text)
 
     # 都道府県と市町村を解析
     prefecture, city = get_prefecture_and_city(input_text)
 
-    return target_date, prefecture, city
+    return target_dates, prefecture, city
 
 # メイン処理
 def main():
     input_text = recognize_audio()
     if input_text:
-        target_date, prefecture, city = extract_date_and_location(input_text)
+        target_dates, prefecture, city = extract_date_and_location(input_text)
+        hours = resolve_hours(input_text)  # 朝・夜などの時間帯（指定がなければ1日分）
 
-        if target_date and prefecture:
+        if target_dates and prefecture:
             if city is None:
                 print("市町村が見つかりませんでした。代表都市を使用します。")
                 city = prefecture  # 市町村が見つからない場合、都道府県名を代用する
 
-            print(f"場所: {prefecture}, 市町村: {city}, 日付: {target_date}")
+            print(f"場所: {prefecture}, 市町村: {city}, 日付: {', '.join(target_dates)}")
+            speak(f"{city}の天気を調べます。")  # 読み上げている間に天気データを取得する
 
-            weather_data = get_weather_forecast(city)
-            weather_info = get_weather(weather_data, target_date)
+            forecast_index = get_forecast_index(city)
+            weather_summary = None
+            if forecast_index:
+                weather_summary = summarize(
+                    {f"{prefecture} ({city})": forecast_index}, target_dates, hours,
+                    format_date=format_date_without_year,
+                )
 
-            if weather_info:
-                formatted_date = format_date_without_year(target_date)
-                weather_summary = f"{formatted_date}の{prefecture} ({city})の天気:\n"
-                for forecast in weather_info:
-                    time = forecast["dt_txt"][11:16]
-                    temp = forecast["main"]["temp"]
-                    weather = forecast["weather"][0]["description"]
-                    weather_summary += f"- {time}: 温度 {temp}°, 天気: {weather}\n"
+            if weather_summary:
                 print(weather_summary)
                 speak(weather_summary)
             else:
@@ -163,5 +246,8 @@ def main():
             print(error_message)
             speak(error_message)
 
+    # 読み上げが終わる前にプロセスが終了しないように待つ
+    get_speech_worker().wait()
+
 if __name__ == "__main__":
     main()
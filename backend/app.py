@@ -3,15 +3,24 @@ from tkinter import Canvas, Frame
 import asyncio
 import websockets
 import threading
-import speech_recognition as sr
-from gtts import gTTS
-import tempfile
-import pygame
 import os  # os モジュールをインポート
 import time
+import socket
+from urllib.parse import quote
+from ws_protocol import parse_frame, FRAME_START, FRAME_DELTA, FRAME_END, FRAME_SKILL
+from rsp_state import MOVE_NAMES
+from speech_output import StreamingSpeaker
+from intents import IntentRouter, CLIENT_INTENTS
+from audio_input import ERROR_UNKNOWN, get_audio_input
 
-# WebSocket のエンドポイント
-WS_URL = "ws://127.0.0.1:8000/ws"
+# キオスクごとのセッションID（サーバー側で会話履歴を分けるために使う）
+KIOSK_ID = os.getenv("KIOSK_ID", socket.gethostname())
+
+# WebSocket のエンドポイント（stream=1 で応答を逐次受信する）
+WS_URL = f"ws://127.0.0.1:8000/ws?stream=1&session_id={quote(KIOSK_ID)}"
+
+# 音声コマンドの振り分け（おやすみ・おはよう）
+intent_router = IntentRouter(CLIENT_INTENTS)
 
 class ChatApp:
     def __init__(self, root):
@@ -57,8 +66,21 @@ class ChatApp:
         # ウィンドウサイズ変更時の動作
         self.root.bind("<Configure>", self.on_resize)
 
+        # マイクを開いて雑音の調整を始めておく（調整は起動時の1回とバックグラウンドでの再調整だけ）
+        self.audio_input = get_audio_input()
+
+        # 読み上げ（文ごとに合成と再生を重ねる）。読み上げ後に音声認識を再開する
+        # 再生中に聞こえた音声（AI の読み上げ自身）は発話として扱わない
+        self.speaker = StreamingSpeaker(
+            on_done=self.start_speech_recognition,
+            on_error=lambda e: self.add_message(f"読み上げエラー: {e}", "System"),
+            muted=self.audio_input.muted,
+        )
+
         # WebSocket 接続を非同期で開始
         self.websocket = None
+        self.stream_label = None  # ストリーミング中のAIバブル
+        self.stream_text = ""
         self.loop = asyncio.get_event_loop()
         threading.Thread(target=self.loop.run_forever, daemon=True).start()
         asyncio.run_coroutine_threadsafe(self.connect_websocket(), self.loop)
@@ -66,9 +88,6 @@ class ChatApp:
         # 初回の音声認識を開始
         self.start_speech_recognition()
 
-        # pygame の初期化
-        pygame.mixer.init()
-
     def add_message(self, message, sender="User"):
         """
         メッセージを追加（LINE風デザイン）
@@ -103,6 +122,15 @@ class ChatApp:
         # スクロールを最下部に移動
         self.canvas.update_idletasks()
         self.canvas.yview_moveto(1.0)
+        return text
+
+    def append_to_message(self, label, text):
+        """
+        既存のバブルにテキストを追記する（ストリーミング表示用）
+        """
+        label.configure(text=label.cget("text") + text)
+        self.canvas.update_idletasks()
+        self.canvas.yview_moveto(1.0)
 
     async def connect_websocket(self):
         """
@@ -122,15 +150,47 @@ class ChatApp:
         while self.websocket:
             try:
                 response = await self.websocket.recv()
-                self.add_message(response, "AI")
-                # AIの応答を読み上げ
-                self.speak_text(response)
-                # AIの応答後に音声認識を再開
-                self.start_speech_recognition()
+                frame = parse_frame(response)
+                if frame is None:
+                    # 通常のテキスト応答
+                    self.add_message(response, "AI")
+                    # AIの応答を読み上げ
+                    self.speak_text(response)
+                elif frame["type"] == FRAME_START:
+                    # 新しいバブルを作り、以降の差分を追記していく
+                    self.stream_text = ""
+                    self.stream_label = self.add_message("", "AI")
+                elif frame["type"] == FRAME_DELTA:
+                    self.stream_text += frame["text"]
+                    if self.stream_label is not None:
+                        self.append_to_message(self.stream_label, frame["text"])
+                    # 文が揃った分から読み上げを始める
+                    self.speaker.feed(frame["text"])
+                elif frame["type"] == FRAME_END:
+                    self.stream_label = None
+                    self.speaker.finish()
+                elif frame["type"] == FRAME_SKILL:
+                    self.show_skill_result(frame["skill"], frame["result"])
             except Exception as e:
                 self.add_message(f"メッセージ受信エラー: {e}", "System")
                 break
 
+    def show_skill_result(self, skill, result):
+        """
+        スキルの状態・結果（JSON）を表示し、結果は読み上げる
+        """
+        if result.get("status") == "started":
+            # 実行中は読み上げない（読み上げが終わると音声認識が再開してしまうため）
+            self.add_message(f"{skill} を実行しています…", "System")
+            return
+        if skill == "rsp" and result.get("status") == "finished":
+            text = (f"{result['message']}（あなた: {MOVE_NAMES[result['player']]}"
+                    f" / AI: {MOVE_NAMES[result['ai']]}）")
+        else:
+            text = result.get("message") or "結果を取得できませんでした。"
+        self.add_message(text, "AI")
+        self.speak_text(text)
+
     def send_message(self, message):
         """
         WebSocket を通じてメッセージを送信
@@ -147,54 +207,37 @@ class ChatApp:
             threading.Thread(target=self._speech_recognition, daemon=True).start()
 
     def _speech_recognition(self):
-        recognizer = sr.Recognizer()
-        with sr.Microphone() as source:
-            self.in_speech_recognition = True  # 音声認識中フラグを立てる
+        # 共有の音声入力から発話を順に受け取る（マイクは開いたままで、発話ごとの雑音の調整はしない）
+        self.in_speech_recognition = True  # 音声認識中フラグを立てる
+        try:
             while True:  # スリープモード中も音声認識を続ける
-                try:
-                    recognizer.adjust_for_ambient_noise(source)
-                    audio = recognizer.listen(source, timeout=600)
-
-                    # 音声入力が「おやすみ」または「おはよう」の場合
-                    message = recognizer.recognize_google(audio, language="ja-JP")
-                    print(f"音声認識結果: {message}")
+                utterance = self.audio_input.get()
+                if utterance.error == ERROR_UNKNOWN:
+                    continue
+                if utterance.error:
+                    self.add_message(f"音声認識エラー: {utterance.detail}", "System")
+                    continue
 
-                    if "おやすみ" in message:
-                        self.activate_sleep_mode()
-                    elif "おはよう" in message:
-                        self.deactivate_sleep_mode()
+                # 音声入力が「おやすみ」または「おはよう」の場合
+                message = utterance.text
+                print(f"音声認識結果: {message}")
 
-                    elif not self.sleep_mode:  # スリープモード中でない場合にメッセージ送信
-                        self.root.after(0, self.send_message, message)
+                intent = intent_router.route(message)
+                if intent == "sleep":
+                    self.activate_sleep_mode()
+                elif intent == "wake":
+                    self.deactivate_sleep_mode()
 
-                except sr.UnknownValueError:
-                    continue
-                except sr.RequestError as e:
-                    self.add_message(f"音声認識エラー: {e}", "System")
-                    continue
-                finally:
-                    self.in_speech_recognition = False  # 音声認識が終わったのでフラグを戻す
+                elif not self.sleep_mode:  # スリープモード中でない場合にメッセージ送信
+                    self.root.after(0, self.send_message, message)
+        finally:
+            self.in_speech_recognition = False  # 音声認識が終わったのでフラグを戻す
 
     def speak_text(self, text):
         """
-        テキストを読み上げる
+        テキストを読み上げる（再生はバックグラウンドで行われ、終わると音声認識を再開する）
         """
-        try:
-            tts = gTTS(text=text, lang="ja")
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                temp_path = temp_file.name
-            tts.save(temp_path)
-
-            # pygame で音声を再生
-            pygame.mixer.music.load(temp_path)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                time.sleep(0.1)  # 再生が終わるまで待機
-
-            pygame.mixer.music.unload()  # ファイルをアンロードして削除可能にする
-            os.remove(temp_path)  # 再生後に一時ファイルを削除
-        except Exception as e:
-            self.add_message(f"読み上げエラー: {e}", "System")
+        self.speaker.speak(text)
 
     def _blink_red_line(self):
         """
@@ -0,0 +1,251 @@
+"""
+マイクを開いたままにして、聞き取った発話を順に渡す音声入力サービス
+
+- 周囲の雑音に合わせたしきい値の調整（adjust_for_ambient_noise）は起動時に1回だけ行う
+- その後は、発話のない間にバックグラウンドで一定間隔ごとに調整し直す
+- 音声の認識（Google の音声認識）は別スレッドで行い、その間もマイクは次の発話を聞く
+- 認識した発話は Utterance としてキューに入れ、呼び出し側は get() / listen() で受け取る
+- 誰も発話を待っていない間（最後の get() / listen() から AUDIO_HOLD_SECONDS 秒以上）の音声は、
+  認識に送らずに捨てる（使っていないスキルのワーカーが周りの会話を送り続けないように）
+- 自分の読み上げは、muted() の間は聞こえた音声ごと捨てる。speaking() の間は聞き続け、
+  読み上げとよく似た発話（読み上げそのものを聞き取ったもの）だけを捨てる
+
+アプリ・スキル・aichat.py で同じ使い方をするため、backend 内の他のモジュールには依存しない。
+"""
+import os
+import queue
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+
+# 音声入力の設定（環境変数で上書き可能）
+AUDIO_LANGUAGE = os.getenv("AUDIO_LANGUAGE", "ja-JP")
+AUDIO_CALIBRATION_SECONDS = float(os.getenv("AUDIO_CALIBRATION_SECONDS", "1"))  # 起動時の調整で雑音を聞く時間（秒）
+AUDIO_RECALIBRATION_SECONDS = float(os.getenv("AUDIO_RECALIBRATION_SECONDS", "0.5"))  # 再調整で雑音を聞く時間（秒）
+AUDIO_RECALIBRATE_INTERVAL = float(os.getenv("AUDIO_RECALIBRATE_INTERVAL", "60"))  # 再調整の間隔（秒）
+AUDIO_IDLE_TIMEOUT = float(os.getenv("AUDIO_IDLE_TIMEOUT", "5"))  # この時間発話がなければ無音とみなす（秒）
+AUDIO_PHRASE_TIME_LIMIT = float(os.getenv("AUDIO_PHRASE_TIME_LIMIT", "15"))  # 1回の発話の長さの上限（秒）
+AUDIO_HOLD_SECONDS = float(os.getenv("AUDIO_HOLD_SECONDS", "10"))  # 発話を受け取った後も認識を続ける時間（秒）
+AUDIO_ECHO_SIMILARITY = float(os.getenv("AUDIO_ECHO_SIMILARITY", "0.6"))  # speaking() の読み上げとこれ以上似た発話は捨てる（0〜1）
+ECHO_KEEP_SECONDS = 30  # 読み上げが終わってから、その文言を照合に使う時間（秒。認識の遅れの分）
+
+# 認識できなかったときの Utterance.error
+ERROR_UNKNOWN = "unknown"  # 音声は聞き取ったが、言葉として認識できなかった
+ERROR_REQUEST = "request"  # 音声認識サービスに接続できなかった（detail に内容）
+
+# 聞き取った発話（heard_at は話し終わった時刻、recognized_at は認識が終わった時刻。time.perf_counter() の値）
+Utterance = namedtuple("Utterance", ["text", "heard_at", "recognized_at", "error", "detail"])
+
+
+def recognize_google(recognizer, audio, language):
+    return recognizer.recognize_google(audio, language=language)
+
+
+def _compact(text):
+    # 読み上げと認識結果を比べるため、全角/半角をそろえて空白と句読点を除く
+    text = unicodedata.normalize("NFKC", text).lower()
+    return "".join(c for c in text if not unicodedata.category(c).startswith(("Z", "P")))
+
+
+class AudioInputService:
+    """
+    マイクを1つ開いたままにして、発話を認識してキューに入れるサービス
+    muted() の間に聞こえた音声（自分の読み上げなど）は捨てる
+    speaking() の間は、読み上げとよく似た発話だけを捨てる
+    """
+
+    def __init__(self, language=AUDIO_LANGUAGE, calibration_seconds=AUDIO_CALIBRATION_SECONDS,
+                 recalibration_seconds=AUDIO_RECALIBRATION_SECONDS,
+                 recalibrate_interval=AUDIO_RECALIBRATE_INTERVAL, idle_timeout=AUDIO_IDLE_TIMEOUT,
+                 phrase_time_limit=AUDIO_PHRASE_TIME_LIMIT, hold_seconds=AUDIO_HOLD_SECONDS,
+                 echo_similarity=AUDIO_ECHO_SIMILARITY, source=None, recognize=recognize_google):
+        self.language = language
+        self.calibration_seconds = calibration_seconds
+        self.recalibration_seconds = recalibration_seconds
+        self.recalibrate_interval = recalibrate_interval
+        self.idle_timeout = idle_timeout
+        self.phrase_time_limit = phrase_time_limit
+        self.hold_seconds = hold_seconds
+        self.echo_similarity = echo_similarity
+        self.source = source  # 音声の入力元（None ならマイク。計測では録音を実時間で流す入力元を渡す）
+        self.recognize = recognize  # (recognizer, audio, language) -> テキスト
+        self.recognizer = None
+        self.ready = threading.Event()  # 最初の調整が終わったら立つ
+        self.calibrations = 0
+        self.calibration_time = 0.0  # 調整に使った時間の合計（秒）
+        self.dropped = 0  # 読み上げ中や、誰も待っていない間に捨てた音声の数（読み上げを聞き取った発話も含む）
+        self._audio = queue.Queue()
+        self._utterances = queue.Queue()
+        self._stopped = threading.Event()
+        self._muted = 0
+        self._unmuted_at = 0.0
+        self._echoes = []  # speaking() で読み上げた [文言, 開始時刻, 終了時刻（読み上げ中は None）]
+        self._waiting = 0  # get() で発話を待っている呼び出しの数
+        self._requested_at = None  # 最後に get() が戻った時刻（None ならまだ誰も待っていない）
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return self
+        import speech_recognition as sr
+        self.recognizer = sr.Recognizer()
+        for target in (self._listen_loop, self._recognize_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._audio.put(None)
+
+    def get(self, timeout=None):
+        """
+        次の発話を返す（すでにキューにあるものから順に。timeout 秒待ってもなければ None）
+        """
+        with self._lock:
+            self._waiting += 1
+        try:
+            return self._utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                self._requested_at = time.perf_counter()
+
+    def listen(self, timeout=None):
+        """
+        呼び出した後に話し終わった発話を返す（質問してから答えを待つとき用。古い発話は捨てる）
+        """
+        since = time.perf_counter()
+        deadline = None if timeout is None else since + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                return None
+            utterance = self.get(remaining)
+            if utterance is None or utterance.heard_at >= since:
+                return utterance
+
+    @contextmanager
+    def muted(self):
+        """
+        この間に聞こえた音声は発話として扱わない（自分の読み上げを聞き取らないため）
+        """
+        with self._lock:
+            self._muted += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._muted -= 1
+                self._unmuted_at = time.perf_counter()
+
+    @contextmanager
+    def speaking(self, text):
+        """
+        text を読み上げている間も発話を聞き続け、読み上げそのものを聞き取った発話だけを捨てる
+        （muted() と違い、確認の読み上げ中に言われた次のコマンドを取りこぼさない）
+        """
+        echo = [_compact(text), time.perf_counter(), None]
+        with self._lock:
+            self._echoes.append(echo)
+        try:
+            yield
+        finally:
+            with self._lock:
+                echo[2] = time.perf_counter()
+
+    def _is_echo(self, text, started_at, heard_at):
+        """
+        読み上げ中に聞こえ、読み上げた文言とよく似ている発話か
+        """
+        text = _compact(text)
+        now = time.perf_counter()
+        with self._lock:
+            self._echoes = [echo for echo in self._echoes
+                            if echo[2] is None or now - echo[2] < ECHO_KEEP_SECONDS]
+            echoes = list(self._echoes)
+        for spoken, start, end in echoes:
+            overlaps = heard_at >= start and (end is None or started_at <= end)
+            if overlaps and SequenceMatcher(None, text, spoken).ratio() >= self.echo_similarity:
+                return True
+        return False
+
+    def _calibrate(self, source, duration):
+        start = time.perf_counter()
+        self.recognizer.adjust_for_ambient_noise(source, duration=duration)
+        self.calibration_time += time.perf_counter() - start
+        self.calibrations += 1
+        return time.perf_counter()
+
+    def _should_drop(self, started_at):
+        with self._lock:
+            if self._muted > 0 or started_at < self._unmuted_at:
+                return True
+            if self._waiting:
+                return False
+            return self._requested_at is None or time.perf_counter() - self._requested_at > self.hold_seconds
+
+    def _listen_loop(self):
+        import speech_recognition as sr
+        source = self.source if self.source is not None else sr.Microphone()
+        with source:
+            calibrated_at = self._calibrate(source, self.calibration_seconds)
+            self.ready.set()
+            while not self._stopped.is_set():
+                try:
+                    audio = self.recognizer.listen(source, timeout=self.idle_timeout,
+                                                   phrase_time_limit=self.phrase_time_limit)
+                except sr.WaitTimeoutError:
+                    # 無音の間に、必要なら雑音のしきい値を調整し直す
+                    if time.perf_counter() - calibrated_at >= self.recalibrate_interval:
+                        calibrated_at = self._calibrate(source, self.recalibration_seconds)
+                    continue
+                heard_at = time.perf_counter()
+                # 音声の先頭には話し始める前の無音が含まれるので、その分を除いて話し始めた時刻を求める
+                duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+                started_at = heard_at - duration + self.recognizer.non_speaking_duration
+                if self._should_drop(started_at):
+                    self.dropped += 1
+                    continue
+                self._audio.put((audio, heard_at, started_at))
+
+    def _recognize_loop(self):
+        import speech_recognition as sr
+        while True:
+            item = self._audio.get()
+            if item is None:
+                return
+            audio, heard_at, started_at = item
+            try:
+                text = self.recognize(self.recognizer, audio, self.language)
+                if self._is_echo(text, started_at, heard_at):
+                    self.dropped += 1
+                    continue
+                utterance = Utterance(text, heard_at, time.perf_counter(), None, None)
+            except sr.UnknownValueError:
+                utterance = Utterance("", heard_at, time.perf_counter(), ERROR_UNKNOWN, None)
+            except sr.RequestError as e:
+                utterance = Utterance("", heard_at, time.perf_counter(), ERROR_REQUEST, str(e))
+            self._utterances.put(utterance)
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_audio_input():
+    """
+    プロセスで共有する音声入力サービス（最初の呼び出しでマイクを開き、調整を始める）
+    """
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = AudioInputService().start()
+        return _default_service
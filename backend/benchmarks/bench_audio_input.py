@@ -0,0 +1,189 @@
+"""
+音声入力のベンチマーク（発話ごとに雑音を調整する従来の方法 vs 共有の音声入力サービス）
+
+合成した録音（小さな雑音の中に、決まった間隔で発話に見立てた大きな音が入る）を
+マイクの代わりに実時間で流し、次の2つの方法で聞き取る。
+- 従来: 発話ごとに adjust_for_ambient_noise（1秒）をしてから listen し、その場で認識する
+- サービス: AudioInputService（調整は最初の1回だけ。認識は別スレッド）
+
+認識は --recognize ミリ秒待って固定の文を返す関数で代用する（ネットワークは使わない）。
+聞き取れた発話の数と、話し終わってから認識結果を受け取るまでの時間を比べる。
+
+実行例:
+    python backend/benchmarks/bench_audio_input.py --recognize 600
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+from audio_input import AudioInputService
+
+SAMPLE_RATE = 16000
+LEAD_SECONDS = 1.5  # 最初の発話までの無音（最初の調整に使う）
+# (前の発話が終わってからの間隔（秒）, 発話の長さ（秒）)。すぐに続ける返事も混ぜる
+# （間隔は、発話の区切りとみなす無音 pause_threshold の 0.8 秒より長くする）
+SCRIPT = [(0.0, 1.2), (2.0, 1.0), (1.0, 0.8), (2.5, 1.5), (1.1, 0.6), (1.5, 1.0)]
+
+
+def synthesize(script, seed=0):
+    """
+    雑音の中に発話を入れた 16bit モノラルの PCM と、各発話の (開始, 終了) 秒を返す
+    """
+    rng = random.Random(seed)
+    samples = array("h")
+    spans = []
+    t = LEAD_SECONDS
+
+    def noise(seconds):
+        for _ in range(int(seconds * SAMPLE_RATE)):
+            samples.append(int(rng.gauss(0, 150)))
+
+    noise(LEAD_SECONDS)
+    for index, (gap, length) in enumerate(script):
+        if index:
+            noise(gap)
+            t += gap
+        for i in range(int(length * SAMPLE_RATE)):
+            tone = 6000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)
+            samples.append(int(tone + rng.gauss(0, 800)))
+        spans.append((t, t + length))
+        t += length
+    return samples.tobytes(), spans
+
+
+class RealtimeStream:
+    """
+    録音を実時間で返すストリーム。読まれていない間の音声は（マイクと同じく）失われる
+    録音が終わった後は無音を返し続ける
+    """
+
+    def __init__(self, pcm, started_at, chunk):
+        self.pcm = pcm
+        self.started_at = started_at
+        self.chunk_bytes = chunk * 2
+        self.position = None  # 次に返すバイト位置
+        self.silence = array("h", [0] * chunk).tobytes()
+
+    def seek_to_now(self):
+        self.position = max(0, int((time.perf_counter() - self.started_at) * SAMPLE_RATE)) * 2
+
+    def read(self, size):
+        now_position = int((time.perf_counter() - self.started_at) * SAMPLE_RATE) * 2
+        if now_position - self.position > self.chunk_bytes * 4:
+            self.position = now_position - self.chunk_bytes * 4  # 読まなかった分はバッファからあふれた
+        end = self.position + self.chunk_bytes
+        wait = self.started_at + end / 2 / SAMPLE_RATE - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        data = self.pcm[self.position:end]
+        self.position = end
+        return data + self.silence[len(data):]
+
+
+class RealtimeSource(sr.AudioSource):
+    """
+    sr.Microphone の代わりに、録音を実時間で流す入力元
+    """
+
+    def __init__(self, pcm, started_at):
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = 1024
+        self.stream = RealtimeStream(pcm, started_at, self.CHUNK)
+
+    def __enter__(self):
+        self.stream.seek_to_now()  # 開いた時点からの音声だけを聞ける
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def make_recognize(delay):
+    def recognize(recognizer, audio, language):
+        time.sleep(delay)
+        return "発話"
+    return recognize
+
+
+def run_legacy(pcm, until, delay):
+    """
+    従来の app.py と同じく、発話ごとに調整してから聞き、その場で認識する
+    """
+    started_at = time.perf_counter()
+    source = RealtimeSource(pcm, started_at)
+    recognizer = sr.Recognizer()
+    recognize = make_recognize(delay)
+    results = []  # (話し終わった時刻, 認識が終わった時刻)（録音の先頭からの秒）
+    calibration = 0.0
+    with source:
+        while time.perf_counter() - started_at < until:
+            start = time.perf_counter()
+            recognizer.adjust_for_ambient_noise(source)
+            calibration += time.perf_counter() - start
+            try:
+                audio = recognizer.listen(source, timeout=until - (time.perf_counter() - started_at))
+            except sr.WaitTimeoutError:
+                break
+            heard_at = time.perf_counter() - started_at
+            recognize(recognizer, audio, "ja-JP")
+            results.append((heard_at, time.perf_counter() - started_at))
+    return results, calibration
+
+
+def run_service(pcm, until, delay):
+    started_at = time.perf_counter()
+    service = AudioInputService(source=RealtimeSource(pcm, started_at), recognize=make_recognize(delay))
+    service.start()
+    results = []
+    while time.perf_counter() - started_at < until:
+        utterance = service.get(timeout=0.2)
+        if utterance is not None and not utterance.error:
+            results.append((utterance.heard_at - started_at, utterance.recognized_at - started_at))
+    service.stop()
+    return results, service.calibration_time
+
+
+def match(results, spans, pause):
+    """
+    認識結果を発話に対応づけ、聞き取れた発話の数と、話し終わってから認識結果までの時間（秒）を返す
+    （聞き取りは発話の終わりから pause 秒ほどの無音を待ってから終わる）
+    """
+    heard = set()
+    latencies = []
+    for heard_at, recognized_at in results:
+        ended = [index for index, (start, end) in enumerate(spans) if end <= heard_at <= end + pause + 1.0]
+        if ended:
+            index = ended[-1]
+            heard.add(index)
+            latencies.append(recognized_at - spans[index][1])
+    return len(heard), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recognize", type=float, default=600, help="認識1回にかかる時間（ミリ秒）")
+    args = parser.parse_args()
+
+    pcm, spans = synthesize(SCRIPT)
+    until = spans[-1][1] + 3.0
+    pause = sr.Recognizer().pause_threshold
+    print(f"発話 {len(spans)} 回（録音 {until:.1f} 秒）, 認識 {args.recognize:.0f} ms")
+    print(f"{'方式':<12}{'聞き取れた発話':>14}{'認識まで p50 (ms)':>20}{'調整に使った時間 (ms)':>24}")
+    for label, run in [("従来", run_legacy), ("サービス", run_service)]:
+        results, calibration = run(pcm, until, args.recognize / 1000)
+        heard, latencies = match(results, spans, pause)
+        p50 = f"{statistics.median(latencies) * 1000:.0f}" if latencies else "-"
+        print(f"{label:<12}{heard:>10} / {len(spans)}{p50:>20}{calibration * 1000:>24.0f}")
+
+
+if __name__ == "__main__":
+    main()
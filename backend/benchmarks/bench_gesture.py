@@ -0,0 +1,100 @@
+"""
+じゃんけんのジェスチャー判定の1フレームあたりのコストのベンチマーク
+
+フィクスチャのランドマークを MediaPipe の結果と同じ形（.landmark[i].x/.y/.z）にして、
+スカラー版（1手ずつ math.sqrt。カメラ処理が使う）とベクトル版（配列への変換 + 全手を配列演算で判定）を比較する。
+ベクトル版は配列への変換を含めた時間と、判定だけの時間の両方を出す。
+--sweep を付けると、1フレームの手の数を変えてスカラー版とベクトル版（変換込み）を比べ、
+ベクトル版のほうが速くなる手の数（gesture.VECTORIZE_MIN_HANDS の目安）を出す。
+
+実行例:
+    python backend/benchmarks/make_landmark_fixtures.py
+    python backend/benchmarks/bench_gesture.py --repeat 50
+    python backend/benchmarks/bench_gesture.py --sweep 1 2 4 8 16 32 64
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gesture import classify_gestures, landmarks_to_array, recognize_hand_gesture
+from make_landmark_fixtures import DEFAULT_OUTPUT
+
+
+def load_frames(path):
+    """
+    フィクスチャを、フレームごとの MediaPipe 風の手のリストにする（手が映っていないフレームは除く）
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        fixtures = json.load(f)
+    frames = []
+    for sequence in fixtures["sequences"]:
+        for hands in sequence["frames"]:
+            if hands:
+                frames.append([
+                    SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in hand])
+                    for hand in hands
+                ])
+    return frames
+
+
+def bench(frames, classify, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for hands in frames:
+            classify(hands)
+    return (time.perf_counter() - start) / (repeat * len(frames))
+
+
+def sweep(frames, counts, repeat):
+    """
+    1フレームの手の数ごとに、スカラー版とベクトル版（変換込み）の1フレームあたりの時間を出す
+    """
+    hands = [hand for frame in frames for hand in frame]
+    print(f"{'手の数':<8}{'スカラー (µs)':>16}{'ベクトル (µs)':>16}")
+    crossover = None
+    for count in counts:
+        batches = [[hands[(start + i) % len(hands)] for i in range(count)] for start in range(0, len(hands), count)]
+        scalar = bench(batches, lambda batch: [recognize_hand_gesture(hand) for hand in batch], repeat)
+        vectorized = bench(batches, lambda batch: classify_gestures(landmarks_to_array(batch)), repeat)
+        print(f"{count:<8}{scalar * 1e6:>16.1f}{vectorized * 1e6:>16.1f}")
+        if crossover is None and vectorized < scalar:
+            crossover = count
+    print(f"ベクトル版が速くなる手の数: {crossover if crossover is not None else '（この範囲ではなし）'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_OUTPUT)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sweep", type=int, nargs="+", help="比べる1フレームの手の数")
+    args = parser.parse_args()
+
+    frames = load_frames(args.fixtures)
+    if args.sweep:
+        sweep(frames, args.sweep, args.repeat)
+        return
+    arrays = [landmarks_to_array(hands) for hands in frames]
+
+    # 両方の判定が一致することを先に確かめる
+    for hands, array in zip(frames, arrays):
+        assert [recognize_hand_gesture(hand) for hand in hands] == classify_gestures(array)
+
+    scalar = bench(frames, lambda hands: [recognize_hand_gesture(hand) for hand in hands], args.repeat)
+    vectorized = bench(frames, lambda hands: classify_gestures(landmarks_to_array(hands)), args.repeat)
+    classify_only = bench(arrays, classify_gestures, args.repeat)
+
+    hand_count = sum(len(hands) for hands in frames)
+    print(f"{len(frames)} フレーム / {hand_count} 手, {args.repeat} 回繰り返し")
+    print(f"{'方式':<24}{'1フレームあたり (µs)':>22}")
+    print(f"{'スカラー':<24}{scalar * 1e6:>22.1f}")
+    print(f"{'ベクトル（変換込み）':<24}{vectorized * 1e6:>22.1f}")
+    print(f"{'ベクトル（判定のみ）':<24}{classify_only * 1e6:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
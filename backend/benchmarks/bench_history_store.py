@@ -0,0 +1,82 @@
+"""
+会話履歴の書き込みコストのベンチマーク
+
+履歴が N 件ある状態で1ターン（ユーザー + AI の2メッセージ）を保存するコストを、
+旧方式（JSON 全体の書き直し）と会話ログ（SQLite WAL への追記）で比較する。
+
+実行例:
+    python backend/benchmarks/bench_history_store.py --sizes 1000 10000 100000 --turns 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import ConversationStore
+
+
+def make_history(size):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"メッセージ {i} " + "あ" * 40}
+        for i in range(size)
+    ]
+
+
+def bench_json_rewrite(workdir, history, turns):
+    path = os.path.join(workdir, "conversation_history.json")
+    history = list(history)
+    start = time.perf_counter()
+    for i in range(turns):
+        history.append({"role": "user", "content": f"質問 {i}"})
+        history.append({"role": "assistant", "content": f"回答 {i}"})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(history, f, ensure_ascii=False, indent=4)
+    return (time.perf_counter() - start) / turns
+
+
+def bench_store(workdir, history, turns, wait_for_flush):
+    path = os.path.join(workdir, "conversation_history.db")
+    store = ConversationStore(path)
+    for message in history:
+        store.append("bench", message["role"], message["content"])
+    store.flush()
+
+    start = time.perf_counter()
+    for i in range(turns):
+        store.append("bench", "user", f"質問 {i}")
+        store.append("bench", "assistant", f"回答 {i}")
+        if wait_for_flush:
+            store.flush()
+    per_turn = (time.perf_counter() - start) / turns
+
+    start = time.perf_counter()
+    store.load("bench")
+    load_time = time.perf_counter() - start
+    store.close()
+    return per_turn, load_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'messages':>9} {'json[ms/turn]':>14} {'append[ms/turn]':>16} {'append+flush[ms/turn]':>22} {'load[ms]':>9}")
+    for size in args.sizes:
+        history = make_history(size)
+        with tempfile.TemporaryDirectory() as workdir:
+            json_cost = bench_json_rewrite(workdir, history, args.turns)
+        with tempfile.TemporaryDirectory() as workdir:
+            append_cost, _ = bench_store(workdir, history, args.turns, wait_for_flush=False)
+        with tempfile.TemporaryDirectory() as workdir:
+            flush_cost, load_time = bench_store(workdir, history, args.turns, wait_for_flush=True)
+        print(f"{size:>9} {json_cost * 1000:>14.2f} {append_cost * 1000:>16.3f} {flush_cost * 1000:>22.3f} {load_time * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+スキルのスクリプトの import 時間のベンチマーク（起動が遅くなっていないかの確認）
+
+モジュールごとに新しい Python で `python -X importtime -c "import <module>"` を実行し、
+次を表示する。
+- import 全体にかかった時間（--runs 回の中央値）
+- 自身の読み込みに時間がかかっているモジュール（上位 --top 件）
+
+あわせて次を確かめ、どちらかに当てはまれば終了コード 1 で終わる。
+- 遅延 import にしたはずの重いライブラリ（LAZY_IMPORTS）が、import しただけで読み込まれている
+- 保存済みの基準（--baseline）より --tolerance 倍 + --slack ミリ秒以上遅くなっている
+
+実行例:
+    python backend/benchmarks/bench_importtime.py
+    python backend/benchmarks/bench_importtime.py --save  # 今の計測結果を基準として保存する
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "importtime_baseline.json")
+
+# モジュール -> import しただけでは読み込まれてはいけない重いライブラリ
+LAZY_IMPORTS = {
+    "spotify": ["spotipy", "requests", "speech_recognition", "playsound", "pyautogui", "pygetwindow", "openai"],
+    "RSPGame": ["mediapipe", "cv2"],
+    "Weather": ["speech_recognition", "pyttsx3"],
+}
+
+# "import time:       123 |        456 |   package.name"
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def profile_import(module):
+    """
+    新しい Python で module を import し、{モジュール名: (自身の時間, 累積時間)}（マイクロ秒）を返す
+    """
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); import {module}"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    timings = {}
+    errors = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+        elif not line.startswith("import time:"):
+            errors.append(line)
+    if result.returncode != 0:
+        raise RuntimeError(errors[-1] if errors else f"終了コード {result.returncode}")
+    return timings
+
+
+def loaded_lazy_imports(module, timings):
+    return [name for name in LAZY_IMPORTS.get(module, []) if name in timings]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(LAZY_IMPORTS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=1.5, help="基準の何倍まで許すか")
+    parser.add_argument("--slack", type=float, default=20, help="基準に足して許す時間（ミリ秒）")
+    parser.add_argument("--save", action="store_true", help="今の計測結果を基準として保存する")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failures = []
+    measured = {}
+    for module in args.modules:
+        try:
+            profile_import(module)  # 1回目は .pyc の作成を含むので捨てる
+            runs = [profile_import(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module}: 計測できませんでした: {e}")
+            failures.append(module)
+            continue
+        total_ms = statistics.median(timings[module][1] for timings in runs) / 1000
+        measured[module] = round(total_ms, 1)
+        timings = runs[-1]
+
+        line = f"{module}: {total_ms:.1f} ms"
+        if module in baseline:
+            limit = baseline[module] * args.tolerance + args.slack
+            line += f"（基準 {baseline[module]:.1f} ms, 上限 {limit:.1f} ms）"
+            if total_ms > limit:
+                line += " 遅くなっています"
+                failures.append(module)
+        print(line)
+        heaviest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        for name, (self_us, cumulative_us) in heaviest:
+            print(f"    {name:<40} 自身 {self_us / 1000:>7.1f} ms  累積 {cumulative_us / 1000:>7.1f} ms")
+
+        lazy = loaded_lazy_imports(module, timings)
+        if lazy:
+            print(f"    import しただけで読み込まれています: {', '.join(lazy)}")
+            failures.append(module)
+
+    if args.save:
+        baseline.update(measured)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"基準を保存しました: {args.baseline}")
+
+    if failures:
+        print(f"確認が必要なモジュール: {', '.join(dict.fromkeys(failures))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+/ws エンドポイントの負荷ベンチマーク
+
+偽の OpenAI サーバーとバックエンドをローカルで起動し、
+接続クライアント数ごとのスループット（応答数/秒）を計測する。
+LLM 呼び出しがイベントループをブロックしていなければ、
+スループットはクライアント数にほぼ比例して伸びる。
+応答キャッシュにヒットしないよう、メッセージはすべて別の内容にする。
+
+実行例:
+    python backend/benchmarks/bench_llm_concurrency.py --clients 1 2 4 8 16 --messages 5
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import websockets
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+
+def start_server(app, app_dir, port, env, cwd):
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--app-dir", app_dir, "--port", str(port), "--log-level", "warning"],
+        env=env,
+        cwd=cwd,
+    )
+
+
+async def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"ポート {port} のサーバーが起動しませんでした")
+
+
+async def run_client(url, messages):
+    client_id = uuid.uuid4().hex  # 応答キャッシュにヒットしないよう、クライアントごとに別の質問にする
+    async with websockets.connect(url) as ws:
+        for i in range(messages):
+            await ws.send(f"ベンチマーク {client_id} {i}")
+            await ws.recv()
+
+
+async def run_round(url, clients, messages):
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(url, messages) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return elapsed, clients * messages / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--messages", type=int, default=5, help="1クライアントあたりのメッセージ数")
+    parser.add_argument("--delay", type=float, default=0.5, help="偽 OpenAI サーバーの応答遅延（秒）")
+    parser.add_argument("--fake-port", type=int, default=8001)
+    parser.add_argument("--port", type=int, default=8002)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.update({
+        "FAKE_OPENAI_DELAY": str(args.delay),
+        "OPENAI_API_KEY": "sk-fake",
+        "OPENAI_API_BASE": f"http://127.0.0.1:{args.fake_port}/v1",
+        "OPENAI_MAX_CONCURRENCY": str(max(args.clients)),
+        "RESPONSE_CACHE_FILE": "",  # 前回の実行で保存した応答を使わない
+    })
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fake = start_server("fake_openai:app", BENCH_DIR, args.fake_port, env, workdir)
+        backend = start_server("main:app", BACKEND_DIR, args.port, env, workdir)
+        try:
+            await wait_for_port(args.fake_port)
+            await wait_for_port(args.port)
+            url = f"ws://127.0.0.1:{args.port}/ws"
+
+            print(f"偽 OpenAI の遅延: {args.delay}s, 1クライアントあたり {args.messages} メッセージ")
+            print(f"{'clients':>8} {'elapsed[s]':>11} {'replies/s':>10} {'scaling':>8}")
+            baseline = None
+            for clients in args.clients:
+                elapsed, throughput = await run_round(url, clients, args.messages)
+                baseline = baseline or throughput
+                print(f"{clients:>8} {elapsed:>11.2f} {throughput:>10.2f} {throughput / baseline:>7.1f}x")
+        finally:
+            backend.terminate()
+            fake.terminate()
+            backend.wait()
+            fake.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
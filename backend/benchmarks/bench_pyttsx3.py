@@ -0,0 +1,68 @@
+"""
+pyttsx3 のエンジン初期化コストと1文あたりの合成コストのベンチマーク
+
+旧方式の speak() は1文ごとに pyttsx3.init() と setProperty() を行っていた。
+SpeechWorker はエンジンを1つだけ作って使い回すため、差分が1文ごとに節約できる時間になる。
+音を出さないように、読み上げの代わりに save_to_file() で合成だけを行う。
+
+実行例:
+    python backend/benchmarks/bench_pyttsx3.py --runs 5
+"""
+import argparse
+import gc
+import os
+import statistics
+import tempfile
+import time
+import pyttsx3
+
+TEXT = "明日の大阪の天気は晴れ、最高気温は十八度です。"
+
+
+def init_engine():
+    engine = pyttsx3.init()
+    engine.setProperty('rate', 150)
+    engine.setProperty('volume', 1)
+    return engine
+
+
+def bench_init(runs):
+    timings = []
+    for _ in range(runs):
+        gc.collect()  # 前回のエンジンを破棄して、毎回作り直させる
+        start = time.perf_counter()
+        engine = init_engine()
+        timings.append(time.perf_counter() - start)
+        del engine
+    return timings
+
+
+def bench_utterance(engine, path, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine.save_to_file(TEXT, path)
+        engine.runAndWait()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    init_timings = bench_init(args.runs)
+    engine = init_engine()
+    with tempfile.TemporaryDirectory() as workdir:
+        utterance_timings = bench_utterance(engine, os.path.join(workdir, "speech.wav"), args.runs)
+
+    init_ms = statistics.median(init_timings) * 1000
+    utterance_ms = statistics.median(utterance_timings) * 1000
+    print(f"エンジン初期化: {init_ms:.1f} ms (中央値, {args.runs} 回)")
+    print(f"1文の合成:       {utterance_ms:.1f} ms (中央値, {args.runs} 回)")
+    print(f"旧方式の1文あたり: {init_ms + utterance_ms:.1f} ms → SpeechWorker: {utterance_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
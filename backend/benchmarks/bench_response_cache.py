@@ -0,0 +1,116 @@
+"""
+応答キャッシュのヒット率のベンチマーク（キーに含めるコンテキストの選び方の比較）
+
+セッションを引き継ぐキオスク（?session_id=）が、よくある質問（FAQ）と
+直前の質問についての聞き返し（「それは何時から？」など）を続ける会話を合成し、
+次の3つのキーの作り方で ResponseCache を引いたときのヒット率と、
+別の会話の応答を返してしまった数（誤ヒット）を比べる。
+- 質問だけ: モデル + システムプロンプト + 質問
+- 会話全体: 上に加えて、会話の要約と直前の会話を常に含める
+- main.py: 流れに依存しない質問は質問だけ、依存する質問だけ会話も含める（context_fingerprint）
+
+LLM は呼ばず、応答は「どの質問への答えか」が分かる文字列で代用する。
+
+実行例:
+    python backend/benchmarks/bench_response_cache.py --kiosks 20 --turns 50
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import RESPONSE_CACHE_CONTEXT_TURNS, ResponseCache, context_fingerprint, fingerprint
+
+BASE = ("model", "system prompt")
+
+# よくある質問（先頭ほどよく聞かれる）
+FAQ = [
+    "トイレはどこですか？", "営業時間は何時までですか？", "駐車場はありますか？", "Wi-Fiは使えますか？",
+    "おすすめのお土産は何ですか？", "最寄りの駅までの行き方を教えて", "コインロッカーはありますか？",
+    "今日のイベントは何がありますか？", "レストランは何階ですか？", "車椅子を借りられますか？",
+    "喫煙所はどこですか？", "クレジットカードは使えますか？", "両替できる場所はありますか？",
+    "落とし物をしたときはどうすればいいですか？", "ベビーカーを借りられますか？", "入場料はいくらですか？",
+]
+# 直前の質問についての聞き返し（答えは直前の質問によって変わる）
+FOLLOW_UPS = ["それは何時から？", "そこまで何分かかる？", "もっと詳しく教えて", "他にはありますか？", "はい"]
+
+
+def conversations(kiosks, turns, follow_up_rate, seed=0):
+    """
+    キオスクごとの (質問, 正しい応答) の列を返す
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(FAQ))]  # Zipf 分布
+    result = []
+    for _ in range(kiosks):
+        turns_of_kiosk = []
+        topic = None
+        for _ in range(turns):
+            if topic is not None and rng.random() < follow_up_rate:
+                question = rng.choice(FOLLOW_UPS)
+                turns_of_kiosk.append((question, f"{topic} → {question} への答え"))
+            else:
+                topic = rng.choices(FAQ, weights)[0]
+                turns_of_kiosk.append((topic, f"{topic} への答え"))
+        result.append(turns_of_kiosk)
+    return result
+
+
+def question_only(prompt, history):
+    return fingerprint(*BASE)
+
+
+def whole_conversation(prompt, history):
+    recent = history[-RESPONSE_CACHE_CONTEXT_TURNS:] if RESPONSE_CACHE_CONTEXT_TURNS else []
+    return fingerprint(*BASE, "", *(f"{message['role']}:{message['content']}" for message in recent))
+
+
+def per_question(prompt, history):
+    return context_fingerprint(prompt, BASE, "", history)
+
+
+def replay(kiosks, key):
+    """
+    キオスクの会話を交互に進め、(ヒット数, 誤ヒット数, 質問数) を返す
+    """
+    cache = ResponseCache(path="", similarity_threshold=0)
+    histories = [[] for _ in kiosks]
+    hits = wrong = total = 0
+    for turn in range(max(len(turns) for turns in kiosks)):
+        for history, turns in zip(histories, kiosks):
+            if turn >= len(turns):
+                continue
+            question, answer = turns[turn]
+            context = key(question, history)
+            cached = cache.get(question, context)
+            total += 1
+            if cached is not None:
+                hits += 1
+                wrong += cached != answer
+                response = cached
+            else:
+                response = answer
+                cache.put(question, answer, context)
+            history += [{"role": "user", "content": question}, {"role": "assistant", "content": response}]
+    return hits, wrong, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kiosks", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=50, help="キオスクごとの質問数")
+    parser.add_argument("--follow-up-rate", type=float, default=0.3, help="質問が聞き返しになる割合")
+    args = parser.parse_args()
+
+    kiosks = conversations(args.kiosks, args.turns, args.follow_up_rate)
+    print(f"キオスク {args.kiosks} 台 × {args.turns} 問, 聞き返しの割合 {args.follow_up_rate:.0%}")
+    print(f"{'キーの作り方':<16}{'ヒット率':>10}{'誤ヒット':>10}")
+    for label, key in [("質問だけ", question_only), ("会話全体", whole_conversation), ("main.py", per_question)]:
+        hits, wrong, total = replay(kiosks, key)
+        print(f"{label:<16}{hits / total:>10.1%}{wrong:>10}")
+
+
+if __name__ == "__main__":
+    main()
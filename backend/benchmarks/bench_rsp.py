@@ -0,0 +1,203 @@
+"""
+じゃんけんのカメラ処理（取り込み → 手の検出 → ジェスチャー判定）の画面なしベンチマーク
+
+録画した動画（または合成フレーム）を1フレームずつ読み、imshow なしで処理して
+FPS、1フレームあたりの処理時間（p50 / p99）、ピークメモリを出す。
+設定（解像度・推論モード・モデルの重さ・判定方式）の組み合わせごとに別プロセスで測るので、
+モデルの読み込みやメモリが他の設定の影響を受けない。
+
+実行例:
+    python backend/benchmarks/bench_rsp.py --source hand.mp4
+    python backend/benchmarks/bench_rsp.py --synthetic 300 --resolutions 640x480 1280x720 \\
+        --modes full roi --complexities 0 1 --classifiers vector scalar
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def peak_memory_mb():
+    """
+    プロセスのピークメモリ（MB）。resource がない環境（Windows）では None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def synthetic_frames(count, width, height):
+    """
+    カメラ映像の代わりの合成フレーム（グラデーション + ノイズ + 動く肌色の楕円）
+    """
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    base = np.zeros((height, width, 3), dtype=np.uint8)
+    base[:] = np.linspace(40, 200, width, dtype=np.uint8)[None, :, None]
+    for i in range(count):
+        frame = base.copy()
+        center = (int(width * (0.3 + 0.4 * (i % 60) / 60)), height // 2)
+        cv2.ellipse(frame, center, (width // 10, height // 6), 0, 0, 360, (140, 170, 220), -1)
+        frame = cv2.add(frame, rng.integers(0, 20, frame.shape, dtype=np.uint8))
+        yield frame
+
+
+def video_frames(source, width, height, limit):
+    import cv2
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"動画を開けませんでした: {source}")
+    try:
+        count = 0
+        while limit is None or count < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame.shape[1] != width or frame.shape[0] != height:
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            count += 1
+            yield frame
+    finally:
+        cap.release()
+
+
+def run_config(config):
+    """
+    1つの設定で最後まで処理し、結果を dict で返す（ワーカープロセスで呼ばれる）
+    """
+    from gesture import classify_gestures, landmarks_to_array, recognize_hand_gesture
+    from hand_tracker import HandTracker
+    from rsp_pipeline import StageStats
+
+    width, height = config["resolution"]
+    tracker = HandTracker(config["mode"], model_complexity=config["complexity"],
+                          max_num_hands=config["max_hands"])
+    if config["classifier"] == "vector":
+        def classify(landmarks):
+            return classify_gestures(landmarks_to_array(landmarks))
+    else:
+        def classify(landmarks):
+            return [recognize_hand_gesture(hand) for hand in landmarks]
+
+    if config["source"]:
+        frames = video_frames(config["source"], width, height, config["frames"])
+    else:
+        frames = synthetic_frames(config["frames"], width, height)
+
+    stats = {name: StageStats(name, window=100000) for name in ("capture", "process", "classify", "total")}
+    hands_seen = 0
+    started = time.perf_counter()
+    while True:
+        frame_start = time.perf_counter()
+        frame = next(frames, None)
+        if frame is None:
+            break
+        captured = time.perf_counter()
+        landmarks = tracker.process(frame)
+        processed = time.perf_counter()
+        classify(landmarks)
+        classified = time.perf_counter()
+        hands_seen += len(landmarks)
+        stats["capture"].record(captured - frame_start)
+        stats["process"].record(processed - captured)
+        stats["classify"].record(classified - processed)
+        stats["total"].record(classified - frame_start)
+    elapsed = time.perf_counter() - started
+    tracker.close()
+
+    count = stats["total"].count
+    return {
+        **config,
+        "frames_processed": count,
+        "hands": hands_seen,
+        "fps": round(count / elapsed, 1) if elapsed else 0.0,
+        "stages": {name: stage.summary() for name, stage in stats.items()},
+        "classify_p50_us": round(stats["classify"].percentile(50) * 1e6, 1),
+        "tracker": tracker.counts,
+        "peak_mb": peak_memory_mb(),
+    }
+
+
+def run_in_subprocess(config):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(config)],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "失敗しました")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def parse_resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--source", help="録画した動画ファイル")
+    source.add_argument("--synthetic", type=int, metavar="N", help="合成フレームを N 枚使う（手は検出されない）")
+    parser.add_argument("--frames", type=int, default=None, help="動画から使う最大フレーム数")
+    parser.add_argument("--resolutions", nargs="+", default=["640x480"])
+    parser.add_argument("--modes", nargs="+", choices=["full", "roi"], default=["full"])
+    parser.add_argument("--complexities", nargs="+", type=int, choices=[0, 1], default=[1])
+    parser.add_argument("--classifiers", nargs="+", choices=["vector", "scalar"], default=["scalar"])
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出す")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_config(json.loads(args.worker))))
+        return
+    if not args.source and not args.synthetic:
+        parser.error("--source か --synthetic を指定してください")
+
+    results = []
+    for resolution, mode, complexity, classifier in itertools.product(
+        args.resolutions, args.modes, args.complexities, args.classifiers
+    ):
+        config = {
+            "source": os.path.abspath(args.source) if args.source else None,
+            "frames": args.synthetic or args.frames,
+            "resolution": parse_resolution(resolution),
+            "mode": mode,
+            "complexity": complexity,
+            "classifier": classifier,
+            "max_hands": args.max_hands,
+        }
+        try:
+            results.append(run_in_subprocess(config))
+        except RuntimeError as e:
+            print(f"{resolution} {mode} {complexity} {classifier}: {e}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'解像度':<12}{'モード':<6}{'重さ':>4}  {'判定':<8}{'FPS':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'判定 p50 (µs)':>15}{'メモリ (MB)':>13}")
+    for result in results:
+        total = result["stages"]["total"]
+        print(
+            f"{'x'.join(map(str, result['resolution'])):<12}{result['mode']:<6}{result['complexity']:>4}  "
+            f"{result['classifier']:<8}{result['fps']:>8}{total['p50_ms']:>10}{total['p99_ms']:>10}"
+            f"{result['classify_p50_us']:>15}{str(result['peak_mb']):>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
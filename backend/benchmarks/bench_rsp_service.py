@@ -0,0 +1,74 @@
+"""
+じゃんけんの開始までの時間（コールドスタートとウォームスタート）のベンチマーク
+
+- コールド: ゲームごとに新しいプロセスを起動する（従来の方式。cv2/mediapipe の import、
+  モデルの読み込み、カメラを開くところから）
+- ウォーム: 常駐する RSPService で続けてゲームを行う（2回目以降はモデルもカメラも開いたまま）
+
+開始までの時間は、呼び出してから最初の判定が出るまで。カメラがなくても動くよう、
+動画ファイルを入力にして画面なしで実行する。
+
+実行例:
+    python backend/benchmarks/bench_rsp_service.py --source hand.mp4 --games 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+COLD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from rsp_service import RSPService
+imported = time.perf_counter()
+result = RSPService(sys.argv[1], display=False).play()
+result["import_ms"] = round((imported - started) * 1000, 1)
+print("RESULT " + json.dumps(result))
+"""
+
+
+def run_cold(source):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", COLD_SCRIPT, source],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    line = next(line for line in completed.stdout.splitlines() if line.startswith("RESULT "))
+    result = json.loads(line[len("RESULT "):])
+    # 開始までの時間 = プロセスの起動と import + サービス内で最初の判定が出るまで
+    result["total_start_ms"] = round(wall_ms - result["game_ms"] + (result["start_ms"] or 0), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="手が映った動画ファイル")
+    parser.add_argument("--games", type=int, default=3)
+    args = parser.parse_args()
+    source = os.path.abspath(args.source)
+
+    print(f"{'方式':<16}{'回':>4}{'開始まで (ms)':>16}{'ゲーム全体 (ms)':>18}  結果")
+    for i in range(args.games):
+        result = run_cold(source)
+        print(f"{'コールド':<16}{i + 1:>4}{result['total_start_ms']:>16}{result['game_ms']:>18}  {result['status']}")
+
+    from rsp_service import RSPService
+
+    service = RSPService(source, display=False)
+    try:
+        for i in range(args.games):
+            result = service.play()
+            label = "常駐（初回）" if result["cold"] else "常駐"
+            print(f"{label:<16}{i + 1:>4}{str(result['start_ms']):>16}{result['game_ms']:>18}  {result['status']}")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
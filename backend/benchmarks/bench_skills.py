@@ -0,0 +1,71 @@
+"""
+スキル呼び出しのレイテンシのベンチマーク
+
+cold: 旧方式と同じく、毎回 Python を起動してスクリプトのモジュールを import する
+warm: SkillRegistry の import 済みワーカーに往復する
+
+スキル本体（カメラ・マイク・Spotify）は計測に含めず、呼び出しのオーバーヘッドだけを比べる。
+
+実行例:
+    python backend/benchmarks/bench_skills.py --modules RSPGame spotify Weather --runs 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from skills import Skill, SkillRegistry
+
+
+def cold_start(module, runs):
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); import {module}"
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return timings
+
+
+async def warm_start(module, runs):
+    registry = SkillRegistry([Skill(module, module)])
+    registry.start()
+    try:
+        await registry.ping(module)  # ワーカーの起動と import を待つ
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await registry.ping(module)
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        registry.shutdown()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=["RSPGame", "spotify", "Weather"])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':>14} {'cold[ms]':>10} {'warm[ms]':>10}")
+    for module in args.modules:
+        try:
+            cold = statistics.median(cold_start(module, args.runs))
+            warm = statistics.median(await warm_start(module, args.runs))
+        except Exception as e:
+            print(f"{module:>14} 計測できませんでした: {e}")
+            continue
+        print(f"{module:>14} {cold * 1000:>10.1f} {warm * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Spotify クライアントのキャッシュと keep-alive の効果のベンチマーク
+
+ローカルの Spotify Web API スタブ（遅延つき）に対して、1回の操作（デバイス一覧の取得 +
+楽曲検索）を繰り返し、次の3つを比べる。
+- 従来: キャッシュなし、リクエストごとに新しい接続
+- keep-alive のみ: 共有セッション、キャッシュなし
+- キャッシュあり: 共有セッション + 検索結果とデバイス一覧のキャッシュ
+
+実行例:
+    python backend/benchmarks/bench_spotify_client.py --latency 80 --rounds 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# スタブに向けるため、spotify_client を読み込む前にトークンを設定する
+os.environ.setdefault("SPOTIFY_ACCESS_TOKEN", "stub")
+
+import spotipy
+from spotify_client import DeviceCache, SearchCache, SpotifyClient, create_session
+from stub_spotify import StubHandler, start_stub
+
+QUERIES = ["YOASOBI アイドル", "米津玄師 Lemon", "ＹＯＡＳＯＢＩ　アイドル", "紅蓮華"]
+
+
+def make_client(prefix, mode):
+    if mode == "legacy":
+        sp = spotipy.Spotify(auth="stub", requests_session=False)  # リクエストごとに新しい接続
+    else:
+        sp = spotipy.Spotify(auth="stub", requests_session=create_session())
+    sp.prefix = prefix
+    client = SpotifyClient(sp=sp)
+    if mode != "cached":
+        client.search_cache = SearchCache(ttl=0)
+        client.device_cache = DeviceCache(lambda: sp.devices()["devices"], ttl=0, max_stale=0)
+    return client
+
+
+def run(prefix, mode, rounds):
+    client = make_client(prefix, mode)
+    requests_before, connections_before = StubHandler.requests_served, StubHandler.connections
+    start = time.perf_counter()
+    for i in range(rounds):
+        client.devices()
+        client.search_tracks(QUERIES[i % len(QUERIES)])
+    elapsed = time.perf_counter() - start
+    return (
+        elapsed / rounds,
+        StubHandler.requests_served - requests_before,
+        StubHandler.connections - connections_before,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=80, help="スタブの1リクエストあたりの遅延（ミリ秒）")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    server, prefix = start_stub(latency=args.latency / 1000)
+    print(f"スタブの遅延 {args.latency:.0f} ms, {args.rounds} 回の操作（デバイス一覧 + 検索）")
+    print(f"{'方式':<20}{'1回あたり (ms)':>16}{'リクエスト':>12}{'接続':>8}")
+    for mode, label in [("legacy", "従来"), ("keepalive", "keep-alive のみ"), ("cached", "キャッシュあり")]:
+        per_round, requests_served, connections = run(prefix, mode, args.rounds)
+        print(f"{label:<20}{per_round * 1000:>16.1f}{requests_served:>12}{connections:>8}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
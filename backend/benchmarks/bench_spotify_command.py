@@ -0,0 +1,96 @@
+"""
+1回の発話から再生するまでの時間のベンチマーク（音声認識・音声合成を除く）
+
+ローカルの Spotify Web API スタブ（遅延つき）に対して、発話例ごとに
+解釈 → デバイス一覧 → 検索 → 曲の選択 → 再生開始 を行い、次を表示する。
+- 解釈にかかった時間
+- 発話から再生開始までの時間（キャッシュなし / キャッシュあり）
+- API へのリクエスト数
+- 聞き返しが必要だったかどうか（必要なら何を聞くか）
+
+従来の手順（起動 → デバイス番号 → 曲名 → 確認 → 曲番号）は、聞き返しごとに
+1往復の発話が必要だったので、比較のために発話の回数も表示する。
+
+実行例:
+    python backend/benchmarks/bench_spotify_command.py --latency 80
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# スタブに向けるため、spotify_client を読み込む前にトークンを設定する
+os.environ.setdefault("SPOTIFY_ACCESS_TOKEN", "stub")
+
+import spotipy
+from spotify_client import SpotifyClient, create_session
+from spotify_command import default_device, follow_up_question, parse_command, pick_track
+from stub_spotify import StubHandler, start_stub
+
+UTTERANCES = [
+    "リビングでYOASOBIのアイドルを流して",
+    "寝室のスピーカーで米津玄師のLemonをかけて",
+    "紅蓮華を再生して",
+    "YOASOBIの曲を流して",
+    "スピーカーでPretenderを流して",
+    "台所でミックスナッツを流して",
+    "音楽を流して",
+]
+# 従来の手順で必要だった発話の回数（起動、デバイス番号、曲名、確認、曲番号）
+LEGACY_TURNS = 5
+
+
+def play(client, text):
+    """
+    発話を解釈して再生まで進める。聞き返しが必要なら、その質問を返す
+    """
+    heard_at = time.perf_counter()
+    devices = client.devices()
+    parse_start = time.perf_counter()
+    command = parse_command(text, devices)
+    parse_ms = (time.perf_counter() - parse_start) * 1000
+
+    device = command.device or (None if command.device_hint else default_device(devices))
+    question = follow_up_question(command, devices)
+    if question or device is None:
+        return parse_ms, None, question or "どのデバイスで再生しますか？"
+    tracks = client.search_tracks(command.query, limit=5)
+    track = pick_track(tracks, command)
+    if track is None:
+        return parse_ms, None, "再生する楽曲を選択してください。"
+    client.sp.start_playback(device_id=device["id"], uris=[track["uri"]])
+    return parse_ms, (time.perf_counter() - heard_at) * 1000, None
+
+
+def make_client(prefix):
+    sp = spotipy.Spotify(auth="stub", requests_session=create_session())
+    sp.prefix = prefix
+    return SpotifyClient(sp=sp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=80, help="スタブの1リクエストあたりの遅延（ミリ秒）")
+    args = parser.parse_args()
+
+    server, prefix = start_stub(latency=args.latency / 1000)
+    client = make_client(prefix)
+    print(f"スタブの遅延 {args.latency:.0f} ms（従来の手順は発話 {LEGACY_TURNS} 回）")
+    print(f"{'発話':<32}{'解釈 (ms)':>10}{'初回 (ms)':>10}{'2回目 (ms)':>11}{'リクエスト':>10}  聞き返し")
+    for text in UTTERANCES:
+        client.search_cache._entries.clear()
+        client.device_cache._devices = None
+        requests_before = StubHandler.requests_served
+        parse_ms, cold_ms, question = play(client, text)
+        requests_served = StubHandler.requests_served - requests_before
+        _, warm_ms, _ = play(client, text)
+        cold = f"{cold_ms:.1f}" if cold_ms is not None else "-"
+        warm = f"{warm_ms:.1f}" if warm_ms is not None else "-"
+        print(f"{text:<32}{parse_ms:>10.2f}{cold:>10}{warm:>11}{requests_served:>10}  {question or 'なし（発話 1 回）'}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+再生コントロールのベンチマーク（従来のループ vs 並行して進めるコントローラー）
+
+ローカルの Spotify Web API スタブ（遅延つき）に対して、決まった間隔で届く音声コマンドを
+次の2つの方法で処理し、マイクが聞けなかった時間・最後の確認が終わるまでの時間・
+操作と再生状態の取得のリクエスト数・確認の読み上げ回数を比べる。
+- 従来: コマンドごとに API を呼び、確認を読み上げ終わってから次を聞く
+- コントローラー: コマンドはキューに積み、API と読み上げは別スレッドで行う（続くコマンドはまとめる）
+
+読み上げは --tts ミリ秒の待ちで代用する。
+
+実行例:
+    python backend/benchmarks/bench_spotify_controller.py --latency 80 --tts 800
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spotipy
+from spotify_client import create_session
+from spotify_controller import PlaybackController, PlaybackStateCache
+from stub_spotify import start_stub
+
+# (前のコマンドからの間隔（秒）, コマンド)。「次」を立て続けに3回言い、止めて、また再開する
+SCRIPT = [
+    (0.0, "next"),
+    (0.3, "next"),
+    (0.3, "next"),
+    (1.0, "pause"),
+    (1.0, "resume"),
+    (0.3, "previous"),
+]
+# 従来の playback_controls と同じ対応と確認の言葉
+LEGACY_COMMANDS = {"pause": "停止", "resume": "再開", "next": "次", "previous": "前"}
+
+
+def run_legacy(sp, tts):
+    """
+    従来のループ: 次のコマンドは、前のコマンドの API と読み上げが終わるまで聞けない
+    """
+    methods = {"pause": sp.pause_playback, "resume": sp.start_playback,
+               "next": sp.next_track, "previous": sp.previous_track}
+    start = time.perf_counter()
+    arrival = start
+    ready_at = start  # マイクがまた聞けるようになる時刻
+    deaf = 0.0
+    spoken = 0
+    for gap, intent in SCRIPT:
+        arrival += gap
+        now = time.perf_counter()
+        if now < arrival:
+            time.sleep(arrival - now)
+        deaf += max(0.0, ready_at - arrival)  # 言い終わってから聞き始めるまで待たせた時間
+        methods[intent]()
+        time.sleep(tts)  # f"{LEGACY_COMMANDS[intent]}しました。" の読み上げ
+        spoken += 1
+        ready_at = time.perf_counter()
+    return deaf, time.perf_counter() - start, len(SCRIPT), 0, spoken
+
+
+def run_controller(sp, tts):
+    """
+    コントローラー: submit() はすぐ戻るので、マイクは止まらない
+    """
+    spoken = []
+    controller = PlaybackController(sp, speak=lambda message: (spoken.append(message), time.sleep(tts)),
+                                    state=PlaybackStateCache(sp, interval=60)).start()
+    start = time.perf_counter()
+    arrival = start
+    for gap, intent in SCRIPT:
+        arrival += gap
+        now = time.perf_counter()
+        if now < arrival:
+            time.sleep(arrival - now)
+        controller.submit(intent)
+    controller.wait_idle()
+    elapsed = time.perf_counter() - start
+    controller.stop()
+    return 0.0, elapsed, controller.api_calls, controller.state.polls, len(spoken)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=80, help="スタブの1リクエストあたりの遅延（ミリ秒）")
+    parser.add_argument("--tts", type=float, default=800, help="確認の読み上げ1回にかかる時間（ミリ秒）")
+    args = parser.parse_args()
+
+    server, prefix = start_stub(latency=args.latency / 1000)
+    sp = spotipy.Spotify(auth="stub", requests_session=create_session())
+    sp.prefix = prefix
+    sp.start_playback()  # 再生中から始める
+
+    commands = "、".join(LEGACY_COMMANDS[intent] for _, intent in SCRIPT)
+    print(f"スタブの遅延 {args.latency:.0f} ms, 読み上げ {args.tts:.0f} ms, コマンド: {commands}")
+    print(f"{'方式':<16}{'聞けなかった時間 (ms)':>22}{'全体 (ms)':>12}{'操作':>6}{'状態の取得':>10}{'読み上げ':>8}")
+    for label, run in [("従来", run_legacy), ("コントローラー", run_controller)]:
+        deaf, elapsed, calls, polls, spoken = run(sp, args.tts / 1000)
+        print(f"{label:<16}{deaf * 1000:>22.0f}{elapsed * 1000:>12.0f}{calls:>6}{polls:>10}{spoken:>8}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+予報の索引（ForecastIndex）が、予報を都市の現地時刻の日付で並べることの確認
+
+API の dt_txt は UTC なので、日本の都市では UTC の 15時〜21時の予報は現地では翌日の 0時〜6時になる。
+索引はレスポンスの city.timezone（UTC からの時差、秒）があれば現地の日付と時刻で並べ、
+なければ従来どおり dt_txt の日付と時刻を使う。期待と違えば表示して終了コード 1 で終わる。
+
+実行例:
+    python backend/benchmarks/check_forecast_index.py
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast_index import ForecastIndex
+from stub_openweather import make_forecast
+
+JST = 9 * 3600
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    # UTC 2024-05-01 00:00 から 3時間ごと（現地では 09:00 から）
+    data = make_forecast("Tokyo", start=datetime(2024, 5, 1, tzinfo=timezone.utc))
+    failures = []
+
+    local = ForecastIndex(data)
+    first_day = local.day("2024-05-01")
+    if [time for time, _, _ in first_day or []] != ["09:00", "12:00", "15:00", "18:00", "21:00"]:
+        failures.append(f"現地の 5/1 の時刻: {first_day}")
+    second_day = local.day("2024-05-02")
+    if not second_day or second_day[0][0] != "00:00":
+        failures.append(f"UTC 5/1 15:00 の予報が現地の 5/2 00:00 になっていない: {second_day}")
+
+    # 時差が分からなければ dt_txt（UTC）の日付と時刻のまま
+    data["city"].pop("timezone")
+    utc = ForecastIndex(data)
+    utc_day = utc.day("2024-05-01")
+    if [time for time, _, _ in utc_day or []] != ["00:00", "03:00", "06:00", "09:00", "12:00", "15:00", "18:00", "21:00"]:
+        failures.append(f"時差なしの 5/1 の時刻: {utc_day}")
+
+    for failure in failures:
+        print(failure)
+    print("期待どおり" if not failures else f"{len(failures)} 件が期待と違います")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+地名の取り出しの確認（地名を含む発話と、地名に似た言葉を含むだけの発話）
+
+data/gazetteer.csv やかなの呼び方の規則を変えたあとに実行し、
+取り出した (都道府県, 市区町村) が期待と違う発話があれば表示して終了コード 1 で終わる。
+
+実行例:
+    python backend/benchmarks/check_gazetteer.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gazetteer import Gazetteer
+
+# (発話, 期待する都道府県, 期待する市区町村)
+CASES = [
+    ("奈良の天気", "奈良県", "奈良市"),
+    ("ならの天気は？", "奈良県", "奈良市"),
+    ("水戸の天気", "茨城県", "水戸市"),
+    ("明日のみとは晴れる？", "茨城県", "水戸市"),
+    ("なは", "沖縄県", "那覇市"),
+    ("よこはまの天気", "神奈川県", "横浜市"),
+    ("東京の天気", "東京都", None),
+    ("tokyo weather", "東京都", None),
+    # 地名の呼び方を含むが、地名ではない発話
+    ("今日の天気、雨なら傘いる？", None, None),
+    ("それなら出かける", None, None),
+    ("明日の天気を教えて、みとめて", None, None),
+    ("鍵をさがしてる", None, None),
+    ("山がみえる", None, None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    gazetteer = Gazetteer.load()
+    failures = 0
+    for text, expected_prefecture, expected_city in CASES:
+        prefecture, city = gazetteer.extract(text)
+        actual = (prefecture and prefecture.name, city and city.name)
+        if actual != (expected_prefecture, expected_city):
+            print(f"{text}: {actual} （期待: {(expected_prefecture, expected_city)}）")
+            failures += 1
+    print(f"{len(CASES) - failures} / {len(CASES)} 件が期待どおり")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
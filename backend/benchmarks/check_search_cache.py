@@ -0,0 +1,49 @@
+"""
+検索結果のキャッシュ（SearchCache）のキーの確認
+
+表記の揺れだけが違うクエリ（全角/半角、大文字/小文字、空白の連続）は同じ結果を使い回し、
+別の曲やアーティストを指しうるクエリ（カタカナとひらがな、空白の有無）は別の結果になることを確かめる。
+期待と違うクエリの組があれば表示して終了コード 1 で終わる。
+
+実行例:
+    python backend/benchmarks/check_search_cache.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spotify_client import SearchCache
+
+# (クエリ1, クエリ2, 同じ結果を使い回すか)
+CASES = [
+    ("YOASOBI アイドル", "ｙｏａｓｏｂｉ　アイドル", True),
+    ("Lemon", "lemon", True),
+    ("米津玄師  Lemon", "米津玄師 Lemon ", True),
+    ("ヒカリ", "ひかり", False),  # 別の曲名
+    ("ハル", "はる", False),
+    # 空白の有無（日本語は空白の位置で検索語の区切りが変わり、検索結果も変わる）
+    ("あいみょん 愛を伝えたいだとか", "あいみょん愛を伝えたいだとか", False),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    failures = 0
+    for first, second, shared in CASES:
+        cache = SearchCache()
+        cache.put(SearchCache.key(first, "track", 5), [first])
+        result = cache.get(SearchCache.key(second, "track", 5))
+        if (result is not None) != shared:
+            print(f"「{first}」と「{second}」: {'同じ' if result is not None else '別の'}結果になりました")
+            failures += 1
+    print(f"{len(CASES) - failures} / {len(CASES)} 組が期待どおり")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
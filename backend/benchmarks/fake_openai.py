@@ -0,0 +1,62 @@
+"""
+ローカルで動く OpenAI API の偽サーバー（ベンチマーク用）
+FAKE_OPENAI_DELAY 秒だけ待ってから固定の応答を返す
+stream=true の場合は同じ時間をかけて数文字ずつ SSE で返す
+
+起動例:
+    uvicorn fake_openai:app --app-dir backend/benchmarks --port 8001
+"""
+import asyncio
+import json
+import os
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+FAKE_OPENAI_DELAY = float(os.getenv("FAKE_OPENAI_DELAY", "0.5"))
+FAKE_OPENAI_REPLY = os.getenv("FAKE_OPENAI_REPLY", "こんにちは。今日はいい天気ですね。何かお手伝いできることはありますか？")
+
+app = FastAPI()
+
+
+def _completion(model, content):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(model, delta, finish_reason=None):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+async def _stream(model, content, step=4):
+    pieces = [content[i:i + step] for i in range(0, len(content), step)]
+    yield f"data: {json.dumps(_chunk(model, {'role': 'assistant'}))}\n\n"
+    for piece in pieces:
+        await asyncio.sleep(FAKE_OPENAI_DELAY / len(pieces))
+        yield f"data: {json.dumps(_chunk(model, {'content': piece}), ensure_ascii=False)}\n\n"
+    yield f"data: {json.dumps(_chunk(model, {}, 'stop'))}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+    if body.get("stream"):
+        return StreamingResponse(_stream(model, FAKE_OPENAI_REPLY), media_type="text/event-stream")
+    await asyncio.sleep(FAKE_OPENAI_DELAY)
+    return _completion(model, FAKE_OPENAI_REPLY)
@@ -0,0 +1,106 @@
+"""
+じゃんけん用の手のランドマーク（MediaPipe Hands と同じ21点・正規化座標）のフィクスチャを作る
+
+カメラや MediaPipe がなくてもジェスチャー判定を試せるように、グー・チョキ・パーの
+手を合成し、手ぶれ・誤認識・手が映らないフレームを混ぜた 30fps の系列として保存する。
+乱数のシードを固定しているので、何度作っても同じファイルになる。
+
+実行例:
+    python backend/benchmarks/make_landmark_fixtures.py
+    python backend/benchmarks/make_landmark_fixtures.py --frames 120 --output /tmp/landmarks.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_OUTPUT = os.path.join(FIXTURE_DIR, "rsp_landmarks.json")
+FPS = 30
+
+# 各指（親指, 人差し指, 中指, 薬指, 小指）の向き（真上からの角度）と、開いた・閉じたときの長さ
+FINGER_ANGLES = [-60, -25, 0, 20, 40]
+OPEN_LENGTH = 0.46
+CLOSED_LENGTH = 0.22
+
+# 開いている指（True）のパターン
+OPEN_FINGERS = {
+    "rock": [False, False, False, False, False],
+    "scissors": [False, True, True, False, False],
+    "paper": [True, True, True, True, True],
+}
+
+
+def make_hand(gesture, rng, wrist=(0.5, 0.85), jitter=0.008):
+    """
+    1つの手の21点 [x, y, z] を作る
+    """
+    points = [[wrist[0], wrist[1], 0.0]]
+    for angle, is_open in zip(FINGER_ANGLES, OPEN_FINGERS[gesture]):
+        length = (OPEN_LENGTH if is_open else CLOSED_LENGTH) * rng.uniform(0.95, 1.05)
+        radians = math.radians(angle)
+        for joint in range(1, 5):
+            r = length * joint / 4
+            points.append([
+                wrist[0] + r * math.sin(radians) + rng.gauss(0, jitter),
+                wrist[1] - r * math.cos(radians) + rng.gauss(0, jitter),
+                -0.01 * joint + rng.gauss(0, jitter),
+            ])
+    return [[round(value, 4) for value in point] for point in points]
+
+
+def make_sequence(name, gestures, frames, rng, flip_rate=0.12, miss_rate=0.05, hands=1):
+    """
+    gestures に (ジェスチャー, 割合) を並べ、その順に手の形を変える系列を作る
+    flip_rate の確率で別の手に誤認識され、miss_rate の確率で手が映らない
+    """
+    schedule = []
+    for gesture, share in gestures:
+        schedule.extend([gesture] * round(frames * share))
+    schedule = (schedule + [gestures[-1][0]] * frames)[:frames]
+
+    result = []
+    for gesture in schedule:
+        if rng.random() < miss_rate:
+            result.append([])
+            continue
+        if rng.random() < flip_rate:
+            gesture = rng.choice([other for other in OPEN_FINGERS if other != gesture])
+        frame = [make_hand(gesture, rng)]
+        for extra in range(1, hands):
+            frame.append(make_hand(rng.choice(list(OPEN_FINGERS)), rng, wrist=(0.2 + 0.3 * extra, 0.8)))
+        result.append(frame)
+    return {"name": name, "expected": gestures[-1][0], "frames": result}
+
+
+def make_fixtures(frames, seed=0):
+    rng = random.Random(seed)
+    sequences = [
+        make_sequence("rock_steady", [("rock", 1.0)], frames, rng),
+        make_sequence("scissors_steady", [("scissors", 1.0)], frames, rng),
+        make_sequence("paper_steady", [("paper", 1.0)], frames, rng),
+        make_sequence("paper_noisy", [("paper", 1.0)], frames, rng, flip_rate=0.3, miss_rate=0.1),
+        make_sequence("rock_to_scissors", [("rock", 0.3), ("scissors", 0.7)], frames, rng),
+        make_sequence("two_hands_paper", [("paper", 1.0)], frames, rng, hands=2),
+    ]
+    return {"fps": FPS, "threshold": 0.38, "sequences": sequences}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=90, help="1系列あたりのフレーム数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    fixtures = make_fixtures(args.frames, args.seed)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, separators=(",", ":"))
+    total = sum(len(sequence["frames"]) for sequence in fixtures["sequences"])
+    print(f"{len(fixtures['sequences'])} 系列 / {total} フレームを {args.output} に保存しました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+記録したランドマーク系列でじゃんけんの進行を再生して確かめる
+
+フィクスチャの各系列をフレームごとに判定し、フィクスチャの FPS で時計を進めながら
+RSPStateMachine に渡す。確定した手が期待どおりか、カウントダウンのやり直し回数、
+推論を省略できたフレーム数を、従来の方式（判定が変わるたびにやり直し）と並べて出す。
+期待と違う系列があれば終了コード 1 で終わる。
+
+実行例:
+    python backend/benchmarks/make_landmark_fixtures.py
+    python backend/benchmarks/replay_rsp.py --countdown 1.5
+"""
+import argparse
+import json
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gesture import classify_gestures
+from make_landmark_fixtures import DEFAULT_OUTPUT
+from rsp_state import RESULT, RSPStateMachine
+
+
+def classify_frames(frames):
+    return [classify_gestures(np.array(hands, dtype=np.float32)) if hands else [] for hands in frames]
+
+
+def replay(gestures, fps, countdown, lock_in, window, min_share):
+    """
+    状態機械で再生する。系列が終わっても結果が出なければ、手が映らないまま時間だけ進める
+    """
+    clock = SimpleNamespace(now=0.0)
+    game = RSPStateMachine(on_result=lambda move: (None, move), countdown=countdown, lock_in=lock_in,
+                           window=window, min_share=min_share, clock=lambda: clock.now)
+    inferred = skipped = 0
+    frame = 0
+    while game.state != RESULT and frame < len(gestures) + int((countdown + lock_in + 1) * fps):
+        clock.now = frame / fps
+        if frame >= len(gestures):
+            game.update(None)
+        elif game.needs_inference:
+            inferred += 1
+            game.update(gestures[frame][0] if gestures[frame] else None)
+        else:
+            skipped += 1
+            game.update(observed=False)
+        frame += 1
+    return {"move": game.move, "restarts": game.restarts, "inferred": inferred, "skipped": skipped}
+
+
+def replay_legacy(gestures, fps, countdown):
+    """
+    従来の方式: 判定が前回と違えばカウントダウンをやり直し、終わった時点の手を使う
+    """
+    previous, started_at, restarts = None, None, 0
+    for frame, hands in enumerate(gestures):
+        now = frame / fps
+        for gesture in hands:
+            if gesture != previous:
+                restarts += 1 if previous is not None else 0
+                previous, started_at = gesture, now
+        if started_at is not None and now - started_at >= countdown:
+            return {"move": previous, "restarts": restarts, "inferred": frame + 1}
+    return {"move": None, "restarts": restarts, "inferred": len(gestures)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_OUTPUT)
+    parser.add_argument("--countdown", type=float, default=1.5, help="カウントダウン（秒）。フィクスチャの長さに合わせて短くしている")
+    parser.add_argument("--lock-in", type=float, default=0.5)
+    parser.add_argument("--window", type=int, default=9)
+    parser.add_argument("--min-share", type=float, default=0.6)
+    args = parser.parse_args()
+
+    with open(args.fixtures, "r", encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    failures = 0
+    print(f"{'系列':<20}{'期待':<10}{'確定':<10}{'従来':<10}{'やり直し':>10}{'従来':>6}{'推論':>6}{'省略':>6}")
+    for sequence in fixtures["sequences"]:
+        gestures = classify_frames(sequence["frames"])
+        result = replay(gestures, fixtures["fps"], args.countdown, args.lock_in, args.window, args.min_share)
+        legacy = replay_legacy(gestures, fixtures["fps"], args.countdown)
+        ok = result["move"] == sequence["expected"]
+        failures += not ok
+        print(
+            f"{sequence['name']:<20}{sequence['expected']:<10}{str(result['move']):<10}{str(legacy['move']):<10}"
+            f"{result['restarts']:>10}{legacy['restarts']:>6}{result['inferred']:>6}{result['skipped']:>6}"
+            f"{'' if ok else '  ← 不一致'}"
+        )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+OpenWeatherMap の 5日間/3時間予報 API のスタブサーバー
+
+どの都市にも決まった形の予報（3時間ごと40件）を返し、受けたリクエスト数を数える。
+
+起動例:
+    python backend/benchmarks/stub_openweather.py --port 8003
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8003/data/2.5/forecast python backend/Weather.py
+"""
+import argparse
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DESCRIPTIONS = ["晴天", "薄い雲", "曇りがち", "小雨"]
+
+
+def make_forecast(city, start=None):
+    start = start or datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start -= timedelta(hours=start.hour % 3)
+    entries = []
+    for i in range(40):
+        at = start + timedelta(hours=3 * i)
+        entries.append({
+            "dt": int(at.timestamp()),
+            "main": {"temp": round(10 + 5 * ((i % 8) - 4) / 4, 1)},
+            "weather": [{"description": DESCRIPTIONS[i % len(DESCRIPTIONS)]}],
+            "dt_txt": at.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    # 本物の API と同じく、都市の UTC からの時差（秒）を付ける（日本の都市なので +9 時間）
+    return {"cod": "200", "cnt": len(entries), "list": entries, "city": {"name": city, "timezone": 32400}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_served = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.requests_served += 1
+        query = parse_qs(urlparse(self.path).query)
+        city = query.get("q", ["Tokyo,JP"])[0].split(",")[0]
+        body = json.dumps(make_forecast(city), ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0):
+    """
+    バックグラウンドでスタブを起動し、(サーバー, ベースURL) を返す
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/data/2.5/forecast"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8003)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"http://127.0.0.1:{args.port}/data/2.5/forecast で待ち受けています")
+    server.serve_forever()
@@ -0,0 +1,200 @@
+"""
+Spotify Web API のスタブサーバー
+
+検索・デバイス一覧・再生状態の取得と、再生 / 一時停止 / 次 / 前の操作に応答する。
+受けたリクエスト数と TCP 接続数を数えるので、キャッシュや keep-alive の効果を確かめられる。
+--latency で、実際の API の往復時間を真似た遅延を入れられる。
+
+起動例:
+    python backend/benchmarks/stub_spotify.py --port 8004 --latency 80
+    SPOTIFY_API_PREFIX=http://127.0.0.1:8004/v1/ SPOTIFY_ACCESS_TOKEN=stub python backend/spotify.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEVICES = [
+    {"id": "device-living", "name": "リビングのスピーカー", "type": "Speaker", "is_active": False},
+    {"id": "device-bedroom", "name": "寝室のスピーカー", "type": "Speaker", "is_active": False},
+    {"id": "device-pc", "name": "Web Player (Chrome)", "type": "Computer", "is_active": True},
+]
+
+# 検索に使う曲（曲名, アーティスト）
+CATALOG = [
+    ("アイドル", "YOASOBI"),
+    ("夜に駆ける", "YOASOBI"),
+    ("群青", "YOASOBI"),
+    ("Lemon", "米津玄師"),
+    ("KICK BACK", "米津玄師"),
+    ("Pretender", "Official髭男dism"),
+    ("ミックスナッツ", "Official髭男dism"),
+    ("紅蓮華", "LiSA"),
+]
+
+
+def make_track(index, name, artist):
+    return {
+        "id": f"track{index}",
+        "uri": f"spotify:track:track{index}",
+        "name": name,
+        "duration_ms": 200000,
+        "artists": [{"name": artist}],
+    }
+
+
+def track_for_uri(uri):
+    for i, (name, artist) in enumerate(CATALOG):
+        track = make_track(i, name, artist)
+        if track["uri"] == uri:
+            return track
+    return {"id": uri.rsplit(":", 1)[-1], "uri": uri, "name": uri, "duration_ms": 200000,
+            "artists": [{"name": "Stub Artist"}]}
+
+
+def search_tracks(query, limit):
+    """
+    曲名かアーティスト名にクエリの語を含む曲を返す（なければクエリ名の架空の曲）
+    """
+    words = query.lower().split()
+    found = [
+        make_track(i, name, artist) for i, (name, artist) in enumerate(CATALOG)
+        if any(word in name.lower() or word in artist.lower() for word in words)
+    ]
+    if not found and query:
+        found = [make_track(100 + i, f"{query} {i + 1}", "Stub Artist") for i in range(limit)]
+    return found[:limit]
+
+
+class PlayerState:
+    """
+    スタブの再生状態（曲の位置、再生中かどうか）
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.device_id = "device-pc"
+        self.queue = [make_track(i, name, artist) for i, (name, artist) in enumerate(CATALOG)]
+        self.index = 0
+        self.is_playing = False
+
+    def snapshot(self):
+        with self.lock:
+            device = next(device for device in DEVICES if device["id"] == self.device_id)
+            return {
+                "device": dict(device, is_active=True),
+                "is_playing": self.is_playing,
+                "progress_ms": 0,
+                "item": self.queue[self.index],
+            }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive を受け付ける
+    requests_served = 0
+    connections = 0
+    latency = 0.0
+    player = PlayerState()
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def _count(self):
+        with StubHandler.lock:
+            StubHandler.requests_served += 1
+        if StubHandler.latency:
+            time.sleep(StubHandler.latency)
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else {}
+
+    def do_GET(self):
+        self._count()
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/v1/search":
+            limit = int(query.get("limit", ["5"])[0])
+            items = search_tracks(query.get("q", [""])[0], limit)
+            self._send(200, {"tracks": {"items": items, "total": len(items)}})
+        elif url.path == "/v1/me/player/devices":
+            self._send(200, {"devices": DEVICES})
+        elif url.path == "/v1/me/player":
+            self._send(200, StubHandler.player.snapshot())
+        else:
+            self._send(404, {"error": {"status": 404, "message": "not found"}})
+
+    def do_PUT(self):
+        self._count()
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        body = self._read_body()
+        player = StubHandler.player
+        with player.lock:
+            if "device_id" in query:
+                player.device_id = query["device_id"][0]
+            if url.path == "/v1/me/player/play":
+                if body.get("uris"):
+                    player.queue = [track_for_uri(uri) for uri in body["uris"]] + player.queue
+                    player.index = 0
+                player.is_playing = True
+            elif url.path == "/v1/me/player/pause":
+                player.is_playing = False
+            else:
+                self._send(404, {"error": {"status": 404, "message": "not found"}})
+                return
+        self._send(204)
+
+    def do_POST(self):
+        self._count()
+        url = urlparse(self.path)
+        player = StubHandler.player
+        self._read_body()
+        with player.lock:
+            if url.path == "/v1/me/player/next":
+                player.index = min(player.index + 1, len(player.queue) - 1)
+            elif url.path == "/v1/me/player/previous":
+                player.index = max(player.index - 1, 0)
+            else:
+                self._send(404, {"error": {"status": 404, "message": "not found"}})
+                return
+        self._send(204)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, latency=0.0):
+    """
+    バックグラウンドでスタブを起動し、(サーバー, API のプレフィックス) を返す（latency は秒）
+    """
+    StubHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8004)
+    parser.add_argument("--latency", type=float, default=0.0, help="1リクエストごとの遅延（ミリ秒）")
+    args = parser.parse_args()
+    StubHandler.latency = args.latency / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"http://127.0.0.1:{args.port}/v1/ で待ち受けています")
+    server.serve_forever()
@@ -0,0 +1,113 @@
+import os
+
+# コンテキストの設定（環境変数で上書き可能）
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))  # 1リクエストで送るプロンプトの上限トークン数
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "500"))  # 要約に割り当てるトークン数
+CONTEXT_LOW_WATER = float(os.getenv("CONTEXT_LOW_WATER", "0.6"))  # 要約するときは予算のこの割合まで直近の会話を減らす
+
+# tiktoken があれば正確に数え、なければ文字数から概算する
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+SUMMARY_INSTRUCTION = (
+    "以下はユーザーとアシスタントの会話です。"
+    "これまでの要約と新しい会話をまとめ、今後の応答に必要な事実や約束事を残した簡潔な要約を日本語で書いてください。"
+)
+
+
+def count_tokens(text):
+    """
+    テキストのトークン数を数える
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # 概算: 英数字はおよそ4文字で1トークン、日本語はおよそ1文字1トークン
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def count_message_tokens(messages):
+    """
+    メッセージ列のトークン数（1メッセージあたりの付加分を含む）
+    """
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 2
+
+
+class ContextWindow:
+    """
+    システムプロンプト + 要約 + 直近の会話 を予算内に収めてプロンプトを組み立てる
+    予算からあふれた古い会話は要約に畳み込み、要約は差分だけで更新する
+    """
+
+    def __init__(self, system_prompt, budget=CONTEXT_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET,
+                 low_water=CONTEXT_LOW_WATER):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.low_water = low_water
+        self.summary = ""
+        self.summarized_count = 0  # history[:summarized_count] は要約済み
+        self.folding = False  # 要約の更新中かどうか
+
+    def _header(self):
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"これまでの会話の要約: {self.summary}"})
+        return messages
+
+    def _recent_start(self, history, limit):
+        # 末尾から数えて limit トークンに収まる最初の位置（最新のメッセージは必ず含める）
+        start = len(history)
+        used = 0
+        while start > self.summarized_count:
+            tokens = count_tokens(history[start - 1]["content"]) + 4
+            if used + tokens > limit and start < len(history):
+                break
+            used += tokens
+            start -= 1
+        return start
+
+    def _available(self):
+        # 要約は今後 summary_budget まで育つ前提で枠を確保しておく
+        return self.budget - count_message_tokens([{"role": "system", "content": self.system_prompt}]) - self.summary_budget
+
+    def needs_fold(self, history):
+        """
+        要約していない会話が予算を超えているかどうか
+        """
+        return count_message_tokens(history[self.summarized_count:]) > self._available()
+
+    def fold_request(self, history):
+        """
+        要約を更新するためのメッセージ列と、要約に含める範囲の終端を返す
+        畳み込む会話がなければ (None, summarized_count) を返す
+        """
+        upto = self._recent_start(history, int(self._available() * self.low_water))
+        pending = history[self.summarized_count:upto]
+        if not pending:
+            return None, self.summarized_count
+
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in pending)
+        content = f"これまでの要約:\n{self.summary or '（なし）'}\n\n新しい会話:\n{transcript}"
+        messages = [
+            {"role": "system", "content": SUMMARY_INSTRUCTION},
+            {"role": "user", "content": content},
+        ]
+        return messages, upto
+
+    def apply_summary(self, summary, upto):
+        self.summary = summary.strip()
+        self.summarized_count = max(self.summarized_count, upto)
+
+    def build(self, history):
+        """
+        予算内に収めたプロンプトを返す
+        要約が追いついていない場合は古い会話から切り捨てる
+        """
+        header = self._header()
+        limit = self.budget - count_message_tokens(header)
+        start = self._recent_start(history, limit)
+        return header + history[start:]
@@ -0,0 +1,105 @@
+import json
+import math
+import os
+import threading
+import time
+
+# 天気予報キャッシュの設定（環境変数で上書き可能）
+FORECAST_CACHE_FILE = os.getenv(
+    "FORECAST_CACHE_FILE", os.path.join(os.path.expanduser("~"), ".cache", "chatai_forecast.json")
+)
+# OpenWeatherMap の 5日間/3時間予報は3時間ごとに更新される
+FORECAST_UPDATE_INTERVAL = int(os.getenv("FORECAST_UPDATE_INTERVAL", str(3 * 3600)))
+FORECAST_UPDATE_DELAY = int(os.getenv("FORECAST_UPDATE_DELAY", "600"))  # 更新時刻から実際に反映されるまでの余裕（秒）
+FORECAST_MAX_STALE = int(os.getenv("FORECAST_MAX_STALE", str(6 * 3600)))  # 期限切れでも裏で更新しつつ返してよい時間
+
+
+def next_update(fetched_at, interval=FORECAST_UPDATE_INTERVAL, delay=FORECAST_UPDATE_DELAY):
+    """
+    fetched_at の後で、次に予報が更新される時刻（UTC の interval 区切り + delay）
+    """
+    return math.floor((fetched_at - delay) / interval + 1) * interval + delay
+
+
+class ForecastCache:
+    """
+    都市ごとの天気予報キャッシュ
+    予報の更新時刻までは保存済みのデータを返し、期限切れ後 max_stale 秒以内なら
+    古いデータを返しながらバックグラウンドで取り直す（stale-while-revalidate）
+    """
+
+    def __init__(self, fetch, path=FORECAST_CACHE_FILE, interval=FORECAST_UPDATE_INTERVAL,
+                 delay=FORECAST_UPDATE_DELAY, max_stale=FORECAST_MAX_STALE):
+        self.fetch = fetch  # 都市名を受け取り、API の応答（失敗時は None）を返す関数
+        self.path = path
+        self.interval = interval
+        self.delay = delay
+        self.max_stale = max_stale
+        self._entries = {}  # 都市名 -> {"data", "fetched_at", "expires_at"}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, city):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(city)
+        if entry is not None:
+            if now < entry["expires_at"]:
+                return entry["data"]
+            if now < entry["expires_at"] + self.max_stale:
+                self._refresh_in_background(city)
+                return entry["data"]
+        return self._refresh(city)
+
+    def _refresh(self, city):
+        data = self.fetch(city)
+        if data is None:
+            return None
+        fetched_at = time.time()
+        with self._lock:
+            self._entries[city] = {
+                "data": data,
+                "fetched_at": fetched_at,
+                "expires_at": next_update(fetched_at, self.interval, self.delay),
+            }
+        self._save()
+        return data
+
+    def _refresh_in_background(self, city):
+        with self._lock:
+            if city in self._refreshing:
+                return
+            self._refreshing.add(city)
+
+        def refresh():
+            try:
+                self._refresh(city)
+            except Exception as e:
+                print(f"天気予報の更新に失敗しました: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(city)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"天気予報キャッシュの読み込みに失敗しました: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # 一時ファイルに書いてから置き換え、途中で落ちても壊れたファイルを残さない
+        temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+WEEKDAYS = ["月曜", "火曜", "水曜", "木曜", "金曜", "土曜", "日曜"]
+
+# 時間帯の言い方と、対象にする時刻の範囲（開始時, 終了時）
+TIME_RANGES = [
+    ("午前", (0, 12)),
+    ("午後", (12, 24)),
+    ("夕方", (15, 19)),
+    ("朝", (5, 10)),
+    ("昼", (10, 15)),
+    ("夜", (18, 24)),
+]
+
+
+class ForecastIndex:
+    """
+    5日間/3時間予報を一度だけ解析し、日付 → 時刻ごとの配列 に並べ直したもの
+    日付や時刻の指定は辞書を引くだけで済む
+    """
+
+    def __init__(self, data):
+        self.days = {}  # "YYYY-MM-DD" -> {"hours": [...], "temps": [...], "descriptions": [...]}
+        data = data or {}
+        # dt_txt は UTC なので、都市の時差が分かれば現地時刻で並べる
+        offset = data.get("city", {}).get("timezone")
+        for entry in data.get("list", []):
+            if offset is not None and "dt" in entry:
+                local = datetime.fromtimestamp(entry["dt"] + offset, timezone.utc)
+                date_str, time_str = local.strftime("%Y-%m-%d"), local.strftime("%H:%M")
+            else:
+                date_str, time_str = entry["dt_txt"][:10], entry["dt_txt"][11:16]
+            day = self.days.setdefault(date_str, {"hours": [], "temps": [], "descriptions": []})
+            day["hours"].append(time_str)
+            day["temps"].append(entry["main"]["temp"])
+            day["descriptions"].append(entry["weather"][0]["description"])
+
+    def __contains__(self, date_str):
+        return date_str in self.days
+
+    def day(self, date_str, hours=None):
+        """
+        指定した日の (時刻, 温度, 天気) のリストを返す（なければ None）
+        hours に (開始時, 終了時) を渡すとその時間帯だけに絞る
+        """
+        day = self.days.get(date_str)
+        if day is None:
+            return None
+        rows = zip(day["hours"], day["temps"], day["descriptions"])
+        if hours is not None:
+            start, end = hours
+            rows = [row for row in rows if start <= int(row[0][:2]) < end]
+        return list(rows) or None
+
+    def days_in(self, date_strs, hours=None):
+        """
+        複数の日付をまとめて引く（予報のない日は含めない）
+        """
+        result = {}
+        for date_str in date_strs:
+            rows = self.day(date_str, hours)
+            if rows:
+                result[date_str] = rows
+        return result
+
+
+def resolve_dates(input_text, today=None):
+    """
+    発話から対象の日付（"YYYY-MM-DD" のリスト）を求める
+    今日・明日・明後日・週末・曜日に対応する
+    """
+    today = today or datetime.now()
+    if "明後日" in input_text or "あさって" in input_text:
+        dates = [today + timedelta(days=2)]
+    elif "明日" in input_text or "あした" in input_text:
+        dates = [today + timedelta(days=1)]
+    elif "今日" in input_text or "きょう" in input_text:
+        dates = [today]
+    elif "週末" in input_text or "土日" in input_text:
+        # 今日が日曜なら今日だけ、それ以外は今週の土日
+        if today.weekday() == 6:
+            dates = [today]
+        else:
+            saturday = today + timedelta(days=5 - today.weekday())
+            dates = [saturday, saturday + timedelta(days=1)]
+    else:
+        dates = []
+        for weekday, name in enumerate(WEEKDAYS):
+            if name in input_text:
+                dates.append(today + timedelta(days=(weekday - today.weekday()) % 7))
+    return [day.strftime("%Y-%m-%d") for day in dates]
+
+
+def resolve_hours(input_text):
+    """
+    発話から時間帯 (開始時, 終了時) を求める（指定がなければ None）
+    """
+    for name, hours in TIME_RANGES:
+        if name in input_text:
+            return hours
+    return None
+
+
+def format_rows(rows):
+    return "".join(f"- {time}: 温度 {temp}°, 天気: {description}\n" for time, temp, description in rows)
+
+
+def summarize(indexes, date_strs, hours=None, format_date=lambda date_str: date_str):
+    """
+    複数の都市（名前 -> ForecastIndex）と日付の天気をまとめて文章にする
+    """
+    lines = []
+    for place, index in indexes.items():
+        for date_str, rows in index.days_in(date_strs, hours).items():
+            lines.append(f"{format_date(date_str)}の{place}の天気:\n{format_rows(rows)}")
+    return "".join(lines)
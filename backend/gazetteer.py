@@ -0,0 +1,237 @@
+"""
+オフラインの地名辞書（都道府県・市区町村）
+
+data/gazetteer.csv を読み込み、漢字・かな・ローマ字の地名をトライ木に登録して
+発話から最長一致で地名を取り出す。短いかなの呼び方（「なら」「みと」など）は、
+ふつうの言葉の一部（「雨なら」「みとめて」）に一致しないよう、前後が区切りのときだけ地名とみなす。
+起動を速くするため、トライ木は
+data/gazetteer.idx にコンパイル済みの形で保存しておく。
+
+CSV を更新したあとにインデックスを作り直す:
+    python backend/gazetteer.py build
+"""
+import csv
+import hashlib
+import math
+import os
+import pickle
+import sys
+from collections import namedtuple
+from intents import normalize
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+GAZETTEER_CSV = os.path.join(DATA_DIR, "gazetteer.csv")
+GAZETTEER_INDEX = os.path.join(DATA_DIR, "gazetteer.idx")
+INDEX_VERSION = 2
+
+# 地名（kind は "prefecture" または "city"）
+Place = namedtuple("Place", ["kind", "prefecture", "name", "kana", "romaji", "lat", "lon"])
+
+_TERMINAL = ""  # トライ木のノードで、ここで終わる地名の番号を持つキー
+_BOUNDED = "\0"  # 同じく、前後が区切りのときだけ一致する短いかなの呼び方で終わる地名の番号を持つキー
+
+BOUNDED_KANA_LENGTH = 3  # この文字数以下のひらがなだけの呼び方は、前後が区切りのときだけ一致させる
+# 地名の前後に来てもよいひらがな（助詞の先頭の文字）。これ以外のひらがなが続けば言葉の一部とみなす
+_PARTICLES = set("のはがでにへもとやかまっ")
+
+
+def _aliases(place):
+    """
+    地名の呼び方（正規化済み）。「市」「県」などを省いた形も含める
+    """
+    names = {place.name, place.kana, place.romaji}
+    if place.kind == "prefecture":
+        names.add(place.prefecture)
+        for suffix in ("けん", "ふ", "と"):
+            if place.name[-1] in "県府都" and place.kana.endswith(suffix):
+                names.add(place.kana[:-len(suffix)])
+                break
+    else:
+        if place.name[-1] in "市区町村" and len(place.name) > 2:
+            names.add(place.name[:-1])
+        for suffix in ("し", "く", "まち", "ちょう", "むら", "そん"):
+            if place.kana.endswith(suffix) and len(place.kana) - len(suffix) >= 2:
+                names.add(place.kana[:-len(suffix)])
+                break
+    return {normalize(name) for name in names if name}
+
+
+def _is_hiragana(c):
+    return "ぁ" <= c <= "ゖ" or c == "ー"
+
+
+def _is_bounded(alias):
+    """
+    前後が区切りのときだけ一致させる呼び方か（短いひらがなだけの呼び方）
+    """
+    return len(alias) <= BOUNDED_KANA_LENGTH and all(_is_hiragana(c) for c in alias)
+
+
+def _at_boundary(text, start, end):
+    """
+    text[start:end] の前後が、地名の区切りになっているか
+    後ろが助詞か文の終わりで、前がひらがなの言葉の途中でないときだけ区切りとみなす
+    """
+    before = text[start - 1] if start > 0 else ""
+    after = text[end] if end < len(text) else ""
+    # 「雨なら傘」「それなら」「みとめて」は除き、「なはの天気」「明日のみとは」は残す
+    if after and after not in _PARTICLES:
+        return False
+    return not before or not _is_hiragana(before) or before in _PARTICLES
+
+
+def load_places(path=GAZETTEER_CSV):
+    with open(path, "r", encoding="utf-8") as f:
+        return [
+            Place(row["kind"], row["prefecture"], row["name"], row["kana"], row["romaji"],
+                  float(row["lat"]), float(row["lon"]))
+            for row in csv.DictReader(f)
+        ]
+
+
+def build_trie(places):
+    trie = {}
+    for index, place in enumerate(places):
+        for alias in _aliases(place):
+            node = trie
+            for c in alias:
+                node = node.setdefault(c, {})
+            node.setdefault(_BOUNDED if _is_bounded(alias) else _TERMINAL, []).append(index)
+    return trie
+
+
+def _source_hash(csv_path):
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compile_index(csv_path=GAZETTEER_CSV, index_path=GAZETTEER_INDEX):
+    """
+    CSV からトライ木を作り、バイナリのインデックスとして保存する
+    """
+    places = load_places(csv_path)
+    payload = {
+        "version": INDEX_VERSION,
+        "source": _source_hash(csv_path),  # どの CSV から作ったか（古いインデックスを使わないため）
+        "places": [tuple(place) for place in places],
+        "trie": build_trie(places),
+    }
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, index_path)
+    return len(places)
+
+
+class Gazetteer:
+    """
+    地名の最長一致検索と、名前・座標からの検索
+    """
+
+    def __init__(self, places, trie):
+        self.places = places
+        self.trie = trie
+
+    @classmethod
+    def load(cls, csv_path=GAZETTEER_CSV, index_path=GAZETTEER_INDEX):
+        """
+        コンパイル済みのインデックスを読み込む（CSV が更新されていれば CSV から作り直す）
+        """
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "rb") as f:
+                    payload = pickle.load(f)
+                if payload.get("version") == INDEX_VERSION and payload.get("source") == _source_hash(csv_path):
+                    return cls([Place(*place) for place in payload["places"]], payload["trie"])
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                print(f"地名インデックスの読み込みに失敗しました: {e}")
+        places = load_places(csv_path)
+        return cls(places, build_trie(places))
+
+    def find_all(self, text):
+        """
+        テキストを先頭から1回走査し、最長一致した地名のリストを出現順に返す
+        """
+        text = normalize(text)
+        found = []
+        position = 0
+        while position < len(text):
+            node = self.trie
+            end, indexes = None, None
+            for offset in range(position, len(text)):
+                node = node.get(text[offset])
+                if node is None:
+                    break
+                matched = node.get(_TERMINAL, [])
+                if _BOUNDED in node and _at_boundary(text, position, offset + 1):
+                    matched = matched + node[_BOUNDED]
+                if matched:
+                    end, indexes = offset + 1, matched
+            if end is None:
+                position += 1
+                continue
+            found.append([self.places[index] for index in indexes])
+            position = end
+        return found
+
+    def extract(self, text):
+        """
+        発話から (都道府県, 市区町村) の Place を取り出す（見つからなければ None）
+        市区町村だけが見つかった場合は、その都道府県を補う
+        """
+        prefecture, city = None, None
+        for candidates in self.find_all(text):
+            for place in candidates:
+                if place.kind == "prefecture" and prefecture is None:
+                    prefecture = place
+                elif place.kind == "city" and city is None:
+                    # 都道府県が先に分かっていれば、その中の市区町村を優先する
+                    if prefecture is None or place.prefecture == prefecture.prefecture:
+                        city = place
+        if prefecture is None and city is not None:
+            prefecture = self.lookup(city.prefecture, kind="prefecture")
+        return prefecture, city
+
+    def lookup(self, name, kind=None):
+        """
+        名前（漢字・かな・ローマ字・省略形）に完全一致する地名を返す
+        """
+        node = self.trie
+        for c in normalize(name):
+            node = node.get(c)
+            if node is None:
+                return None
+        for index in node.get(_TERMINAL, []) + node.get(_BOUNDED, []):
+            place = self.places[index]
+            if kind is None or place.kind == kind:
+                return place
+        return None
+
+    def nearest(self, lat, lon, kind="city"):
+        """
+        座標に最も近い地名を返す
+        """
+        def distance(place):
+            # 近距離の比較なので、経度方向を緯度で補正した平面距離で十分
+            return (place.lat - lat) ** 2 + ((place.lon - lon) * math.cos(math.radians(lat))) ** 2
+
+        candidates = [place for place in self.places if kind is None or place.kind == kind]
+        return min(candidates, key=distance) if candidates else None
+
+
+_default_gazetteer = None
+
+
+def get_gazetteer():
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = Gazetteer.load()
+    return _default_gazetteer
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        print(__doc__)
+        sys.exit(1)
+    count = compile_index()
+    print(f"{count} 件の地名から {GAZETTEER_INDEX} を作成しました")
@@ -0,0 +1,93 @@
+import math
+import numpy as np
+
+# MediaPipe Hands のランドマーク番号
+WRIST = 0
+THUMB_TIP = 4
+INDEX_FINGER_TIP = 8
+MIDDLE_FINGER_TIP = 12
+RING_FINGER_TIP = 16
+PINKY_TIP = 20
+FINGER_TIPS = [THUMB_TIP, INDEX_FINGER_TIP, MIDDLE_FINGER_TIP, RING_FINGER_TIP, PINKY_TIP]
+
+# 基準値を設定（調整が必要）
+OPEN_THRESHOLD = 0.38  # 指先と手首の距離がこの値以上なら「開いている」と判断
+
+# 開いている指の本数 → ジェスチャー（0本: グー, 5本: パー, それ以外: チョキ）
+_GESTURE_BY_OPEN_COUNT = np.array(["rock", "scissors", "scissors", "scissors", "scissors", "paper"])
+
+
+def landmarks_to_array(multi_hand_landmarks):
+    """
+    フレーム内のすべての手のランドマークを (手の数, 21, 3) の配列にする
+    """
+    if not multi_hand_landmarks:
+        return np.empty((0, 21, 3), dtype=np.float32)
+    return np.array(
+        [[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in multi_hand_landmarks],
+        dtype=np.float32,
+    )
+
+
+def finger_distances(hands):
+    """
+    各指先と手首の距離（x, y 平面）を (手の数, 5) の配列で返す
+    """
+    tips = hands[:, FINGER_TIPS, :2]
+    wrist = hands[:, WRIST:WRIST + 1, :2]
+    return np.linalg.norm(tips - wrist, axis=-1)
+
+
+def classify_gestures(hands, threshold=OPEN_THRESHOLD):
+    """
+    すべての手のジェスチャーを配列演算でまとめて判定する（記録済みのランドマークの一括判定用）
+    カメラ処理では使わない。bench_gesture.py --sweep で測ると、1フレームの手が1〜64本のどれでも
+    配列への変換込みでスカラー版の recognize_hand_gesture より遅かった
+    """
+    if len(hands) == 0:
+        return []
+    open_count = (finger_distances(hands) > threshold).sum(axis=1)
+    return _GESTURE_BY_OPEN_COUNT[open_count].tolist()
+
+
+def recognize_hand_gesture(hand_landmarks):
+    """
+    1つの手のジェスチャーを判定する（ランドマークを1つずつ読むスカラー版。カメラ処理はこちらを使う）
+    """
+    if hand_landmarks is None:
+        return None
+
+    # 必要なランドマークを取得
+    wrist = hand_landmarks.landmark[WRIST]
+    thumb_tip = hand_landmarks.landmark[THUMB_TIP]
+    index_tip = hand_landmarks.landmark[INDEX_FINGER_TIP]
+    middle_tip = hand_landmarks.landmark[MIDDLE_FINGER_TIP]
+    ring_tip = hand_landmarks.landmark[RING_FINGER_TIP]
+    pinky_tip = hand_landmarks.landmark[PINKY_TIP]
+
+    # 各指の先端と手首との距離を計算
+    def distance(point1, point2):
+        return math.sqrt((point1.x - point2.x)**2 + (point1.y - point2.y)**2)
+
+    thumb_dist = distance(thumb_tip, wrist)
+    index_dist = distance(index_tip, wrist)
+    middle_dist = distance(middle_tip, wrist)
+    ring_dist = distance(ring_tip, wrist)
+    pinky_dist = distance(pinky_tip, wrist)
+
+    threshold = OPEN_THRESHOLD
+
+    # 指が開いているかの判定
+    is_thumb_open = thumb_dist > threshold
+    is_index_open = index_dist > threshold
+    is_middle_open = middle_dist > threshold
+    is_ring_open = ring_dist > threshold
+    is_pinky_open = pinky_dist > threshold
+
+    # ジェスチャーの判定
+    if not is_thumb_open and not is_index_open and not is_middle_open and not is_ring_open and not is_pinky_open:
+        return "rock"  # グー
+    elif is_thumb_open and is_index_open and is_middle_open and is_ring_open and is_pinky_open:
+        return "paper"  # パー
+    else:
+        return "scissors"  # チョキ
@@ -0,0 +1,140 @@
+"""
+MediaPipe Hands の推論を軽くするためのトラッカー
+
+"full" モードは従来どおり元の解像度のフレーム全体で推論する。
+"roi" モードは、縮小したフレームで手を見つけ、その後は前回の手の周り（ROI）だけを
+元の解像度で切り出して推論する。N フレームごと、または ROI で手を見失ったときに縮小フレームで探し直す。
+どちらのモードでも、ランドマークはフレーム全体の正規化座標で返すので、判定の閾値はそのまま使える。
+"""
+import os
+import cv2
+import mediapipe as mp
+
+# 推論の設定（環境変数で上書き可能）
+RSP_INFERENCE_MODE = os.getenv("RSP_INFERENCE_MODE", "full")  # "full" または "roi"
+RSP_MAX_NUM_HANDS = int(os.getenv("RSP_MAX_NUM_HANDS", "2"))
+RSP_MODEL_COMPLEXITY = int(os.getenv("RSP_MODEL_COMPLEXITY", "1"))  # 0 は軽量モデル、1 は高精度モデル
+RSP_DETECT_WIDTH = int(os.getenv("RSP_DETECT_WIDTH", "320"))  # 手を探すときに縮小する幅（ピクセル）
+RSP_ROI_SIZE = int(os.getenv("RSP_ROI_SIZE", "256"))  # ROI をこれより大きければ縮小する（ピクセル）
+RSP_ROI_MARGIN = float(os.getenv("RSP_ROI_MARGIN", "0.3"))  # 手の外接矩形に足す余白（辺の長さに対する割合）
+RSP_REDETECT_INTERVAL = int(os.getenv("RSP_REDETECT_INTERVAL", "15"))  # ROI 追跡中でも探し直すフレーム間隔
+RSP_MIN_TRACKING_CONFIDENCE = float(os.getenv("RSP_MIN_TRACKING_CONFIDENCE", "0.5"))
+
+
+def create_hands(max_num_hands=RSP_MAX_NUM_HANDS, model_complexity=RSP_MODEL_COMPLEXITY,
+                 min_tracking_confidence=RSP_MIN_TRACKING_CONFIDENCE):
+    return mp.solutions.hands.Hands(
+        max_num_hands=max_num_hands,
+        model_complexity=model_complexity,
+        min_tracking_confidence=min_tracking_confidence,
+    )
+
+
+def resize_to_width(image, width):
+    height, original_width = image.shape[:2]
+    if original_width <= width:
+        return image
+    return cv2.resize(image, (width, round(height * width / original_width)), interpolation=cv2.INTER_AREA)
+
+
+def hand_confidence(results, index):
+    """
+    index 番目の手の確からしさ（左右判定のスコア。取れなければ 1.0）
+    """
+    if not results.multi_handedness or index >= len(results.multi_handedness):
+        return 1.0
+    return results.multi_handedness[index].classification[0].score
+
+
+class HandTracker:
+    """
+    フレーム（BGR）を受け取り、フレーム全体の正規化座標の multi_hand_landmarks を返す
+    """
+
+    def __init__(self, mode=RSP_INFERENCE_MODE, hands=None, max_num_hands=RSP_MAX_NUM_HANDS,
+                 model_complexity=RSP_MODEL_COMPLEXITY, detect_width=RSP_DETECT_WIDTH,
+                 roi_size=RSP_ROI_SIZE, roi_margin=RSP_ROI_MARGIN,
+                 redetect_interval=RSP_REDETECT_INTERVAL,
+                 min_tracking_confidence=RSP_MIN_TRACKING_CONFIDENCE):
+        if mode not in ("full", "roi"):
+            raise ValueError(f"不明な推論モードです: {mode}")
+        self.mode = mode
+        self.detect_width = detect_width
+        self.roi_size = roi_size
+        self.roi_margin = roi_margin
+        self.redetect_interval = redetect_interval
+        self.min_tracking_confidence = min_tracking_confidence
+
+        options = dict(max_num_hands=max_num_hands, model_complexity=model_complexity,
+                       min_tracking_confidence=min_tracking_confidence)
+        self.detector = hands or create_hands(**options)
+        # ROI は毎回位置が変わるので、全体を探すモデルとは別のインスタンスで追跡する
+        self.roi_hands = create_hands(**options) if mode == "roi" else None
+
+        self._roi = None  # 追跡中の領域 (x0, y0, x1, y1)（ピクセル）
+        self._since_detect = 0
+        self.counts = {"detect": 0, "track": 0, "lost": 0}
+
+    def process(self, frame):
+        if self.mode == "full":
+            self.counts["detect"] += 1
+            results = self.detector.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            return results.multi_hand_landmarks or []
+
+        landmarks = None
+        if self._roi is not None and self._since_detect < self.redetect_interval:
+            landmarks = self._track(frame)
+        if landmarks is None:
+            landmarks = self._detect(frame)
+        self._roi = self._roi_around(landmarks, frame.shape[1], frame.shape[0]) if landmarks else None
+        return landmarks
+
+    def _detect(self, frame):
+        # 縮小したフレーム全体で探す（正規化座標なので、縮小しても座標の変換はいらない）
+        self.counts["detect"] += 1
+        self._since_detect = 0
+        small = resize_to_width(frame, self.detect_width)
+        results = self.detector.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        return results.multi_hand_landmarks or []
+
+    def _track(self, frame):
+        """
+        ROI だけで推論し、フレーム全体の座標に戻す。見失ったら None
+        """
+        x0, y0, x1, y1 = self._roi
+        crop = resize_to_width(frame[y0:y1, x0:x1], self.roi_size)
+        results = self.roi_hands.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        hands = results.multi_hand_landmarks or []
+        if not hands or min(hand_confidence(results, i) for i in range(len(hands))) < self.min_tracking_confidence:
+            self.counts["lost"] += 1
+            return None
+
+        self.counts["track"] += 1
+        self._since_detect += 1
+        height, width = frame.shape[:2]
+        scale_x, scale_y = (x1 - x0) / width, (y1 - y0) / height
+        for hand in hands:
+            for lm in hand.landmark:
+                lm.x = x0 / width + lm.x * scale_x
+                lm.y = y0 / height + lm.y * scale_y
+                lm.z = lm.z * scale_x  # z は幅と同じ縮尺
+        return hands
+
+    def _roi_around(self, landmarks, width, height):
+        """
+        すべての手を囲む正方形に余白を足した領域（フレームからはみ出した分は切り詰める）
+        """
+        xs = [lm.x * width for hand in landmarks for lm in hand.landmark]
+        ys = [lm.y * height for hand in landmarks for lm in hand.landmark]
+        center_x, center_y = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+        side = max(max(xs) - min(xs), max(ys) - min(ys)) * (1 + 2 * self.roi_margin)
+        x0, y0 = max(0, int(center_x - side / 2)), max(0, int(center_y - side / 2))
+        x1, y1 = min(width, int(center_x + side / 2)), min(height, int(center_y + side / 2))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+    def close(self):
+        self.detector.close()
+        if self.roi_hands is not None:
+            self.roi_hands.close()
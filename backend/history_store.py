@@ -0,0 +1,148 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# 会話ログの設定（環境変数で上書き可能）
+HISTORY_DB = os.getenv("HISTORY_DB", "conversation_history.db")
+HISTORY_LOAD_LIMIT = int(os.getenv("HISTORY_LOAD_LIMIT", "200"))  # セッション再開時に読み込む直近のメッセージ数
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5"))  # まとめて書き込むまでの最大待ち時間（秒）
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+"""
+
+# キューに入れると、待たずにその時点までの内容を書き込ませる目印
+_FLUSH = object()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    # WAL モード: 追記はログへの追加だけで済み、クラッシュしてもDBは壊れない
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ConversationStore:
+    """
+    追記専用の会話ログ（SQLite WAL）
+    append() はキューに積むだけで、書き込みはバックグラウンドスレッドがまとめて行う
+    """
+
+    def __init__(self, path=HISTORY_DB, flush_interval=HISTORY_FLUSH_INTERVAL, batch_size=256):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._reader = _connect(path)
+        self._reader.executescript(_SCHEMA)
+        self._reader_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def append(self, session_id, role, content):
+        """
+        メッセージを1件追記する（ブロックしない）
+        """
+        self._queue.put((session_id, role, content, time.time()))
+
+    def load(self, session_id, limit=HISTORY_LOAD_LIMIT):
+        """
+        セッションの直近 limit 件のメッセージを古い順に返す
+        """
+        self.flush()
+        with self._reader_lock:
+            rows = self._reader.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit if limit else -1),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def count(self):
+        with self._reader_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def flush(self):
+        """
+        キューに積まれたメッセージがすべて書き込まれるまで待つ
+        """
+        if self._queue.unfinished_tasks:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._reader.close()
+
+    def import_json(self, json_path):
+        """
+        旧形式の conversation_history.json を取り込む（DBが空のときだけ）
+        取り込んだファイルは .bak に名前を変えて残す
+        """
+        if not os.path.exists(json_path) or self.count() > 0:
+            return 0
+        with open(json_path, "r", encoding="utf-8") as f:
+            histories = json.load(f)
+        if isinstance(histories, list):
+            histories = {"default": histories}
+
+        imported = 0
+        for session_id, history in histories.items():
+            for message in history:
+                self.append(session_id, message["role"], message["content"])
+                imported += 1
+        self.flush()
+        os.replace(json_path, json_path + ".bak")
+        return imported
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # 少し待って、その間に来たメッセージを1トランザクションにまとめる
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None and item is not _FLUSH and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            rows = [row for row in batch if row is not None and row is not _FLUSH]
+            try:
+                if rows:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                            rows,
+                        )
+            except sqlite3.Error as e:
+                print(f"会話ログの書き込みエラー: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if None in batch:
+                conn.close()
+                return
@@ -0,0 +1,147 @@
+import unicodedata
+from collections import deque
+
+
+def normalize(text):
+    """
+    音声認識結果を照合用に正規化する
+    全角/半角の統一（NFKC）、小文字化、カタカナ→ひらがな、空白と句読点の除去
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    chars = []
+    for c in text:
+        category = unicodedata.category(c)
+        if category.startswith("Z") or category.startswith("P") or category == "Cc":
+            continue
+        if "ァ" <= c <= "ヶ":
+            c = chr(ord(c) - 0x60)  # カタカナをひらがなに寄せる
+        chars.append(c)
+    return "".join(chars)
+
+
+class Intent:
+    """
+    音声コマンドの定義
+    patterns のいずれかを含む（exact=True の場合は完全に一致する）発話にマッチする
+    複数マッチした場合は priority が高いもの、次に長いパターンにマッチしたものを優先する
+    """
+
+    def __init__(self, name, patterns, priority=0, exact=False):
+        self.name = name
+        self.patterns = patterns
+        self.priority = priority
+        self.exact = exact
+
+
+class AhoCorasick:
+    """
+    複数パターンを1回の走査で探すマッチャー
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for index, pattern in enumerate(patterns):
+            self._add(pattern, index)
+        self._build()
+
+    def _add(self, pattern, index):
+        state = 0
+        for c in pattern:
+            next_state = self._goto[state].get(c)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][c] = next_state
+            state = next_state
+        self._output[state].append(index)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(c, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text):
+        """
+        text に含まれるパターンの番号を出現順に返す
+        """
+        state = 0
+        found = []
+        for c in text:
+            while state and c not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(c, 0)
+            found.extend(self._output[state])
+        return found
+
+
+class IntentRouter:
+    """
+    インテントの表をコンパイルし、発話を1回の走査で振り分ける
+    """
+
+    def __init__(self, intents):
+        self.intents = intents
+        self._exact = {}
+        self._patterns = []  # (正規化済みパターン, 表での順番, Intent)
+        for order, intent in enumerate(intents):
+            for pattern in intent.patterns:
+                key = normalize(pattern)
+                if intent.exact:
+                    self._exact.setdefault(key, (order, intent))
+                else:
+                    self._patterns.append((key, order, intent))
+        self._matcher = AhoCorasick([key for key, _, _ in self._patterns])
+
+    def route(self, text):
+        """
+        発話にマッチしたインテント名を返す（なければ None）
+        """
+        normalized = normalize(text)
+        candidates = []
+        if normalized in self._exact:
+            order, intent = self._exact[normalized]
+            candidates.append((intent.priority, len(normalized), -order, intent))
+        for index in self._matcher.search(normalized):
+            key, order, intent = self._patterns[index]
+            candidates.append((intent.priority, len(key), -order, intent))
+        if not candidates:
+            return None
+        return max(candidates, key=lambda candidate: candidate[:3])[3].name
+
+
+# サーバー（main.py）で受け付けるコマンド
+SERVER_INTENTS = [
+    Intent("quit", ["終了"], priority=100, exact=True),
+    Intent("sleep", ["おやすみ"], priority=90, exact=True),
+    Intent("wake", ["おはよう"], priority=90, exact=True),
+    Intent("rsp", ["じゃんけんしよ"], priority=30),
+    Intent("spotify", ["音楽流して"], priority=20),
+    Intent("weather", ["天気"], priority=10),
+]
+
+# チャットクライアント（app.py）で処理するコマンド
+CLIENT_INTENTS = [
+    Intent("sleep", ["おやすみ"], priority=10),
+    Intent("wake", ["おはよう"]),
+]
+
+# Spotify の再生コントロール（spotify.py）で受け付けるコマンド
+PLAYBACK_INTENTS = [
+    Intent("exit_controls", ["再生コントロール終了"], priority=20),
+    Intent("quit", ["終了"], priority=10),
+    Intent("pause", ["停止"]),
+    Intent("resume", ["再開"]),
+    Intent("next", ["次"]),
+    Intent("previous", ["前"]),
+]
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import openai
+
+# OpenAI API の設定（環境変数で上書き可能）
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))  # 1リクエストあたりのタイムアウト（秒）
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))  # 同時に投げるリクエストの上限
+
+
+class LLMClient:
+    """
+    ChatCompletion を非同期で呼び出すクライアント
+    イベントループをブロックせず、同時実行数とタイムアウトを制限する
+    """
+
+    def __init__(self, model=OPENAI_MODEL, timeout=OPENAI_TIMEOUT, max_concurrency=OPENAI_MAX_CONCURRENCY):
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def complete(self, messages, **kwargs):
+        """
+        メッセージ列を送信し、応答テキストを返す
+        タイムアウトした場合は asyncio.TimeoutError を送出する
+        """
+        async with self._semaphore:
+            response = await asyncio.wait_for(
+                openai.ChatCompletion.acreate(
+                    model=self.model,
+                    messages=messages,
+                    request_timeout=self.timeout,
+                    **kwargs
+                ),
+                timeout=self.timeout,
+            )
+        return response['choices'][0]['message']['content']
+
+    async def stream(self, messages, **kwargs):
+        """
+        応答を差分テキストとして順に返す非同期ジェネレータ
+        各チャンクの待ち時間にもタイムアウトを適用する
+        """
+        async with self._semaphore:
+            chunks = await asyncio.wait_for(
+                openai.ChatCompletion.acreate(
+                    model=self.model,
+                    messages=messages,
+                    request_timeout=self.timeout,
+                    stream=True,
+                    **kwargs
+                ),
+                timeout=self.timeout,
+            )
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                except StopAsyncIteration:
+                    break
+                delta = chunk['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    yield delta
@@ -1,12 +1,24 @@
-import json
 from fastapi import FastAPI, WebSocket
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 import openai
 import os
-import subprocess
+import sys
+import asyncio
 from dotenv import load_dotenv
 
+# backend 内のモジュールを import できるようにする（uvicorn backend.main:app で起動した場合）
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_client import LLMClient
+from ws_protocol import start_frame, delta_frame, end_frame, skill_frame
+from sessions import SessionManager
+from history_store import ConversationStore
+from context_window import ContextWindow, SUMMARY_TOKEN_BUDGET, count_message_tokens
+from skills import SkillRegistry
+from intents import IntentRouter, SERVER_INTENTS
+from response_cache import ResponseCache, context_fingerprint
+
 # 環境変数をロード
 load_dotenv()
 
@@ -33,23 +45,88 @@ if not OPENAI_API_KEY:
     raise ValueError("OpenAI APIキーが設定されていません。環境変数 'OPENAI_API_KEY' を確認してください。")
 openai.api_key = OPENAI_API_KEY
 
-# 会話履歴ファイル
-HISTORY_FILE = "conversation_history.json"
+# 非同期の OpenAI クライアント（同時実行数とタイムアウトを制限）
+llm_client = LLMClient()
 
-# 会話履歴をロードする関数
-def load_conversation_history():
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+SYSTEM_PROMPT = "あなたは親切なアシスタントです。"
 
-# 会話履歴を保存する関数
-def save_conversation_history(history):
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=4)
+# 旧形式の会話履歴ファイル（初回起動時に会話ログへ取り込む）
+HISTORY_FILE = "conversation_history.json"
 
-# 初期会話履歴をロード
-conversation_history = load_conversation_history()
+# 追記専用の会話ログ（書き込みはバックグラウンドでまとめて行う）
+history_store = ConversationStore()
+history_store.import_json(HISTORY_FILE)
+
+# 会話履歴に1件追加し、会話ログにも追記する
+def append_message(session, role, content):
+    session.history.append({"role": role, "content": content})
+    history_store.append(session.session_id, role, content)
+
+# 接続ごとのセッション（作成時に会話ログから直近の履歴を読み込む）
+sessions = SessionManager(loader=history_store.load)
+
+# セッションのコンテキスト（トークン予算と要約）を取得する
+def get_context(session):
+    if session.context is None:
+        session.context = ContextWindow(SYSTEM_PROMPT)
+    return session.context
+
+# 予算からあふれた古い会話を要約に畳み込む（応答の送信後にバックグラウンドで実行）
+async def fold_context(session):
+    context = get_context(session)
+    if context.folding or not context.needs_fold(session.history):
+        return
+    messages, upto = context.fold_request(session.history)
+    if messages is None:
+        return
+
+    context.folding = True
+    try:
+        summary = await llm_client.complete(messages, max_tokens=SUMMARY_TOKEN_BUDGET)
+        context.apply_summary(summary, upto)
+        print(f"会話を要約しました: {upto} 件目まで")
+    except (asyncio.TimeoutError, openai.error.OpenAIError) as e:
+        print(f"会話の要約に失敗しました: {e}")
+    finally:
+        context.folding = False
+
+# 実行中のバックグラウンドタスク（ガベージコレクションで消えないように保持する）
+background_tasks = set()
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+# よく聞かれる質問への応答キャッシュ
+response_cache = ResponseCache()
+
+# 応答キャッシュのキーに含めるコンテキスト
+# 流れに依存しない質問はモデルとシステムプロンプトだけ（セッションをまたいで共有する）、
+# 「それは何時から？」のような質問は会話の要約と直前の会話も含める（同じ流れの会話でしかヒットしない）
+def cache_context(session, prompt):
+    summary = session.context.summary if session.context is not None else ""
+    return context_fingerprint(prompt, (llm_client.model, SYSTEM_PROMPT), summary, session.history)
+
+# 音声コマンドの振り分け
+intent_router = IntentRouter(SERVER_INTENTS)
+
+# スキル（じゃんけん・音楽・天気）は import 済みのワーカープロセスで実行する
+skills = SkillRegistry()
+
+@app.on_event("startup")
+def start_skills():
+    skills.start()
+
+@app.on_event("shutdown")
+def close_history_store():
+    skills.shutdown()
+    response_cache.save()
+    history_store.close()  # 未書き込みのメッセージを書き出してから閉じる
+
+@app.get("/stats")
+async def stats():
+    return {"sessions": len(sessions), "response_cache": response_cache.stats()}
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -65,94 +142,113 @@ async def root():
     </html>
     """
 
+async def stream_response(websocket, messages):
+    """
+    AIの応答を start/delta/end フレームで逐次送信し、全文を返す
+    途中でエラーになった場合も end フレームを送ってから例外を送出する
+    """
+    chunks = []
+    await websocket.send_text(start_frame())
+    try:
+        async for delta in llm_client.stream(messages):
+            chunks.append(delta)
+            await websocket.send_text(delta_frame(delta))
+    finally:
+        await websocket.send_text(end_frame("".join(chunks)))
+    return "".join(chunks)
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    global conversation_history
     await websocket.accept()
+    # ?stream=1 で接続したクライアントには応答をストリーミングで送る
+    streaming = websocket.query_params.get("stream") == "1"
+    # ?session_id=... で同じキオスクの会話を引き継ぐ（指定がなければ接続ごとに新規）
+    # 保存済みの履歴の読み込みはイベントループの外で行う（他の接続を待たせない）
+    session = await sessions.acquire_async(websocket.query_params.get("session_id"))
     try:
         while True:
             data = await websocket.receive_text()
             print(f"ユーザーからの入力: {data}")
 
-            if data.lower() == "終了":
-                save_conversation_history(conversation_history)  # 終了時に会話履歴を保存
+            intent = intent_router.route(data)
+
+            if intent == "quit":
                 await websocket.close()
                 break
 
             # 特別なキーワード処理
-            if data.lower() in ["おやすみ", "おはよう"]:
+            if intent in ["sleep", "wake"]:
                 await websocket.send_text(data)  # フロントエンドにそのまま通知
                 continue
 
-            # "じゃんけんしよ" というキーワードが入力された場合、Python スクリプトを実行
-            if "じゃんけんしよ" in data:
-                script_name = "./backend/RSPGame.py"  # 実行したい Python スクリプトの名前
-                script_path = os.path.join(os.getcwd(), script_name)
+            # スキルを呼び出すキーワードが入力された場合、ワーカーでスキルを実行
+            skill_name = intent if intent in skills.skills else None
 
+            if skill_name:
                 try:
-                    result = subprocess.run(['python', script_path], capture_output=True, text=True)
-                    if result.returncode == 0:
-                        await websocket.send_text(f"コード実行結果:\n{result.stdout}")
+                    if streaming:
+                        await websocket.send_text(skill_frame(skill_name, {"status": "started"}))
+                    output, result = await skills.run(skill_name)
+                    if streaming and isinstance(result, dict):
+                        # 構造化された結果を返すスキル（じゃんけんなど）は JSON のまま送る
+                        await websocket.send_text(skill_frame(skill_name, result))
                     else:
-                        await websocket.send_text(f"コード実行中にエラーが発生しました:\n{result.stderr}")
+                        await websocket.send_text(f"コード実行結果:\n{output}")
+                except asyncio.TimeoutError:
+                    await websocket.send_text("スキルの実行がタイムアウトしました。")
                 except Exception as e:
-                    await websocket.send_text(f"スクリプト実行エラー: {e}")
-                continue  # "実行" キーワードが含まれている場合は、OpenAI APIへのリクエストをスキップ
-
-            # "音楽流して" というキーワードが入力された場合、Python スクリプトを実行
-            if "音楽流して" in data:
-                script_name = "./backend/spotify.py"  # 実行したい Python スクリプトの名前
-                script_path = os.path.join(os.getcwd(), script_name)
-
-                try:
-                    result = subprocess.run(['python', script_path], capture_output=True, text=True)
-                    if result.returncode == 0:
-                        await websocket.send_text(f"コード実行結果:\n{result.stdout}")
-                    else:
-                        await websocket.send_text(f"コード実行中にエラーが発生しました:\n{result.stderr}")
-                except Exception as e:
-                    await websocket.send_text(f"スクリプト実行エラー: {e}")
-                continue  # "実行" キーワードが含まれている場合は、OpenAI APIへのリクエストをスキップ
-
-            # "天気" というキーワードが入力された場合、Python スクリプトを実行
-            elif "天気" in data:
-                script_name = "./backend/Weather.py"  # 実行したい Python スクリプトの名前
-                script_path = os.path.join(os.getcwd(), script_name)
-
-                try:
-                    result = subprocess.run(['python', script_path], capture_output=True, text=True)
-                    if result.returncode == 0:
-                        await websocket.send_text(f"コード実行結果:\n{result.stdout}")
-                    else:
-                        await websocket.send_text(f"コード実行中にエラーが発生しました:\n{result.stderr}")
-                except Exception as e:
-                    await websocket.send_text(f"スクリプト実行エラー: {e}")
-                continue  # "実行" キーワードが含まれている場合は、OpenAI APIへのリクエストをスキップ
+                    await websocket.send_text(f"コード実行中にエラーが発生しました:\n{e}")
+                continue  # スキルを実行した場合は、OpenAI APIへのリクエストをスキップ
+
+            # キャッシュ済みの応答があれば OpenAI API を呼ばずに返す
+            context_key = cache_context(session, data)
+            cached_response = response_cache.get(data, context_key)
+            if cached_response is not None:
+                print(f"キャッシュからの応答: {cached_response}")
+                append_message(session, "user", data)
+                append_message(session, "assistant", cached_response)
+                if streaming:
+                    await websocket.send_text(start_frame())
+                    await websocket.send_text(delta_frame(cached_response))
+                    await websocket.send_text(end_frame(cached_response))
+                else:
+                    await websocket.send_text(cached_response)
+                continue
 
             # OpenAI APIへのリクエスト
             try:
                 # 履歴に新しいメッセージを追加
-                conversation_history.append({"role": "user", "content": data})
-
-                # APIリクエスト
-                response = openai.ChatCompletion.create(
-                    model="",
-                    messages=[{"role": "system", "content": "あなたは親切なアシスタントです。"}] + conversation_history
-                )
-                ai_response = response['choices'][0]['message']['content']
+                append_message(session, "user", data)
+
+                # トークン予算内に収めたプロンプトを組み立てる
+                messages = get_context(session).build(session.history)
+                print(f"プロンプトのトークン数: {count_message_tokens(messages)}")
+
+                # APIリクエスト（イベントループをブロックしない）
+                if streaming:
+                    ai_response = await stream_response(websocket, messages)
+                else:
+                    ai_response = await llm_client.complete(messages)
                 print(f"OpenAIからの応答: {ai_response}")
 
-                # 履歴にAIの応答を追加
-                conversation_history.append({"role": "assistant", "content": ai_response})
+                # 履歴にAIの応答を追加（会話ログへの書き込みはバックグラウンドで行われる）
+                append_message(session, "assistant", ai_response)
+                response_cache.put(data, ai_response, context_key)
 
-                # ユーザーに応答を送信
-                await websocket.send_text(ai_response)
+                # ユーザーに応答を送信（ストリーミング時は送信済み）
+                if not streaming:
+                    await websocket.send_text(ai_response)
 
-                # 履歴を即座に保存
-                save_conversation_history(conversation_history)
+                # 予算を超えた古い会話を要約に畳み込む
+                run_in_background(fold_context(session))
 
+            except asyncio.TimeoutError:
+                print("OpenAI APIがタイムアウトしました")
+                await websocket.send_text("AI応答の生成がタイムアウトしました。")
             except openai.error.OpenAIError as e:
                 print(f"OpenAI APIエラー: {e}")
                 await websocket.send_text("AI応答の生成中にエラーが発生しました。")
     except Exception as e:
         print(f"WebSocket エラー: {e}")
+    finally:
+        sessions.release(session)
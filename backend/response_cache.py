@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from intents import normalize
+
+# 応答キャッシュの設定（環境変数で上書き可能）
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # 有効期限（秒）
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))  # 保持する件数の上限
+RESPONSE_CACHE_FILE = os.getenv("RESPONSE_CACHE_FILE", "")  # 指定するとディスクに保存して再起動後も使う
+# 会話の流れに依存する質問（「それは何時から？」など）のキーに含める直前の会話のメッセージ数
+# （別のキオスクの会話から作った応答にヒットしないようにする。0 にすると質問だけで引く）
+# 流れに依存しない質問（「トイレはどこ？」など）は、会話の途中でも質問だけで引く
+RESPONSE_CACHE_CONTEXT_TURNS = int(os.getenv("RESPONSE_CACHE_CONTEXT_TURNS", "6"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))  # 0 より大きいと類似した質問にも応答を使い回す
+
+RESPONSE_CACHE_MIN_LENGTH = 5  # これより短い質問（「はい」「本当？」など）は会話の流れに依存するとみなす
+
+# 前の会話を指す言葉（正規化済み）。これを含む質問は会話の流れに依存するとみなす
+CONTEXT_WORDS = [
+    "それ", "これ", "あれ", "その", "この", "あの", "そこ", "ここ", "あそこ", "そっち", "こっち",
+    "さっき", "先ほど", "前の", "続き", "他に", "ほかに", "もっと", "詳しく", "くわしく", "もう一度", "もう1回",
+]
+
+
+def is_standalone(prompt):
+    """
+    会話の流れに依存しない質問か（短い返事や、前の会話を指す言葉を含む質問は依存するとみなす）
+    """
+    prompt = normalize(prompt)
+    return len(prompt) >= RESPONSE_CACHE_MIN_LENGTH and not any(word in prompt for word in CONTEXT_WORDS)
+
+
+def fingerprint(*parts):
+    """
+    コンテキスト（モデル、システムプロンプト、要約など）を表すハッシュ
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def context_fingerprint(prompt, base, summary="", recent=(), turns=RESPONSE_CACHE_CONTEXT_TURNS):
+    """
+    質問 prompt のキャッシュのキーに使うコンテキスト
+    base（モデル、システムプロンプトなど）は常に含め、流れに依存する質問だけ会話の要約と直前の会話も含める
+    """
+    if is_standalone(prompt):
+        return fingerprint(*base)
+    recent = list(recent)[-turns:] if turns else []
+    return fingerprint(*base, summary, *(f"{message['role']}:{message['content']}" for message in recent))
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def similarity(a, b):
+    """
+    文字バイグラムの Jaccard 係数（0〜1）
+    """
+    a, b = _bigrams(a), _bigrams(b)
+    return len(a & b) / len(a | b)
+
+
+class ResponseCache:
+    """
+    正規化した質問 + コンテキストのハッシュをキーにした応答キャッシュ（TTL + LRU）
+    similarity_threshold に 0 より大きい値を指定すると、同じコンテキストで似た質問にもヒットする
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_size=RESPONSE_CACHE_SIZE, path=RESPONSE_CACHE_FILE,
+                 similarity_threshold=RESPONSE_CACHE_SIMILARITY):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # (context, prompt) -> (応答, 保存時刻)
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        if self.path:
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, prompt, context=""):
+        """
+        キャッシュ済みの応答を返す（なければ None）
+        """
+        key = (context, normalize(prompt))
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        if self.similarity_threshold > 0:
+            entry = self._lookup_similar(key)
+            if entry is not None:
+                self.near_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, prompt, response, context=""):
+        key = (context, normalize(prompt))
+        self._entries[key] = (response, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+        }
+
+    def _expired(self, stored_at, now=None):
+        return (now or time.time()) - stored_at > self.ttl
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response, stored_at = entry
+        if self._expired(stored_at):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _lookup_similar(self, key):
+        context, prompt = key
+        now = time.time()
+        best_key, best_score = None, self.similarity_threshold
+        for (entry_context, entry_prompt), (_, stored_at) in self._entries.items():
+            if entry_context != context or self._expired(stored_at, now):
+                continue
+            score = similarity(prompt, entry_prompt)
+            if score >= best_score:
+                best_key, best_score = (entry_context, entry_prompt), score
+        return self._lookup(best_key) if best_key else None
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"応答キャッシュの読み込みに失敗しました: {e}")
+            return
+        now = time.time()
+        for context, prompt, response, stored_at in entries[-self.max_size:]:
+            if not self._expired(stored_at, now):
+                self._entries[(context, prompt)] = (response, stored_at)
+
+    def save(self):
+        """
+        ディスクに保存する（path を指定した場合のみ）
+        """
+        if not self.path:
+            return
+        entries = [[context, prompt, response, stored_at]
+                   for (context, prompt), (response, stored_at) in self._entries.items()]
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
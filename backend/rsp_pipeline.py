@@ -0,0 +1,335 @@
+"""
+じゃんけん用カメラ処理のパイプライン（取り込み / 推論 / 描画 を別々に動かす）
+
+- 取り込みスレッド: カメラ（または動画ファイル）を読み続け、最新の1フレームだけを残す
+- 推論スレッド: 最新のフレームで手を検出してジェスチャーを判定する（間に合わないフレームは捨てる）
+- 描画（メインスレッド）: 最新のフレームに最新の検出結果を重ねて表示する
+
+段ごとの処理時間と FPS を数えるので、動画ファイルを入力にすれば画面なしでも計測できる。
+
+実行例:
+    python backend/rsp_pipeline.py --source hand.mp4 --headless
+    python backend/rsp_pipeline.py --source 0
+    python backend/rsp_pipeline.py --source hand.mp4 --headless --mode roi --max-hands 1 --model-complexity 0
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque, namedtuple
+import cv2
+import mediapipe as mp
+from gesture import recognize_hand_gesture
+from hand_tracker import RSP_INFERENCE_MODE, RSP_MAX_NUM_HANDS, RSP_MODEL_COMPLEXITY, HandTracker
+
+# カメラ番号、または動画ファイルのパス
+RSP_CAMERA_SOURCE = os.getenv("RSP_CAMERA_SOURCE", "0")
+WINDOW_NAME = "Rock Paper Scissors"
+
+# 推論スレッドの結果（landmarks は MediaPipe の multi_hand_landmarks、gestures は手ごとの判定）
+Detection = namedtuple("Detection", ["seq", "frame", "captured_at", "landmarks", "gestures"])
+
+
+def parse_source(source):
+    """
+    "0" のような数字はカメラ番号、それ以外は動画ファイルのパスとして扱う
+    """
+    return int(source) if str(source).isdigit() else source
+
+
+class LatestSlot:
+    """
+    最新の値を1つだけ持つ入れ物。書き込みで古い値は上書きされる
+    読み手は番号で、前回から何個読み飛ばしたか（捨てたか）が分かる
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._value = None
+        self.closed = False
+
+    def put(self, value):
+        with self._cond:
+            self._seq += 1
+            self._value = value
+            self._cond.notify_all()
+
+    def get(self, after=0, timeout=None):
+        """
+        番号が after より新しい値を待って (番号, 値) を返す
+        タイムアウトか close() 済みなら (after, None)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after or self.closed, timeout)
+            if self._seq > after:
+                return self._seq, self._value
+            return after, None
+
+    def peek(self):
+        with self._cond:
+            return self._seq, self._value
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    """
+    段ごとの処理時間と FPS（直近 window 件から計算）
+    """
+
+    def __init__(self, name, window=300):
+        self.name = name
+        self.count = 0
+        self.dropped = 0
+        self._latencies = deque(maxlen=window)
+        self._stamps = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self.count += 1
+            self._latencies.append(latency)
+            self._stamps.append(time.perf_counter())
+
+    def fps(self):
+        with self._lock:
+            if len(self._stamps) < 2:
+                return 0.0
+            return (len(self._stamps) - 1) / (self._stamps[-1] - self._stamps[0])
+
+    def percentile(self, p):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+    def summary(self):
+        return {
+            "stage": self.name,
+            "count": self.count,
+            "dropped": self.dropped,
+            "fps": round(self.fps(), 1),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+        }
+
+
+class RSPPipeline:
+    """
+    取り込み・推論・描画を分けたカメラ処理
+    run() に渡した関数が、描画のたびに (フレーム, 最新の Detection) で呼ばれる
+    """
+
+    def __init__(self, source=RSP_CAMERA_SOURCE, tracker=None, display=True, realtime=True, capture=None):
+        self.source = parse_source(source)
+        self.tracker = tracker  # HandTracker（None なら start() で作り、stop() で閉じる）
+        self._owns_tracker = tracker is None
+        self._cap = capture  # 開いたままの VideoCapture を渡せば、stop() でも閉じずに使い回せる
+        self._owns_capture = capture is None
+        self._started = False
+        self.display = display
+        self.realtime = realtime  # 動画ファイルを元の FPS で読む（False なら読めるだけ速く読む）
+        self.frames = LatestSlot()
+        self.detections = LatestSlot()
+        self.stats = {name: StageStats(name) for name in ("capture", "inference", "render")}
+        self.latency = StageStats("end_to_end")  # 取り込みから判定結果が出るまで
+        self.skip_inference = False  # True の間は推論せずにフレームを読み捨てる（手が確定したあとなど）
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._started = True
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.source)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"映像を開けませんでした: {self.source}")
+        if self.tracker is None:
+            self.tracker = HandTracker()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._inference_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.frames.close()
+        self.detections.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        if self._owns_capture and self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        if self._owns_tracker and self.tracker is not None:
+            self.tracker.close()
+        if self.display:
+            cv2.destroyAllWindows()
+
+    def _capture_loop(self):
+        # 動画ファイルは元の FPS に合わせて読み、カメラと同じようにフレームが届くようにする
+        interval = 0.0
+        if self.realtime and isinstance(self.source, str):
+            fps = self._cap.get(cv2.CAP_PROP_FPS)
+            interval = 1.0 / fps if fps and fps > 0 else 0.0
+        next_at = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ret, frame = self._cap.read()
+                if not ret:
+                    break
+                captured_at = time.perf_counter()
+                self.stats["capture"].record(captured_at - start)
+                self.frames.put((frame, captured_at))
+                if interval:
+                    next_at += interval
+                    time.sleep(max(0.0, next_at - time.perf_counter()))
+        finally:
+            self.frames.close()
+
+    def _inference_loop(self):
+        last_seq = 0
+        stats = self.stats["inference"]
+        try:
+            while not self._stop.is_set():
+                seq, item = self.frames.get(after=last_seq, timeout=0.5)
+                if item is None:
+                    if self.frames.closed:
+                        break
+                    continue
+                # 推論中に届いて上書きされたフレームは捨てたものとして数える
+                stats.dropped += seq - last_seq - 1
+                last_seq = seq
+                if self.skip_inference:
+                    self.skipped += 1
+                    continue
+                frame, captured_at = item
+
+                start = time.perf_counter()
+                landmarks = self.tracker.process(frame)
+                gestures = [recognize_hand_gesture(hand) for hand in landmarks or []]
+                finished_at = time.perf_counter()
+                stats.record(finished_at - start)
+                self.latency.record(finished_at - captured_at)
+                self.detections.put(Detection(seq, frame, captured_at, landmarks, gestures))
+        finally:
+            self.detections.close()
+
+    def run(self, on_frame=None):
+        """
+        描画ループ（メインスレッドで呼ぶ）。on_frame(frame, detection) が False を返すか、
+        入力が終わるか、'q' が押されたら終わる。最後に描画したフレームを返す
+        """
+        if not self._started:
+            self.start()
+        frame = None
+        try:
+            if self.display:
+                frame = self._display_loop(on_frame)
+            else:
+                frame = self._headless_loop(on_frame)
+        finally:
+            self.stop()
+        return frame
+
+    def _display_loop(self, on_frame):
+        # 推論を待たずに最新のフレームを表示し、検出結果は最後に出たものを重ねる
+        last_seq = 0
+        frame = None
+        stats = self.stats["render"]
+        while not self._stop.is_set():
+            seq, item = self.frames.get(after=last_seq, timeout=0.5)
+            if item is None:
+                if self.frames.closed:
+                    break
+                continue
+            stats.dropped += seq - last_seq - 1
+            last_seq = seq
+            frame = item[0].copy()
+
+            start = time.perf_counter()
+            _, detection = self.detections.peek()
+            if detection is not None and not self.skip_inference:
+                for hand_landmarks in detection.landmarks:
+                    mp.solutions.drawing_utils.draw_landmarks(
+                        frame, hand_landmarks, mp.solutions.hands.HAND_CONNECTIONS
+                    )
+            keep_going = on_frame(frame, detection) if on_frame else True
+            cv2.imshow(WINDOW_NAME, frame)
+            stats.record(time.perf_counter() - start)
+
+            # 'q'を押すと手動で終了
+            if keep_going is False or cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+        return frame
+
+    def _headless_loop(self, on_frame):
+        # 画面がないときは、検出結果が出るたびに on_frame を呼ぶ
+        # （推論を止めている間も、時間を進めるために一定間隔で最後の結果のまま呼ぶ）
+        last_seq = 0
+        frame = None
+        detection = None
+        stats = self.stats["render"]
+        while not self._stop.is_set():
+            seq, latest = self.detections.get(after=last_seq, timeout=0.05)
+            if latest is not None:
+                last_seq = seq
+                detection = latest
+                frame = latest.frame
+            elif self.detections.closed:
+                break
+            elif frame is None:
+                continue
+            start = time.perf_counter()
+            keep_going = on_frame(frame, detection) if on_frame else True
+            stats.record(time.perf_counter() - start)
+            if keep_going is False:
+                break
+        return frame
+
+    def summary(self):
+        return [stats.summary() for stats in self.stats.values()] + [self.latency.summary()]
+
+    def report(self):
+        lines = [f"{'段':<12}{'件数':>8}{'破棄':>8}{'FPS':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}"]
+        for row in self.summary():
+            lines.append(
+                f"{row['stage']:<12}{row['count']:>8}{row['dropped']:>8}{row['fps']:>8}"
+                f"{row['p50_ms']:>10}{row['p99_ms']:>10}"
+            )
+        if self.tracker is not None:
+            counts = self.tracker.counts
+            lines.append(f"推論モード {self.tracker.mode}: 全体検出 {counts['detect']} 回, "
+                         f"ROI 追跡 {counts['track']} 回, 見失い {counts['lost']} 回")
+        lines.append(f"推論を省略したフレーム: {self.skipped}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=RSP_CAMERA_SOURCE, help="カメラ番号または動画ファイル")
+    parser.add_argument("--headless", action="store_true", help="画面に表示しない")
+    parser.add_argument("--fast", action="store_true", help="動画ファイルを元の FPS に合わせず読めるだけ速く読む")
+    parser.add_argument("--mode", choices=["full", "roi"], default=RSP_INFERENCE_MODE, help="推論モード")
+    parser.add_argument("--max-hands", type=int, default=RSP_MAX_NUM_HANDS)
+    parser.add_argument("--model-complexity", type=int, choices=[0, 1], default=RSP_MODEL_COMPLEXITY)
+    args = parser.parse_args()
+
+    tracker = HandTracker(args.mode, max_num_hands=args.max_hands, model_complexity=args.model_complexity)
+    pipeline = RSPPipeline(args.source, tracker=tracker, display=not args.headless, realtime=not args.fast)
+    started = time.perf_counter()
+    pipeline.run()
+    print(f"経過時間: {time.perf_counter() - started:.1f} 秒")
+    print(pipeline.report())
+    tracker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+じゃんけんの常駐サービス
+
+手のモデルとカメラを一度だけ開き、同じプロセスの中で何度でもゲームを行う。
+スキルのワーカープロセス（skills.py）に常駐させ、結果は標準出力ではなく
+dict（JSON にできる形）で返す。
+"""
+import os
+import random
+import threading
+import time
+import cv2
+from hand_tracker import HandTracker
+from rsp_pipeline import RSP_CAMERA_SOURCE, WINDOW_NAME, RSPPipeline, parse_source
+from rsp_state import COUNTDOWN, LOCK_IN, MOVE_NAMES, MOVES, RESULT, RSPStateMachine, judge
+
+RSP_DISPLAY = os.getenv("RSP_DISPLAY", "1") != "0"  # 0 にするとカメラ映像のウィンドウを出さない
+RSP_RESULT_DISPLAY_MS = int(os.getenv("RSP_RESULT_DISPLAY_MS", "3000"))  # 勝敗が決まった画面を表示しておく時間
+
+
+class RSPService:
+    """
+    カメラと HandTracker を開いたまま保持し、play() のたびに1回じゃんけんを行う
+    """
+
+    def __init__(self, source=RSP_CAMERA_SOURCE, display=RSP_DISPLAY, tracker=None):
+        self.source = parse_source(source)
+        self.display = display
+        self.tracker = tracker
+        self.capture = None
+        self.games = 0
+        self._lock = threading.Lock()  # カメラは1つなので、ゲームは同時に1つだけ
+
+    def open(self):
+        """
+        モデルとカメラを開く（開いていれば何もしない）。新しく開いたら True
+        """
+        cold = False
+        if self.tracker is None:
+            self.tracker = HandTracker()
+            cold = True
+        if self.capture is None or not self.capture.isOpened():
+            self.capture = cv2.VideoCapture(self.source)
+            if not self.capture.isOpened():
+                self.capture = None
+                raise RuntimeError(f"カメラを開けませんでした: {self.source}")
+            cold = True
+        elif isinstance(self.source, str):
+            # 動画ファイルは毎回先頭から読む
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return cold
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        if self.tracker is not None:
+            self.tracker.close()
+            self.tracker = None
+
+    def play(self):
+        """
+        じゃんけんを1回行い、結果を dict で返す
+        start_ms は play() を呼んでから最初の判定が出るまで（カメラとモデルを開く時間を含む）
+        """
+        with self._lock:
+            started = time.perf_counter()
+            cold = self.open()
+            choices = {}
+
+            def on_result(move):
+                ai_choice = random.choice(MOVES)
+                print(f"あなたの選択: {MOVE_NAMES[move]}")
+                print(f"AIの選択: {MOVE_NAMES[ai_choice]}")
+                choices["ai"] = ai_choice
+                return judge(move, ai_choice)
+
+            game = RSPStateMachine(on_result=on_result)
+            pipeline = RSPPipeline(self.source, tracker=self.tracker, display=self.display, capture=self.capture)
+            first_detection = []
+            frame = pipeline.run(self._frame_handler(game, pipeline, started, first_detection))
+            self.games += 1
+            print(pipeline.report())
+
+            if self.display and game.winner not in (None, "draw") and frame is not None:
+                # 結果の画面を少し表示してから閉じる
+                cv2.imshow(WINDOW_NAME, frame)
+                cv2.waitKey(RSP_RESULT_DISPLAY_MS)
+                cv2.destroyAllWindows()
+
+            return {
+                "status": "finished" if game.state == RESULT else "no_result",
+                "player": game.move,
+                "ai": choices.get("ai"),
+                "winner": game.winner,
+                "message": game.message,
+                "restarts": game.restarts,
+                "cold": cold,
+                "start_ms": round((first_detection[0] - started) * 1000, 1) if first_detection else None,
+                "game_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+
+    @staticmethod
+    def _frame_handler(game, pipeline, started, first_detection):
+        last_seq = 0
+
+        def on_frame(frame, detection):
+            nonlocal last_seq
+            previous_state, previous_candidate = game.state, game.candidate
+
+            # 新しい検出結果が出たときだけ票を入れる（最初の手を使う）
+            if detection is not None and detection.seq != last_seq:
+                if not first_detection:
+                    first_detection.append(time.perf_counter())
+                last_seq = detection.seq
+                game.update(detection.gestures[0] if detection.gestures else None)
+            else:
+                game.update(observed=False)
+
+            if game.candidate != previous_candidate and game.candidate is not None:
+                print(f"認識されたジェスチャー: {MOVE_NAMES[game.candidate]}")
+            if game.state == LOCK_IN and previous_state != LOCK_IN:
+                print(f"あなたの手が決まりました: {MOVE_NAMES[game.move]}")
+            # 手が確定したら推論を止める
+            pipeline.skip_inference = not game.needs_inference
+
+            if game.state == COUNTDOWN:
+                countdown = int(game.remaining()) + 1
+                cv2.putText(frame, f"カウントダウン: {countdown}", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+            elif game.state == RESULT:
+                # カウントダウン終了、じゃんけん結果を表示
+                print(game.message)
+                cv2.putText(frame, f"結果: {game.message}", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                return False  # 勝敗が決まったら終了
+            return True
+
+        return on_frame
+
+
+_default_service = None
+
+
+def get_service():
+    global _default_service
+    if _default_service is None:
+        _default_service = RSPService()
+    return _default_service
+
+
+def warm_up():
+    """
+    スキルのワーカー起動時に呼ばれ、モデルとカメラを先に開いておく
+    """
+    try:
+        get_service().open()
+    except RuntimeError as e:
+        print(f"じゃんけんの準備に失敗しました: {e}")
+
+
+def play_game():
+    """
+    スキルの入口。常駐しているサービスで1回じゃんけんを行う
+    """
+    return get_service().play()
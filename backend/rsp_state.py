@@ -0,0 +1,143 @@
+"""
+じゃんけんの進行（待機 → カウントダウン → 確定 → 結果）の状態機械
+
+1フレームの誤認識でカウントダウンがやり直しにならないように、直近のフレームの判定を
+リングバッファに貯めて多数決をとる。手が確定したあとは推論しなくてよい。
+"""
+import os
+import time
+from collections import Counter, deque
+
+# 判定のなまし方の設定（環境変数で上書き可能）
+RSP_VOTE_WINDOW = int(os.getenv("RSP_VOTE_WINDOW", "9"))  # 多数決に使う直近のフレーム数
+RSP_VOTE_MIN_SHARE = float(os.getenv("RSP_VOTE_MIN_SHARE", "0.6"))  # この割合以上を占めた手を「安定した手」とみなす
+RSP_COUNTDOWN_SECONDS = float(os.getenv("RSP_COUNTDOWN_SECONDS", "5"))
+RSP_LOCK_IN_SECONDS = float(os.getenv("RSP_LOCK_IN_SECONDS", "1"))  # 手が確定してから結果を出すまで
+
+# じゃんけんの手と、その呼び方
+MOVES = ["rock", "scissors", "paper"]
+MOVE_NAMES = {
+    "rock": "グー",
+    "scissors": "チョキ",
+    "paper": "パー"
+}
+
+IDLE = "idle"
+COUNTDOWN = "countdown"
+LOCK_IN = "lock_in"
+RESULT = "result"
+
+
+def judge(player_choice, ai_choice):
+    """
+    勝敗を判定して (勝者, メッセージ) を返す
+    """
+    if player_choice == ai_choice:
+        return "draw", "引き分け"
+    elif (player_choice == "rock" and ai_choice == "scissors") or \
+         (player_choice == "scissors" and ai_choice == "paper") or \
+         (player_choice == "paper" and ai_choice == "rock"):
+        return "player", "あなたの勝ち！"
+    else:
+        return "ai", "AIの勝ち！"
+
+
+class GestureVote:
+    """
+    直近 window フレームの判定（手が映らなければ None）のリングバッファ
+    """
+
+    def __init__(self, window=RSP_VOTE_WINDOW):
+        self.window = window
+        self._votes = deque(maxlen=window)
+
+    def add(self, gesture):
+        self._votes.append(gesture)
+
+    def clear(self):
+        self._votes.clear()
+
+    def leader(self):
+        """
+        最も多い手と、その割合（分母は window。貯まりきるまでは割合が低めに出る）
+        """
+        counts = Counter(vote for vote in self._votes if vote is not None)
+        if not counts:
+            return None, 0.0
+        gesture, count = counts.most_common(1)[0]
+        return gesture, count / self.window
+
+    def stable(self, min_share=RSP_VOTE_MIN_SHARE):
+        gesture, share = self.leader()
+        return gesture if share >= min_share else None
+
+
+class RSPStateMachine:
+    """
+    フレームごとの判定を update() に渡すと、状態が進む
+    on_result(move) は確定した手を受け取り、(勝者, メッセージ) を返す関数
+    """
+
+    def __init__(self, on_result, countdown=RSP_COUNTDOWN_SECONDS, lock_in=RSP_LOCK_IN_SECONDS,
+                 window=RSP_VOTE_WINDOW, min_share=RSP_VOTE_MIN_SHARE, clock=time.time):
+        self.on_result = on_result
+        self.countdown = countdown
+        self.lock_in = lock_in
+        self.min_share = min_share
+        self.clock = clock
+        self.votes = GestureVote(window)
+        self.state = IDLE
+        self.candidate = None  # カウントダウン中の手
+        self.move = None  # 確定した手
+        self.winner = None
+        self.message = None
+        self.restarts = 0  # カウントダウンをやり直した回数
+        self._since = self.clock()
+
+    @property
+    def needs_inference(self):
+        # 手が確定したら、それ以降のフレームは判定しなくてよい
+        return self.state in (IDLE, COUNTDOWN)
+
+    def remaining(self, now=None):
+        """
+        カウントダウンの残り秒数
+        """
+        if self.state != COUNTDOWN:
+            return 0.0
+        now = self.clock() if now is None else now
+        return max(0.0, self.countdown - (now - self._since))
+
+    def _enter(self, state, now):
+        self.state = state
+        self._since = now
+
+    def update(self, gesture=None, observed=True, now=None):
+        """
+        1フレーム分進める。observed が False のとき（推論していないフレーム）は時間だけ進める
+        """
+        now = self.clock() if now is None else now
+        if observed and self.needs_inference:
+            self.votes.add(gesture)
+
+        if self.state == IDLE:
+            stable = self.votes.stable(self.min_share)
+            if stable is not None:
+                self.candidate = stable
+                self._enter(COUNTDOWN, now)
+        elif self.state == COUNTDOWN:
+            stable = self.votes.stable(self.min_share)
+            if stable is not None and stable != self.candidate:
+                # 手をはっきり変えたときだけ、カウントダウンをやり直す
+                self.candidate = stable
+                self.restarts += 1
+                self._enter(COUNTDOWN, now)
+            elif now - self._since >= self.countdown:
+                # 最後の窓の多数決で手を決める（票がなければカウントダウン中の手）
+                self.move = self.votes.leader()[0] or self.candidate
+                self._enter(LOCK_IN, now)
+        elif self.state == LOCK_IN:
+            if now - self._since >= self.lock_in:
+                self.winner, self.message = self.on_result(self.move)
+                self._enter(RESULT, now)
+        return self.state
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+# セッションの設定（環境変数で上書き可能）
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "1800"))  # 放置されたセッションを破棄するまでの秒数
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "100"))  # メモリ上に保持するセッション数の上限（接続中のセッションは数えても破棄しない）
+
+
+class Session:
+    """
+    接続（キオスク）ごとの会話状態
+    """
+
+    def __init__(self, session_id, history=None):
+        self.session_id = session_id
+        self.history = history if history is not None else []
+        self.context = None  # プロンプトの組み立て状態（要約など）
+        self.connections = 0  # このセッションを使っている WebSocket の数
+        self.last_active = time.monotonic()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+
+class SessionManager:
+    """
+    セッションIDごとに会話履歴を管理する
+    一定時間使われていないセッションと、上限を超えた古いセッションを破棄する
+    """
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT, max_sessions=MAX_SESSIONS, loader=None, on_evict=None):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.loader = loader  # セッション作成時に保存済みの履歴を読み込む関数
+        self.on_evict = on_evict  # セッション破棄時に呼ばれる関数（履歴の保存など）
+        self._sessions = OrderedDict()  # 最近使われた順に並ぶ
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def acquire(self, session_id=None, history=None):
+        """
+        セッションを取得する（存在しなければ作成する）
+        session_id が指定されない場合は新しいIDを発行する
+        history に読み込み済みの履歴を渡せば、作成時に loader を呼ばない
+        """
+        self.evict_idle()
+        loadable = session_id is not None  # 新しく発行したIDには保存済みの履歴はない
+        session_id = session_id or uuid.uuid4().hex
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            if history is None and loadable and self.loader:
+                history = self.loader(session_id)
+            session = Session(session_id, history)
+            self._sessions[session_id] = session
+        else:
+            self._sessions.move_to_end(session_id)
+
+        # 接続数を先に数えて、今取得したセッションが上限の超過で破棄されないようにする
+        session.connections += 1
+        session.touch()
+        self._evict_overflow()
+        return session
+
+    async def acquire_async(self, session_id=None):
+        """
+        acquire() と同じだが、保存済みの履歴の読み込み（DBの読み取りなど）はイベントループの外で行う
+        読み込みの間も他の接続の処理を止めないため
+        """
+        history = None
+        if session_id is not None and session_id not in self._sessions and self.loader:
+            loop = asyncio.get_running_loop()
+            history = await loop.run_in_executor(None, self.loader, session_id)
+        # 読み込みの間に同じIDのセッションが作られていれば、そちらを使う（読み込んだ履歴は捨てる）
+        return self.acquire(session_id, history=history)
+
+    def release(self, session):
+        """
+        WebSocket 切断時に呼ぶ
+        """
+        session.connections = max(0, session.connections - 1)
+        session.touch()
+
+    def evict_idle(self, now=None):
+        """
+        接続がなく、一定時間使われていないセッションを破棄する
+        """
+        now = now if now is not None else time.monotonic()
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if session.connections == 0 and now - session.last_active > self.idle_timeout
+        ]
+        for session_id in expired:
+            self._evict(session_id)
+        return len(expired)
+
+    def _evict_overflow(self):
+        # 上限を超えた場合、接続のないセッションを古い順に破棄する
+        # 接続中のセッションは破棄しない（すべて接続中なら、その間は上限を超えたままにする）
+        idle = [sid for sid, session in self._sessions.items() if session.connections == 0]
+        for session_id in idle[:max(0, len(self._sessions) - self.max_sessions)]:
+            self._evict(session_id)
+
+    def _evict(self, session_id):
+        session = self._sessions.pop(session_id)
+        if self.on_evict:
+            self.on_evict(session)
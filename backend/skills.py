@@ -0,0 +1,156 @@
+import asyncio
+import contextlib
+import importlib
+import io
+import multiprocessing
+import os
+import queue
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# スキル実行の設定（環境変数で上書き可能）
+SKILL_TIMEOUT = float(os.getenv("SKILL_TIMEOUT", "300"))  # 1回の実行のタイムアウト（秒）
+
+
+class Skill:
+    """
+    音声コマンドから呼び出すスキル（backend 内のスクリプト）
+    module の entry 関数を専用のワーカープロセスで実行する
+    timeout は1回の実行のタイムアウト（秒）。None なら時間の制限なく待つ
+    """
+
+    def __init__(self, name, module, entry="main", timeout=SKILL_TIMEOUT):
+        self.name = name
+        self.module = module
+        self.entry = entry
+        self.timeout = timeout
+
+
+# 登録済みのスキル
+SKILLS = [
+    Skill("rsp", "rsp_service", entry="play_game"),  # 常駐サービスでカメラとモデルを開いたまま使う
+    Skill("spotify", "spotify", timeout=None),  # 「終了」と言うまで続く対話型のスキルなので時間で打ち切らない
+    Skill("weather", "Weather"),
+]
+
+
+def _warm_up(module_name, pids):
+    # 実行中のスキルが応答しないときに強制終了できるよう、ワーカーのプロセス ID を親に知らせる
+    pids.put(os.getpid())
+    # ワーカープロセスの起動時に重い import（cv2, mediapipe, spotipy など）を済ませておく
+    module = importlib.import_module(module_name)
+    # モジュールに warm_up() があれば、モデルやデバイスを開く準備もここで行う
+    warm_up = getattr(module, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+
+
+def _ping(module_name):
+    importlib.import_module(module_name)
+    return module_name
+
+
+def _invoke(module_name, entry):
+    """
+    ワーカープロセス内でスキルを実行し、(標準出力, 戻り値) を返す
+    """
+    module = importlib.import_module(module_name)
+    output = io.StringIO()
+    result = None
+    with contextlib.redirect_stdout(output):
+        try:
+            result = getattr(module, entry)()
+        except SystemExit:
+            pass  # スクリプト内の sys.exit() はスキルの終了として扱う
+    return output.getvalue(), result
+
+
+class SkillRegistry:
+    """
+    スキルごとに import 済みのワーカープロセスを1つ保持し、非同期に呼び出す
+    カメラやマイクを使うため、同じスキルは同時に1つだけ実行される
+    """
+
+    def __init__(self, skills=SKILLS):
+        self.skills = {skill.name: skill for skill in skills}
+        self._pools = {}
+        self._pids = {}  # スキル名 -> ワーカーがプロセス ID を知らせるキュー
+        self._worker_pids = {}  # スキル名 -> 知らせを受け取ったワーカーのプロセス ID
+        # uvicorn のスレッドを引き継がないよう spawn でワーカーを作る
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self):
+        for name in self.skills:
+            self._start_pool(name)
+
+    def shutdown(self):
+        for name in list(self._pools):
+            self._stop_pool(name)
+
+    def _start_pool(self, name):
+        skill = self.skills[name]
+        pids = self._context.Queue()
+        pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=self._context,
+            initializer=_warm_up,
+            initargs=(skill.module, pids),
+        )
+        pool.submit(_ping, skill.module)  # ワーカーを今のうちに起動しておく
+        self._pools[name] = pool
+        self._pids[name] = pids
+        self._worker_pids.pop(name, None)
+        return pool
+
+    def _worker_pid(self, name):
+        """
+        ワーカーのプロセス ID（まだ知らせが届いていなければ None）
+        イベントループから呼ばれるので、キューの読み取りで待たない
+        """
+        if name not in self._worker_pids:
+            try:
+                self._worker_pids[name] = self._pids[name].get_nowait()
+            except queue.Empty:
+                return None
+        return self._worker_pids[name]
+
+    def _stop_pool(self, name):
+        pool = self._pools.pop(name, None)
+        if pool is None:
+            return
+        # 実行中のスキルが応答しない場合もあるので、ワーカーを強制終了する
+        # （プロセス ID が届いていないのはワーカーがまだ起動中のときで、shutdown() の後に自分で終わる）
+        pid = self._worker_pid(name)
+        del self._pids[name]
+        self._worker_pids.pop(name, None)
+        if pid is not None:
+            with contextlib.suppress(OSError):
+                os.kill(pid, signal.SIGTERM)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _pool(self, name):
+        return self._pools.get(name) or self._start_pool(name)
+
+    async def ping(self, name):
+        """
+        スキルのワーカーまで往復するだけの呼び出し（計測用）
+        """
+        skill = self.skills[name]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(name), _ping, skill.module)
+
+    async def run(self, name):
+        """
+        スキルを実行して (標準出力, 戻り値) を返す
+        タイムアウトやワーカーの異常終了の場合は、ワーカーを作り直してから例外を送出する
+        """
+        skill = self.skills[name]
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool(name), _invoke, skill.module, skill.entry)
+        try:
+            return await asyncio.wait_for(future, timeout=skill.timeout)
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            self._stop_pool(name)
+            self._start_pool(name)
+            raise
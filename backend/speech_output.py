@@ -0,0 +1,113 @@
+import contextlib
+import io
+import queue
+import re
+import threading
+import pygame
+from tts_cache import synthesize
+
+# 文の区切り（ここまで届いたら先に読み上げを始める）
+SENTENCE_END = re.compile(r"[^。！？!?\n]*[。！？!?\n]+")
+
+_END = object()  # 応答の終わりを表す目印
+
+
+def split_sentences(text):
+    """
+    区切りまで揃った文のリストと、残りのテキストを返す
+    """
+    sentences = []
+    position = 0
+    for match in SENTENCE_END.finditer(text):
+        sentence = match.group(0).strip()
+        if sentence:
+            sentences.append(sentence)
+        position = match.end()
+    return sentences, text[position:]
+
+
+class StreamingSpeaker:
+    """
+    文単位で読み上げるスピーカー
+    合成スレッドが次の文を合成している間に、再生スレッドが前の文を再生する
+    """
+
+    def __init__(self, synthesize=synthesize, on_done=None, on_error=None, muted=None):
+        self.synthesize = synthesize
+        self.on_done = on_done  # 応答を最後まで読み上げたときに呼ばれる
+        self.on_error = on_error
+        self.muted = muted  # 再生中に入る context manager を返す関数（音声入力の muted など）
+        self._pending = ""  # まだ文になっていないテキスト
+        self._generation = 0  # interrupt() のたびに増え、古い文を捨てるのに使う
+        self._interrupted = threading.Event()
+        self._texts = queue.Queue()
+        self._sounds = queue.Queue(maxsize=2)  # 合成が再生より先に進みすぎないようにする
+
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        threading.Thread(target=self._synthesize_loop, daemon=True).start()
+        threading.Thread(target=self._play_loop, daemon=True).start()
+
+    def feed(self, text):
+        """
+        受信したテキストを追加し、文が揃ったら読み上げを予約する
+        """
+        sentences, self._pending = split_sentences(self._pending + text)
+        for sentence in sentences:
+            self._texts.put((self._generation, sentence))
+
+    def finish(self):
+        """
+        応答の終わり（残りのテキストも読み上げる）
+        """
+        rest, self._pending = self._pending.strip(), ""
+        if rest:
+            self._texts.put((self._generation, rest))
+        self._texts.put((self._generation, _END))
+
+    def speak(self, text):
+        self.feed(text)
+        self.finish()
+
+    def interrupt(self):
+        """
+        読み上げを中断し、予約済みの文を捨てる
+        """
+        self._generation += 1
+        self._pending = ""
+        self._interrupted.set()
+
+    def _synthesize_loop(self):
+        while True:
+            generation, text = self._texts.get()
+            if generation != self._generation:
+                continue
+            if text is _END:
+                self._sounds.put((generation, _END))
+                continue
+            try:
+                self._sounds.put((generation, self.synthesize(text)))
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+
+    def _play_loop(self):
+        while True:
+            generation, audio = self._sounds.get()
+            if generation != self._generation:
+                continue
+            if audio is _END:
+                if self.on_done:
+                    self.on_done()
+                continue
+            try:
+                sound = pygame.mixer.Sound(file=io.BytesIO(audio))
+                self._interrupted.clear()
+                with self.muted() if self.muted else contextlib.nullcontext():
+                    channel = sound.play()
+                    # 再生時間だけ待つ（interrupt() されたらすぐに止める）
+                    if self._interrupted.wait(sound.get_length()) and channel is not None:
+                        channel.stop()
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
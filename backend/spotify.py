@@ -1,20 +1,16 @@
-import openai
-import requests
+# 重いライブラリ（spotipy, speech_recognition, playsound, pyautogui, pygetwindow）は
+# 初めて使う関数の中で import する（import しただけではマイクやウィンドウ操作の準備をしない）
 import re
-import speech_recognition as sr
-from gtts import gTTS
-import os
 import webbrowser
 import time
-import tempfile
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 import sys
-from playsound import playsound  # playsoundライブラリをインポート
-import pyautogui  # pyautoguiをインポート
-import pyautogui
-import pygetwindow as gw
+from audio_input import ERROR_UNKNOWN, get_audio_input
+from intents import IntentRouter, PLAYBACK_INTENTS
+import tts_cache
+from spotify_client import SpotifyClient
+from spotify_command import default_device, follow_up_question, parse_command, pick_track
+from spotify_controller import PlaybackController
 
 # 環境変数をロード
 load_dotenv()
@@ -23,42 +19,80 @@ load_dotenv()
 window_title = "Spotify"  # 例: "メモ帳"
 target_window = None
 
+# 最後の発話を話し終えた時刻（発話から再生開始までの計測用）
+last_heard_at = None
 
-# Spotipyクライアントのセットアップ
-sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-    client_id=os.getenv('SPOTIFY_CLIENT_ID'),
-    client_secret=os.getenv('SPOTIFY_CLIENT_SECRET'),
-    redirect_uri=os.getenv('SPOTIFY_REDIRECT_URI'),
-    scope="user-read-playback-state user-modify-playback-state"
-))
 
-def speak_text(text):
-    """指定されたテキストを音声で出力"""
+# Spotipyクライアント（接続を使い回し、検索結果とデバイス一覧をキャッシュする）
+# 作成は最初に Spotify を使うときまで遅らせる
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = SpotifyClient()
+    return _client
+
+
+def __getattr__(name):
+    # 以前はモジュールの読み込み時に作っていた client / sp は、初めて参照されたときに作る
+    if name == "client":
+        return get_client()
+    if name == "sp":
+        return get_client().sp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up():
+    """
+    スキルのワーカー起動時に、重いライブラリの読み込みとクライアントの作成を済ませておく
+    """
+    import playsound, pyautogui, pygetwindow  # noqa: F401
+    get_client()
+
+def speak_text(text, keep_listening=False):
+    """
+    指定されたテキストを音声で出力
+    keep_listening=True なら読み上げ中も発話を聞き続ける（再生コントロールの確認の間に言われたコマンドを捨てない）
+    """
+    from playsound import playsound
     print(f"【音声出力】: {text}")
-    tts = gTTS(text=text, lang='ja')
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-        temp_file_path = temp_file.name
-    tts.save(temp_file_path)
-    playsound(temp_file_path)  # playsoundで音声を再生
-    os.remove(temp_file_path)
-
-def recognize_speech():
-    """音声入力を認識し、文字列として返す"""
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
+    # 同じ文言は合成済みの音声ファイルを使い回す
+    path = tts_cache.get_cache().path_for(text)
+    audio_input = get_audio_input()
+    # 自分の読み上げを発話として聞き取らない（keep_listening なら読み上げに似た発話だけを捨てる）
+    with audio_input.speaking(text) if keep_listening else audio_input.muted():
+        playsound(path)  # playsoundで音声を再生
+
+def recognize_speech(prompt=True):
+    """
+    音声入力を認識し、文字列として返す
+    マイクは開いたままの共有の音声入力を使うので、毎回の雑音の調整を待たない
+    prompt=True なら案内を読み上げ、その後に話された発話を待つ
+    prompt=False なら案内も認識結果も読み上げず、聞き取った発話を順に受け取る
+    （再生コントロール中に、続けて言われたコマンドを取りこぼさないため）
+    """
+    global last_heard_at
+    audio_input = get_audio_input()
+    if prompt:
         speak_text("音声をお話しください...")
-        recognizer.adjust_for_ambient_noise(source)
-        audio = recognizer.listen(source)
-        try:
-            text = recognizer.recognize_google(audio, language="ja-JP")
-            speak_text(f"認識された音声: {text}")
-            return text
-        except sr.UnknownValueError:
-            speak_text("音声が認識できませんでした。もう一度お話しください。")
-            return ""
-        except sr.RequestError:
-            speak_text("音声認識サービスに接続できません。")
-            return ""
+        utterance = audio_input.listen()
+    else:
+        utterance = audio_input.get()
+    if utterance.error == ERROR_UNKNOWN:
+        speak_text("音声が認識できませんでした。もう一度お話しください。")
+        return ""
+    if utterance.error:
+        speak_text("音声認識サービスに接続できません。")
+        return ""
+    text = utterance.text
+    last_heard_at = utterance.heard_at
+    if prompt:
+        speak_text(f"認識された音声: {text}")
+    else:
+        print(f"認識された音声: {text}")
+    return text
 
 def open_spotify_web_app():
     """Spotify Webアプリを開く"""
@@ -70,13 +104,17 @@ def open_spotify_web_app():
 
 def choose_device():
     """利用可能なデバイスを選択"""
-    devices = sp.devices()
-    if not devices['devices']:
+    client = get_client()
+    devices = client.devices()
+    if not devices:
+        # キャッシュが古いかもしれないので、一度だけ取り直す
+        devices = client.devices(fresh=True)
+    if not devices:
         speak_text("利用可能なデバイスが見つかりませんでした。")
         return None
 
     speak_text("利用可能なデバイスを取得しました。")
-    for idx, device in enumerate(devices['devices']):
+    for idx, device in enumerate(devices):
         speak_text(f"{idx + 1}番. {device['name']} ({device['type']})")
         print(f"{idx + 1}番. {device['name']} ({device['type']})")
 
@@ -90,8 +128,8 @@ def choose_device():
         # 音声認識が成功し、数字の入力かどうかをチェック
         if user_choice.isdigit():
             choice = int(user_choice) - 1
-            if 0 <= choice < len(devices['devices']):
-                selected_device = devices['devices'][choice]
+            if 0 <= choice < len(devices):
+                selected_device = devices[choice]
                 speak_text(f"{selected_device['name']} を選択しました。")
                 return selected_device['id']
             else:
@@ -103,89 +141,168 @@ def choose_device():
 def search_and_play(device_id):
     """楽曲を検索して再生"""
     speak_text("再生する楽曲を検索してください。")
-    query = recognize_speech()
+    while True:
+        query = recognize_speech()
 
-    # 空のクエリが返された場合、再度入力を促す
-    if not query.strip():
-        speak_text("検索クエリが空です。もう一度楽曲名をお話しください。")
-        return search_and_play(device_id)  # 再度検索
+        # 空のクエリが返された場合、再度入力を促す
+        if not query.strip():
+            speak_text("検索クエリが空です。もう一度楽曲名をお話しください。")
+            continue  # 再度検索
 
-    # ユーザーに認識されたクエリを確認させる
-    speak_text(f"認識された楽曲は「{query}」です。これでよろしいですか？")
-    confirmation = recognize_speech()
+        # ユーザーに認識されたクエリを確認させる
+        speak_text(f"認識された楽曲は「{query}」です。これでよろしいですか？")
+        confirmation = recognize_speech()
+        if "はい" in confirmation:
+            break
+        speak_text("もう一度楽曲名をお話しください。")  # 再度楽曲検索を促す
 
-    if "はい" in confirmation:
-        results = sp.search(q=query, type='track', limit=5)
+    # 同じ曲名の検索は、キャッシュ済みの結果を使う
+    client = get_client()
+    tracks = client.search_tracks(query, limit=5)
 
-        if not results['tracks']['items']:
-            speak_text("楽曲が見つかりませんでした。")
-            return
+    if not tracks:
+        speak_text("楽曲が見つかりませんでした。")
+        return
 
-        speak_text("検索結果を表示します。")
-        for idx, track in enumerate(results['tracks']['items']):
-            track_info = f"{idx + 1}番. {track['name']} by {', '.join(artist['name'] for artist in track['artists'])}"
-            print(track_info)
+    track = choose_track(tracks)
+    client.sp.start_playback(device_id=device_id, uris=[track['uri']])
+    speak_text(f"{track['name']} を再生します。")
 
-        while True:
-            speak_text("再生する楽曲を選択してください。")
-            user_choice = recognize_speech()
-
-            # 音声認識結果から「番」を取り除く
-            user_choice = re.sub(r'番', '', user_choice).strip()
-
-            # 音声認識が成功し、数字の入力かどうかをチェック
-            if user_choice.strip().isdigit():
-                choice = int(user_choice) - 1
-                if 0 <= choice < len(results['tracks']['items']):
-                    track_uri = results['tracks']['items'][choice]['uri']
-                    track = results['tracks']['items'][choice]
-                    sp.start_playback(device_id=device_id, uris=[track_uri])
-                    speak_text(f"{track['name']} を再生します。")
-                    break  # 楽曲再生後、選択終了
-                else:
-                    speak_text("無効な選択です。もう一度選択をお願いします。")
+def choose_track(tracks):
+    """検索結果を表示し、番号で選んだ楽曲を返す"""
+    speak_text("検索結果を表示します。")
+    for idx, track in enumerate(tracks):
+        track_info = f"{idx + 1}番. {track['name']} by {', '.join(artist['name'] for artist in track['artists'])}"
+        print(track_info)
+
+    while True:
+        speak_text("再生する楽曲を選択してください。")
+        user_choice = recognize_speech()
+
+        # 音声認識結果から「番」を取り除く
+        user_choice = re.sub(r'番', '', user_choice).strip()
+
+        # 音声認識が成功し、数字の入力かどうかをチェック
+        if user_choice.strip().isdigit():
+            choice = int(user_choice) - 1
+            if 0 <= choice < len(tracks):
+                return tracks[choice]  # 楽曲を選んだら選択終了
             else:
-                speak_text("無効な入力です。番号を再度言ってください。")
+                speak_text("無効な選択です。もう一度選択をお願いします。")
+        else:
+            speak_text("無効な入力です。番号を再度言ってください。")
+
+def play_from_utterance(text, heard_at=None, answer=False):
+    """
+    「リビングでYOASOBIのアイドルを流して」のような1回の発話から再生する
+    足りない情報や決めきれない候補があるときだけ聞き返す。再生の依頼でなければ False
+    answer=True なら「何をどこで再生しますか？」への答えとして、再生の言い方がなくても再生の依頼とみなす
+    """
+    heard_at = heard_at or time.perf_counter()
+    follow_ups = 0
+    client = get_client()
+    devices = client.devices()
+    command = parse_command(text, devices)
+    if answer and command.action is None and (command.query or command.device_hint):
+        command = command._replace(action="play")
+    if command.action != "play":
+        return False
+
+    # 曲が分からなければ聞き返す（デバイスの指定は最初の発話のものを残す）
+    while not command.query:
+        follow_ups += 1
+        speak_text(follow_up_question(command, devices))
+        answer = parse_command(recognize_speech(), devices)
+        if answer.device_hint is None:
+            answer = answer._replace(device=command.device, device_hint=command.device_hint)
+        command = answer
+
+    device = command.device or (None if command.device_hint else default_device(devices))
+    if device is None:
+        follow_ups += 1
+        speak_text(follow_up_question(command, devices))
+        device_id = choose_device()
+        if device_id is None:
+            return True
     else:
-        speak_text("もう一度楽曲名をお話しください。")
-        search_and_play(device_id)  # 再度楽曲検索を促す
+        device_id = device['id']
 
-def playback_controls():
-    """再生コントロール"""
-    commands = {
-        "停止": sp.pause_playback,
-        "再開": sp.start_playback,
-        "次": sp.next_track,
-        "前": sp.previous_track,
-    }
+    tracks = client.search_tracks(command.query, limit=5)
+    if not tracks:
+        speak_text("楽曲が見つかりませんでした。")
+        return True
+    track = pick_track(tracks, command)
+    if track is None:
+        follow_ups += 1
+        track = choose_track(tracks)
 
-    while True:
-        print("コマンドを言ってください。再生停止、次、前など。終了するには終了と言ってください。")
-        command = recognize_speech()
-        if "終了" in command:
-            speak_text("プログラムを終了します。")
-            pyautogui.hotkey('alt', 'f4')  # Alt + F4を送信してChromeを閉じる
-            sys.exit()  # プログラムを終了
-        if "再生コントロール終了" in command:
-            speak_text("再生コントロールを終了します。")
-            break  # 再生コントロールのみ終了
-        for key, action in commands.items():
-            if key in command:
-                action()
-                speak_text(f"{key}しました。")
-                break
+    client.sp.start_playback(device_id=device_id, uris=[track['uri']])
+    elapsed_ms = (time.perf_counter() - heard_at) * 1000
+    print(f"発話から再生開始まで: {elapsed_ms:.0f} ms（聞き返し {follow_ups} 回）")
+    speak_text(f"{track['name']} を再生します。")
+    return True
+
+# 再生コントロールの音声コマンド
+playback_router = IntentRouter(PLAYBACK_INTENTS)
+
+def playback_controls():
+    """
+    再生コントロール
+    API の呼び出しと確認の読み上げは別スレッドで進め、その間もマイクは次のコマンドを聞く
+    続けて言われたコマンドはまとめて送る（「次」を3回なら3曲先へ）
+    """
+    controller = PlaybackController(get_client().sp,
+                                    speak=lambda message: speak_text(message, keep_listening=True)).start()
+    print("コマンドを言ってください。再生停止、次、前など。終了するには終了と言ってください。")
+    try:
+        while True:
+            intent = playback_router.route(recognize_speech(prompt=False))
+            if intent == "quit":
+                controller.wait_idle(timeout=5)
+                speak_text("プログラムを終了します。")
+                import pyautogui
+                pyautogui.hotkey('alt', 'f4')  # Alt + F4を送信してChromeを閉じる
+                sys.exit()  # プログラムを終了
+            if intent == "exit_controls":
+                controller.wait_idle(timeout=5)
+                speak_text("再生コントロールを終了します。")
+                break  # 再生コントロールのみ終了
+            if intent in ("pause", "resume", "next", "previous"):
+                controller.submit(intent)
+    finally:
+        controller.stop()
 
 def main():
+    # 固定の案内フレーズをバックグラウンドで合成しておく
+    tts_cache.get_cache().prewarm_in_background()
     speak_text("Spotifyを起動するには、'起動' と言ってください。")
 
     while True:
         command = recognize_speech()
-        if "起動" in command:
+        heard_at = last_heard_at
+        # 「リビングでYOASOBIのアイドルを流して」のように、起動と再生を1回で頼まれることもある
+        # （「起動」だけのときは、何をどこで再生するかを聞く）
+        one_shot = "起動" not in command and parse_command(command).action == "play"
+        if "起動" in command or one_shot:
             speak_text("Spotifyを起動します。")
-            open_spotify_web_app()
-            device_id = choose_device()
-            if device_id:
-                search_and_play(device_id)
+            # Webアプリを開いている間に、デバイス一覧を先に取得しておく
+            client = get_client()
+            client.prefetch_devices()
+            if not (one_shot and client.devices()):
+                open_spotify_web_app()
+            if not one_shot:
+                speak_text("何をどこで再生しますか？ 例えば「リビングでYOASOBIのアイドルを流して」のように話してください。")
+                command = recognize_speech()
+                heard_at = last_heard_at
+
+            played = play_from_utterance(command, heard_at, answer=not one_shot)
+            if not played:
+                # 1回の発話で分からなければ、従来どおりデバイスと楽曲を順に聞く
+                device_id = choose_device()
+                if device_id:
+                    search_and_play(device_id)
+                    played = True
+            if played:
                 # 音楽再生後の案内はテキストのみ
                 print("再生コントロールを操作するにはコマンドを入力してください。停止、再開、次、前、再生コントロール終了など。終了するには終了と言ってください。")
                 playback_controls()
@@ -195,6 +312,7 @@ def main():
                 command = recognize_speech()
                 if "終了" in command:
                     speak_text("プログラムを終了します。")
+                    import pygetwindow as gw
                     # すべてのウィンドウからタイトルを検索
                     for window in gw.getAllTitles():
                         if window_title in window:
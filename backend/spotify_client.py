@@ -0,0 +1,201 @@
+"""
+Spotify Web API のクライアント（接続の使い回しと、検索結果・デバイス一覧のキャッシュ）
+
+- API とトークン更新で1つの keep-alive セッションを共有する
+- 検索結果はクエリごとに TTL つきで保持する（全角/半角・大文字/小文字・空白の連続の違いだけを同じとみなす）
+- デバイス一覧は短い間だけ保持し、期限が切れたら古い一覧を返しつつ裏で取り直す
+
+ローカルのスタブで動かす場合:
+    python backend/benchmarks/stub_spotify.py --port 8004
+    SPOTIFY_API_PREFIX=http://127.0.0.1:8004/v1/ SPOTIFY_ACCESS_TOKEN=stub python backend/spotify.py
+"""
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Spotify クライアントの設定（環境変数で上書き可能）
+SPOTIFY_API_PREFIX = os.getenv("SPOTIFY_API_PREFIX", "https://api.spotify.com/v1/")
+SPOTIFY_ACCESS_TOKEN = os.getenv("SPOTIFY_ACCESS_TOKEN")  # 指定するとOAuthを使わずこのトークンで呼ぶ（スタブ用）
+SPOTIFY_TIMEOUT = float(os.getenv("SPOTIFY_TIMEOUT", "5"))
+SPOTIFY_SEARCH_TTL = int(os.getenv("SPOTIFY_SEARCH_TTL", "3600"))  # 検索結果を使い回す時間（秒）
+SPOTIFY_SEARCH_CACHE_SIZE = int(os.getenv("SPOTIFY_SEARCH_CACHE_SIZE", "256"))
+SPOTIFY_DEVICE_TTL = int(os.getenv("SPOTIFY_DEVICE_TTL", "15"))  # デバイス一覧をそのまま使う時間（秒）
+SPOTIFY_DEVICE_MAX_STALE = int(os.getenv("SPOTIFY_DEVICE_MAX_STALE", "300"))  # 期限切れでも裏で更新しつつ返してよい時間
+SPOTIFY_SCOPE = "user-read-playback-state user-modify-playback-state"
+
+
+def create_session():
+    """
+    keep-alive の接続を保持するセッション（spotipy と同じ条件で再試行する）
+    """
+    # requests と spotipy は読み込みに時間がかかるので、クライアントを作るときに import する
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    session = requests.Session()
+    # 操作（POST / PUT）も再試行するので、送った後に応答が遅れただけのとき（読み取りのエラー）は
+    # 再試行しない（「次」が2回送られて2曲飛ばないように）
+    retry = Retry(total=3, read=False, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def create_spotify(session=None):
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+    session = session or create_session()
+    if SPOTIFY_ACCESS_TOKEN:
+        sp = spotipy.Spotify(auth=SPOTIFY_ACCESS_TOKEN, requests_session=session,
+                             requests_timeout=SPOTIFY_TIMEOUT)
+    else:
+        sp = spotipy.Spotify(
+            auth_manager=SpotifyOAuth(
+                client_id=os.getenv('SPOTIFY_CLIENT_ID'),
+                client_secret=os.getenv('SPOTIFY_CLIENT_SECRET'),
+                redirect_uri=os.getenv('SPOTIFY_REDIRECT_URI'),
+                scope=SPOTIFY_SCOPE,
+                requests_session=session,  # トークンの更新も同じ接続を使う
+            ),
+            requests_session=session,
+            requests_timeout=SPOTIFY_TIMEOUT,
+        )
+    sp.prefix = SPOTIFY_API_PREFIX
+    return sp
+
+
+class SearchCache:
+    """
+    クエリ → 検索結果 の LRU キャッシュ（TTL つき）
+    """
+
+    def __init__(self, ttl=SPOTIFY_SEARCH_TTL, max_size=SPOTIFY_SEARCH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # キー -> (保存時刻, 結果)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query, search_type, limit):
+        # 全角/半角と大文字/小文字をそろえ、空白の連続を1つにするだけにする
+        # （カタカナとひらがなや、空白の有無は別の曲・アーティストを指すことがあるので区別する）
+        query = " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+        return query, search_type, limit
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.time(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class DeviceCache:
+    """
+    デバイス一覧のキャッシュ
+    ttl 秒までは保存済みの一覧を返し、期限切れ後 max_stale 秒以内なら
+    古い一覧を返しながらバックグラウンドで取り直す（stale-while-revalidate）
+    """
+
+    def __init__(self, fetch, ttl=SPOTIFY_DEVICE_TTL, max_stale=SPOTIFY_DEVICE_MAX_STALE):
+        self.fetch = fetch  # デバイスのリストを返す関数
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._devices = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._refreshed = threading.Event()  # 裏での取得が終わったら立つ
+        self._lock = threading.Lock()
+
+    def get(self, fresh=False):
+        """
+        fresh=True なら必ず取り直す（一覧が空だったときなど）
+        """
+        if not fresh and self._devices is None and self._refreshing:
+            # 先読み中なら、同じ取得をもう一度送らずに終わるのを待つ
+            self._refreshed.wait(SPOTIFY_TIMEOUT)
+        age = time.time() - self._fetched_at
+        if not fresh and self._devices is not None:
+            if age < self.ttl:
+                return self._devices
+            if age < self.ttl + self.max_stale:
+                self.refresh_in_background()
+                return self._devices
+        return self._refresh()
+
+    def _refresh(self):
+        devices = self.fetch()
+        with self._lock:
+            self._devices = devices
+            self._fetched_at = time.time()
+        return devices
+
+    def refresh_in_background(self):
+        """
+        裏で一覧を取り直す（先読みにも使う）
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._refreshed.clear()
+
+        def refresh():
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"デバイス一覧の更新に失敗しました: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+                self._refreshed.set()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+class SpotifyClient:
+    """
+    spotipy のクライアントに、検索とデバイス一覧のキャッシュを足したもの
+    再生の操作などは .sp をそのまま使う
+    """
+
+    def __init__(self, sp=None, search_cache=None):
+        self.session = create_session()
+        self.sp = sp or create_spotify(self.session)
+        self.search_cache = search_cache or SearchCache()
+        self.device_cache = DeviceCache(lambda: self.sp.devices()["devices"])
+
+    def search_tracks(self, query, limit=5):
+        """
+        楽曲を検索し、トラックのリストを返す
+        """
+        key = SearchCache.key(query, "track", limit)
+        tracks = self.search_cache.get(key)
+        if tracks is None:
+            tracks = self.sp.search(q=query, type='track', limit=limit)['tracks']['items']
+            if tracks:  # 見つからなかった結果は一時的なこともあるので保存しない
+                self.search_cache.put(key, tracks)
+        return tracks
+
+    def devices(self, fresh=False):
+        return self.device_cache.get(fresh)
+
+    def prefetch_devices(self):
+        self.device_cache.refresh_in_background()
@@ -0,0 +1,176 @@
+"""
+Spotify の音声コマンドを1回の発話から解釈する
+
+「リビングでYOASOBIのアイドルを流して」のような発話から、再生するデバイス・
+アーティスト・曲名・操作を取り出す。足りない情報や決めきれない候補があるときだけ、
+呼び出し側が追加の質問をする。
+"""
+import re
+from collections import namedtuple
+from intents import IntentRouter, PLAYBACK_INTENTS, normalize
+
+# 再生を頼む言い方（長いものから照合する）
+PLAY_VERBS = [
+    "流してください", "再生してください", "かけてください", "流して", "ながして", "再生して",
+    "かけて", "聴かせて", "聞かせて", "聴きたい", "聞きたい", "流す", "再生", "かける",
+]
+# 曲名の代わりに使われる、特定の曲を指さない言葉
+GENERIC_WORDS = ["曲", "歌", "音楽", "なにか", "何か", "なんか"]
+# デバイスの種類の呼び方（Spotify の type -> 呼び方）
+DEVICE_TYPE_NAMES = {
+    "Computer": ["パソコン", "pc", "コンピューター"],
+    "Smartphone": ["スマホ", "携帯", "スマートフォン"],
+    "Speaker": ["スピーカー"],
+    "TV": ["テレビ"],
+}
+
+# 解釈した発話（device は一致したデバイスの dict。device_hint は発話中のデバイスの呼び方）
+SpotifyCommand = namedtuple("SpotifyCommand", ["action", "device", "device_hint", "artist", "track", "query"])
+
+_control_router = IntentRouter(PLAYBACK_INTENTS)
+
+
+def device_aliases(device):
+    """
+    デバイスの呼び方（正規化済み）。「リビングのスピーカー」なら「リビング」も含める
+    """
+    name = device["name"]
+    aliases = {name}
+    for suffix in ("のスピーカー", "スピーカー", "のパソコン", "のテレビ", "の"):
+        if name.endswith(suffix) and len(name) > len(suffix):
+            aliases.add(name[:-len(suffix)])
+    # 「Web Player (Chrome)」のような名前は括弧の前も呼び方にする
+    aliases.add(re.split(r"[（(]", name)[0])
+    aliases.update(DEVICE_TYPE_NAMES.get(device.get("type"), []))
+    return {normalize(alias) for alias in aliases if normalize(alias)}
+
+
+def match_devices(hint, devices):
+    """
+    呼び方に一致するデバイスのリスト（名前に含まれるか、名前を含むもの）
+    「寝室のスピーカー」が「スピーカー」にも当たるように、最も長く一致したものだけを残す
+    """
+    hint = normalize(hint)
+    if not hint:
+        return []
+    matches = []
+    for device in devices:
+        lengths = [min(len(alias), len(hint)) for alias in device_aliases(device) if alias in hint or hint in alias]
+        if lengths:
+            matches.append((max(lengths), device))
+    longest = max((length for length, _ in matches), default=0)
+    return [device for length, device in matches if length == longest]
+
+
+def _strip_verb(text):
+    for verb in PLAY_VERBS:
+        index = text.rfind(verb)
+        if index != -1 and index + len(verb) >= len(text.rstrip("。！!？? ")) - 1:
+            return text[:index], True
+    return text, False
+
+
+def parse_command(text, devices=()):
+    """
+    発話を SpotifyCommand にする
+    devices（Spotify のデバイス一覧）を渡すと、発話中の呼び方に一致するデバイスを選ぶ
+    action は再生の言い方（PLAY_VERBS）があれば "play"、操作の言葉があればその操作、どちらもなければ None
+    """
+    text = text.strip()
+    rest, is_play = _strip_verb(text)
+    action = "play" if is_play else None
+    if action is None:
+        action = _control_router.route(text)
+
+    # 「〇〇で」（文頭）または「〜を〇〇で」（動詞の直前）をデバイスの指定とみなす
+    # 「リビングで流して」のように「〇〇で」しかなければ、デバイスだけの指定（曲は聞き返す）
+    device_hint = None
+    match = re.match(r"^(?P<device>[^をでに]{1,20}?)(?:で|に|から)(?P<rest>.*)$", rest.strip())
+    if match and not match.group("rest").strip():
+        device_hint, rest = match.group("device"), ""
+    elif match and (match_devices(match.group("device"), devices) or "を" in match.group("rest")):
+        device_hint, rest = match.group("device"), match.group("rest")
+    else:
+        match = re.match(r"^(?P<rest>.+)を(?P<device>[^を]{1,20}?)(?:で|に|から)$", rest.strip())
+        if match:
+            device_hint, rest = match.group("device"), match.group("rest") + "を"
+
+    rest = re.sub(r"(を|は)\s*$", "", rest.strip()).strip()
+
+    # 「アーティストの曲名」に分ける（曲名が「曲」「歌」などならアーティストだけ）
+    artist, track = None, rest or None
+    match = re.match(r"^(?P<artist>.+?)の(?P<track>.+)$", rest)
+    if match:
+        artist, track = match.group("artist").strip(), match.group("track").strip()
+    if track in GENERIC_WORDS:
+        track = None
+    if action not in (None, "play"):
+        artist, track = None, None  # 停止・次などの操作には曲の指定はない
+    query = " ".join(part for part in (artist, track) if part)
+
+    device = None
+    if device_hint is not None:
+        candidates = match_devices(device_hint, devices)
+        if len(candidates) == 1:
+            device = candidates[0]
+    return SpotifyCommand(action, device, device_hint, artist, track, query)
+
+
+def default_device(devices):
+    """
+    デバイスの指定がないときに使うデバイス（1台だけなら その1台、複数なら再生中のもの）
+    """
+    if len(devices) == 1:
+        return devices[0]
+    active = [device for device in devices if device.get("is_active")]
+    return active[0] if len(active) == 1 else None
+
+
+def pick_track(tracks, command):
+    """
+    検索結果から曲を1つ選ぶ。決めきれなければ None（呼び出し側が番号を聞く）
+    曲名やアーティストが発話と一致するものを優先し、同点なら検索順で先のもの
+    """
+    if not tracks:
+        return None
+    track_hint = normalize(command.track or "")
+    artist_hint = normalize(command.artist or "")
+    query_hint = normalize(command.query or "")
+    # 「君の名は」のように、「の」で分けたが実は曲名全体だった場合
+    phrase_hint = normalize(f"{command.artist}の{command.track}") if command.artist and command.track else ""
+
+    def score(track):
+        name = normalize(track["name"])
+        artists = [normalize(artist["name"]) for artist in track["artists"]]
+        points = 0
+        if phrase_hint and name == phrase_hint:
+            points += 3
+        if track_hint:
+            points += 2 if name == track_hint else (1 if track_hint in name or name in track_hint else 0)
+        if artist_hint and any(artist_hint in artist or artist in artist_hint for artist in artists):
+            points += 1
+        if not track_hint and not artist_hint and query_hint and (name in query_hint or query_hint in name):
+            points += 1
+        return points
+
+    best = max(tracks, key=score)
+    if score(best) > 0:
+        return best
+    # アーティストだけ・曲名だけの指定でも一致しなければ、どれを流すか聞く
+    return None
+
+
+def follow_up_question(command, devices):
+    """
+    追加で聞く必要があることを質問文で返す（なければ None）
+    """
+    if command.action == "play" and not command.query:
+        return "何を再生しますか？"
+    if command.device is None:
+        if command.device_hint is not None:
+            if len(match_devices(command.device_hint, devices)) > 1:
+                return f"「{command.device_hint}」に当てはまるデバイスが複数あります。デバイスを選んでください。"
+            return f"「{command.device_hint}」に当てはまるデバイスが見つかりません。デバイスを選んでください。"
+        if default_device(devices) is None:
+            return "どのデバイスで再生しますか？"
+    return None
@@ -0,0 +1,249 @@
+"""
+Spotify の再生コントロールを、音声の聞き取りと並行して進める
+
+- 聞き取ったコマンドはキューに積み、API の呼び出しは別スレッドで行う
+- 続けて届いたコマンドはまとめる（「次」を3回なら3曲先へ、停止と再開なら最後のものだけ）
+- 確認の音声も別スレッドで読み上げるので、その間もマイクは次のコマンドを聞ける
+- 再生状態は一定間隔で取得してキャッシュする（曲の移動の結果を仮に反映し、少し後で取り直す）
+- 停止・再開は、他の端末（スマホやデスクトップのアプリ）で操作されているかもしれないので
+  キャッシュした状態で判断せず、必ず送る
+"""
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# 再生コントロールの設定（環境変数で上書き可能）
+SPOTIFY_STATE_POLL = float(os.getenv("SPOTIFY_STATE_POLL", "5"))  # 再生状態を取り直す間隔（秒）
+# 続くコマンドをまとめて待つ時間（秒）。話し終わってから認識結果が届くまで（無音の判定 0.8 秒 + 認識）より
+# 長くしないと、続けて言った「次、次」がまとめられない。長くするほど1回だけのコマンドの反映は遅れる
+SPOTIFY_MERGE_WINDOW = float(os.getenv("SPOTIFY_MERGE_WINDOW", "1.5"))
+SPOTIFY_SETTLE_SECONDS = 0.4  # 操作の後、Spotify 側に反映されるまで待ってから状態を取り直す時間（秒）
+
+# 曲を移動するコマンドの向き
+SKIP_STEPS = {"next": 1, "previous": -1}
+
+# キャッシュした再生状態（track は曲名、fetched_at は取得した時刻）
+PlaybackState = namedtuple("PlaybackState", ["is_playing", "track", "device_id", "fetched_at"])
+
+
+def merge_commands(intents):
+    """
+    続けて届いたコマンドをまとめ、(操作, 回数) のリストにする
+    「次」「前」は足し引きして ("skip", n) に、「停止」「再開」は続いたものの最後だけにする
+    """
+    merged = []
+    for intent in intents:
+        last = merged[-1] if merged else None
+        if intent in SKIP_STEPS:
+            if last is not None and last[0] == "skip":
+                merged[-1] = ("skip", last[1] + SKIP_STEPS[intent])
+            else:
+                merged.append(("skip", SKIP_STEPS[intent]))
+        elif intent in ("pause", "resume") and last is not None and last[0] in ("pause", "resume"):
+            merged[-1] = (intent, 1)
+        else:
+            merged.append((intent, 1))
+    return [(action, count) for action, count in merged if not (action == "skip" and count == 0)]
+
+
+class PlaybackStateCache:
+    """
+    現在の再生状態を一定間隔で取得して保持する
+    操作の直後は結果を仮に反映し、少し後で取り直す
+    """
+
+    def __init__(self, sp, interval=SPOTIFY_STATE_POLL):
+        self.sp = sp
+        self.interval = interval
+        self.state = None
+        self.polls = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        playback = self.sp.current_playback()
+        self.polls += 1
+        if playback:
+            item = playback.get("item") or {}
+            state = PlaybackState(playback.get("is_playing", False), item.get("name"),
+                                  (playback.get("device") or {}).get("id"), time.time())
+        else:
+            state = PlaybackState(False, None, None, time.time())
+        with self._lock:
+            self.state = state
+        return state
+
+    def get(self):
+        """
+        キャッシュした状態（まだ取得していなければ取得する）
+        """
+        return self.state or self.refresh()
+
+    def assume(self, **changes):
+        """
+        操作の結果を仮に反映し、次の取得を早める
+        """
+        with self._lock:
+            if self.state is not None:
+                self.state = self.state._replace(**changes)
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def _poll_loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"再生状態の取得に失敗しました: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            # 操作の直後は、Spotify 側に反映されるまで少し待ってから取る
+            self._stopped.wait(SPOTIFY_SETTLE_SECONDS)
+
+
+class PlaybackController:
+    """
+    再生コントロールのコマンドを受け付け、まとめて Spotify に送る
+    submit() はすぐ戻るので、呼び出し側はそのまま次の発話を聞ける
+    まとめた曲の移動は1曲ずつ続けて送る。送り始めた移動は stop() の後も最後まで送り、
+    途中で失敗すればそこまでの曲数を確認の言葉で伝える
+    """
+
+    def __init__(self, sp, speak=print, merge_window=SPOTIFY_MERGE_WINDOW, state=None):
+        self.sp = sp
+        self.speak = speak
+        self.merge_window = merge_window
+        self.state = state or PlaybackStateCache(sp)
+        self.api_calls = 0
+        self._commands = queue.Queue()
+        self._speech = queue.Queue()
+        self._pending = 0  # まだ終わっていないコマンドと読み上げの数
+        self._pending_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._threads = []
+
+    def start(self):
+        self.state.start()
+        for target in (self._command_loop, self._speech_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, intent):
+        """
+        コマンドをキューに積む（pause / resume / next / previous）
+        """
+        self._add_pending(1)
+        self._commands.put(intent)
+
+    def wait_idle(self, timeout=None):
+        """
+        積んだコマンドと確認の読み上げがすべて終わるまで待つ
+        """
+        return self._idle.wait(timeout)
+
+    def stop(self):
+        self._commands.put(None)
+        self._speech.put(None)
+        self.state.stop()
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def _command_loop(self):
+        while True:
+            intent = self._commands.get()
+            if intent is None:
+                return
+            intents = [intent]
+            # 少しの間に続けて届いたコマンドはまとめる
+            deadline = time.perf_counter() + self.merge_window
+            while True:
+                try:
+                    intent = self._commands.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if intent is None:
+                    self._commands.put(None)
+                    break
+                intents.append(intent)
+            for action, count in merge_commands(intents):
+                try:
+                    message = self._execute(action, count)
+                except Exception as e:
+                    print(f"再生コントロールに失敗しました: {e}")
+                    message = "操作に失敗しました。"
+                if message:
+                    self._add_pending(1)
+                    self._speech.put(message)
+            self._add_pending(-len(intents))
+
+    def _execute(self, action, count):
+        if action in ("pause", "resume"):
+            playing = action == "resume"
+            # キャッシュした状態は他の端末での操作を反映していないことがあるので、判断に使わずに送る
+            try:
+                self._call(self.sp.start_playback if playing else self.sp.pause_playback)
+            except Exception:
+                # 停止中の停止・再生中の再開は Web API がエラーを返すので、状態を取り直して確かめる
+                if self.state.refresh().is_playing != playing:
+                    raise
+                return "すでに再生中です。" if playing else "すでに停止しています。"
+            self.state.assume(is_playing=playing)
+            return "再開しました。" if playing else "停止しました。"
+        if action == "skip":
+            # Web API に何曲先へ進むかの指定はないので、まとめた回数だけ続けて送る
+            # 途中で失敗した場合は、それまでに移動できた曲数を伝える（送った移動は取り消せない）
+            step = self.sp.next_track if count > 0 else self.sp.previous_track
+            direction = "先" if count > 0 else "前"
+            moved = 0
+            try:
+                for _ in range(abs(count)):
+                    self._call(step)
+                    moved += 1
+            except Exception:
+                if moved == 0:
+                    raise
+                self.state.assume(is_playing=True, track=None)
+                return f"{moved}曲{direction}に移動しましたが、残りの{abs(count) - moved}曲の移動に失敗しました。"
+            self.state.assume(is_playing=True, track=None)
+            if abs(count) == 1:
+                return "次しました。" if count > 0 else "前しました。"
+            return f"{abs(count)}曲{direction}に移動しました。"
+        return None
+
+    def _call(self, method):
+        self.api_calls += 1
+        method()
+
+    def _speech_loop(self):
+        while True:
+            message = self._speech.get()
+            if message is None:
+                return
+            try:
+                self.speak(message)
+            except Exception as e:
+                print(f"読み上げに失敗しました: {e}")
+            self._add_pending(-1)
+
+    def _add_pending(self, delta):
+        with self._pending_lock:
+            self._pending += delta
+            if self._pending:
+                self._idle.clear()
+            else:
+                self._idle.set()
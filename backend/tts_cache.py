@@ -0,0 +1,215 @@
+"""
+読み上げ音声のキャッシュ
+
+テキスト + 声 + 言語のハッシュをキーに、合成済みの MP3 をメモリとディスクに保持する。
+
+固定フレーズの事前合成:
+    python backend/tts_cache.py prewarm
+"""
+import hashlib
+import io
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# キャッシュの設定（環境変数で上書き可能）
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "chatai_tts"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))  # ディスク上の合計サイズの上限
+TTS_CACHE_MEMORY_ITEMS = int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "64"))  # メモリに保持する件数の上限
+
+# 毎回同じ内容を読み上げる固定フレーズ（起動時に事前合成する）
+STATIC_PHRASES = [
+    # spotify.py
+    "音声をお話しください...",
+    "音声が認識できませんでした。もう一度お話しください。",
+    "音声認識サービスに接続できません。",
+    "Spotifyを起動するには、'起動' と言ってください。",
+    "Spotifyを起動します。",
+    "Spotify Webアプリを開きます。",
+    "利用可能なデバイスが見つかりませんでした。",
+    "利用可能なデバイスを取得しました。",
+    "デバイスを選択してください。",
+    "無効な選択です。もう一度選択をお願いします。",
+    "無効な入力です。番号を再度言ってください。",
+    "再生する楽曲を検索してください。",
+    "検索クエリが空です。もう一度楽曲名をお話しください。",
+    "楽曲が見つかりませんでした。",
+    "検索結果を表示します。",
+    "再生する楽曲を選択してください。",
+    "もう一度楽曲名をお話しください。",
+    "停止しました。",
+    "再開しました。",
+    "次しました。",
+    "前しました。",
+    "再生コントロールを終了します。",
+    "再生コントロールを終了しますか？ '再生コントロール終了' と言ってください。再開するには '起動' と言ってください。",
+    "プログラムを終了します。",
+]
+
+
+def synthesize_gtts(text, lang="ja"):
+    """
+    gTTS で音声を合成し、MP3 のバイト列を返す
+    """
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def cache_key(text, lang="ja", voice="gtts"):
+    return hashlib.sha256(f"{voice}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    合成済み音声のキャッシュ（メモリとディスクの2段、どちらもLRU）
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, memory_items=TTS_CACHE_MEMORY_ITEMS,
+                 synthesize=synthesize_gtts, voice="gtts"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.synthesize = synthesize
+        self.voice = voice
+        self._memory = OrderedDict()  # key -> MP3 のバイト列
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        # ディスク上のファイルを古い順に並べておく（サイズの合計を毎回数えないため）
+        entries = sorted(
+            (entry.stat().st_mtime, entry.name[:-4], entry.stat().st_size)
+            for entry in os.scandir(directory) if entry.name.endswith(".mp3")
+        )
+        self._disk = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_bytes = sum(self._disk.values())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".mp3")
+
+    def get(self, text, lang="ja"):
+        """
+        音声（MP3 のバイト列）を返す。キャッシュになければ合成して保存する
+        """
+        key = cache_key(text, lang, self.voice)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                return audio
+            audio = self._read_disk(key)
+        if audio is None:
+            audio = self.synthesize(text, lang)
+            with self._lock:
+                self._write_disk(key, audio)
+        with self._lock:
+            self._remember(key, audio)
+        return audio
+
+    def path_for(self, text, lang="ja"):
+        """
+        音声ファイルのパスを返す（ファイルで再生するライブラリ向け）
+        """
+        key = cache_key(text, lang, self.voice)
+        with self._lock:
+            if key in self._disk:
+                self._touch(key)
+                return self._path(key)
+        audio = self.synthesize(text, lang)
+        with self._lock:
+            self._write_disk(key, audio)
+            return self._path(key)
+
+    def prewarm(self, phrases=STATIC_PHRASES, lang="ja"):
+        """
+        まだキャッシュにないフレーズを合成しておく。合成した件数を返す
+        """
+        synthesized = 0
+        for phrase in phrases:
+            key = cache_key(phrase, lang, self.voice)
+            if key in self._disk:
+                continue
+            try:
+                audio = self.synthesize(phrase, lang)
+            except Exception as e:
+                print(f"事前合成に失敗しました: {phrase} ({e})")
+                continue
+            with self._lock:
+                self._write_disk(key, audio)
+            synthesized += 1
+        return synthesized
+
+    def prewarm_in_background(self, phrases=STATIC_PHRASES, lang="ja"):
+        threading.Thread(target=self.prewarm, args=(phrases, lang), daemon=True).start()
+
+    def _remember(self, key, audio):
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key):
+        self._disk.move_to_end(key)
+        try:
+            os.utime(self._path(key))  # 再起動後も使われた順を保てるように更新日時を更新する
+        except OSError:
+            pass
+
+    def _read_disk(self, key):
+        if key not in self._disk:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+        except OSError:
+            self._disk_bytes -= self._disk.pop(key)
+            return None
+        self._touch(key)
+        return audio
+
+    def _write_disk(self, key, audio):
+        # 一時ファイルに書いてから置き換え、途中で落ちても壊れたファイルを残さない
+        temp_path = self._path(key) + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+        os.replace(temp_path, self._path(key))
+        self._disk_bytes += len(audio) - self._disk.pop(key, 0)
+        self._disk[key] = len(audio)
+        while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+
+def get_cache():
+    """
+    プロセス内で共有するキャッシュ
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TTSCache()
+    return _default_cache
+
+
+def synthesize(text, lang="ja"):
+    """
+    キャッシュ経由で音声を合成する
+    """
+    return get_cache().get(text, lang)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["prewarm"]:
+        print(__doc__)
+        sys.exit(1)
+    count = get_cache().prewarm()
+    print(f"{count} 件のフレーズを合成しました（{TTS_CACHE_DIR}）")
@@ -0,0 +1,41 @@
+import json
+
+# ストリーミング応答のフレーム種別
+# start: 応答開始 / delta: 差分テキスト / end: 応答終了（全文を含む）
+# skill: スキルの状態や結果（JSON）
+FRAME_START = "start"
+FRAME_DELTA = "delta"
+FRAME_END = "end"
+FRAME_SKILL = "skill"
+
+
+def start_frame():
+    return json.dumps({"type": FRAME_START})
+
+
+def delta_frame(text):
+    return json.dumps({"type": FRAME_DELTA, "text": text}, ensure_ascii=False)
+
+
+def end_frame(text):
+    return json.dumps({"type": FRAME_END, "text": text}, ensure_ascii=False)
+
+
+def skill_frame(name, result):
+    return json.dumps({"type": FRAME_SKILL, "skill": name, "result": result}, ensure_ascii=False)
+
+
+def parse_frame(raw):
+    """
+    受信したメッセージをフレームとして解釈する
+    フレームでない通常のテキストの場合は None を返す
+    """
+    if not raw.startswith("{"):
+        return None
+    try:
+        frame = json.loads(raw)
+    except ValueError:
+        return None
+    if not isinstance(frame, dict) or "type" not in frame:
+        return None
+    return frame
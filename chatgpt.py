@@ -5,6 +5,7 @@ from awsiot import mqtt_connection_builder
 from dotenv import load_dotenv
 import os
 import openai
+from backend.context_window import ContextWindow, SUMMARY_TOKEN_BUDGET, count_message_tokens
 
 # 環境変数をロード
 load_dotenv()
@@ -17,10 +18,30 @@ messages = [
     {"role": "system", "content": "あなたは親切なAIアシスタントです。"},
     ]
 
+# トークン予算内にプロンプトを収め、古い会話は要約する
+context = ContextWindow(messages[0]["content"])
+
+def fold_context(history):
+    if not context.needs_fold(history):
+        return
+    request, upto = context.fold_request(history)
+    if request is None:
+        return
+    completion = openai.ChatCompletion.create(
+        model="",
+        messages=request,
+        max_tokens=SUMMARY_TOKEN_BUDGET
+    )
+    context.apply_summary(completion.choices[0].message.content, upto)
+
 def chatgpt(messages):
+    history = messages[1:]  # 先頭はシステムプロンプト
+    fold_context(history)
+    prompt = context.build(history)
+    print(f"プロンプトのトークン数: {count_message_tokens(prompt)}")
     completion = openai.ChatCompletion.create(
         model="",
-        messages=messages,
+        messages=prompt,
         temperature=0.7
     )
     response = completion.choices[0].message.content